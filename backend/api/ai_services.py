@@ -1,35 +1,160 @@
-import random
-import datetime
-
-def predict_fraud_score(ticket_code):
-    # Mock AI: analyze code pattern
-    # Determine if it looks suspicious (e.g. strict length, specific prefix)
-    if "TEST" in ticket_code:
-        return 0.9
-    if len(ticket_code) < 5:
-        return 0.7
-    return round(random.uniform(0, 0.2), 2)
-
-def predict_crowd_levels(zone_capacity, current_count):
-    # Mock AI: Predict next hour trend
-    trend = random.choice([-10, 0, 10, 20, 50])
-    prediction = current_count + trend
-    risk = "Low"
-    if prediction > zone_capacity * 0.9:
-        risk = "High"
-    elif prediction > zone_capacity * 0.7:
-        risk = "Medium"
-    
-    return {
-        "predicted_count": max(0, prediction),
-        "risk_level": risk,
-        "suggestion": "Open Gate B" if risk == "High" else "Monitor"
-    }
-
-def forecast_energy_usage(current_load):
-    # Simple linear projection + noise
-    forecast = [current_load * (1 + random.uniform(-0.1, 0.1)) for _ in range(5)]
-    return forecast
+import json
+import math
+
+def _numpy():
+    # Imported on first use, and optional: the serverless bundle ships
+    # without NumPy and the batch functions fall back to plain Python
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# Ticket fraud model: a logistic score over per-ticket features. The
+# defaults are hand-calibrated; a fitted model is loaded from JSON with
+# the same shape ({"bias": ..., "weights": {feature: weight}}).
+FRAUD_FEATURES = ('test_code', 'weak_code', 'customer_burst', 'seat_collision', 'price_anomaly')
+DEFAULT_FRAUD_MODEL = {
+    "bias": -4.0,
+    "weights": {
+        "test_code": 7.0,       # placeholder codes such as TEST-1
+        "weak_code": 4.0,       # 0..1, guessable codes with little information
+        "customer_burst": 2.5,  # doublings of a customer's tickets past twice the usual
+        "seat_collision": 3.0,  # other tickets for the same seat, up to 3
+        "price_anomaly": 0.7,   # robust z-score against the event's prices past 3, up to 10
+    },
+}
+
+def code_entropy(code):
+    # Shannon entropy of the code's characters, in bits per character
+    if not code:
+        return 0.0
+    counts = {}
+    for char in code:
+        counts[char] = counts.get(char, 0) + 1
+    n = len(code)
+    return -sum(c / n * math.log2(c / n) for c in counts.values())
+
+def fraud_features(code, customer_tickets, typical_tickets, seat_tickets, price, price_median, price_scale):
+    # One row of FRAUD_FEATURES. Counts include the ticket itself;
+    # typical_tickets is what a customer usually buys for the event. A
+    # price of 0 (complimentary) or an event without prices is not scored
+    bits = code_entropy(code) * len(code)
+    price_z = 0.0
+    if price and price_median:
+        price_z = min(10.0, max(0.0, abs(float(price) - price_median) / price_scale - 3))
+    return (
+        1.0 if "TEST" in code.upper() else 0.0,
+        max(0.0, 1.0 - bits / 24),
+        max(0.0, math.log2(customer_tickets / typical_tickets) - 1) if customer_tickets > typical_tickets else 0.0,
+        float(min(3, max(0, seat_tickets - 1))),
+        price_z,
+    )
+
+class FraudModel:
+    def __init__(self, bias=None, weights=None):
+        weights = {**DEFAULT_FRAUD_MODEL["weights"], **(weights or {})}
+        self.bias = DEFAULT_FRAUD_MODEL["bias"] if bias is None else float(bias)
+        self.weights = tuple(float(weights[name]) for name in FRAUD_FEATURES)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            spec = json.load(f)
+        unknown = set(spec.get("weights", {})) - set(FRAUD_FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown fraud model features: {', '.join(sorted(unknown))}")
+        return cls(spec.get("bias"), spec.get("weights"))
+
+    def score(self, features):
+        # Probability of fraud for one feature row, rounded like stored scores
+        z = self.bias + sum(w * x for w, x in zip(self.weights, features))
+        return round(1 / (1 + math.exp(-z)), 2)
+
+    def score_many(self, rows):
+        # score() for a list of feature rows in one vectorized pass
+        np = _numpy()
+        if np is None or not rows:
+            return [self.score(row) for row in rows]
+        z = self.bias + np.asarray(rows, dtype=float) @ np.asarray(self.weights)
+        return np.round(1 / (1 + np.exp(-z)), 2).tolist()
+
+def predict_crowd_levels_batch(capacities, counts, history, timestamps, horizon):
+    # Vectorized crowd prediction for every zone at once.
+    # history: (zones, samples) recent counts, timestamps: (zones, samples)
+    # seconds; NaN marks missing samples. The trend is each zone's least
+    # squares slope over its history, projected ``horizon`` seconds ahead.
+    np = _numpy()
+    if np is None:
+        return _predict_crowd_levels_rows(capacities, counts, history, timestamps, horizon)
+    capacities = np.asarray(capacities, dtype=float)
+    counts = np.asarray(counts, dtype=float)
+    history = np.asarray(history, dtype=float)
+    timestamps = np.asarray(timestamps, dtype=float)
+
+    valid = ~np.isnan(history)
+    n = valid.sum(axis=1)
+    t = np.where(valid, timestamps, 0.0)
+    y = np.where(valid, history, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_mean = t.sum(axis=1) / n
+        y_mean = y.sum(axis=1) / n
+        dt = np.where(valid, timestamps - t_mean[:, None], 0.0)
+        dy = np.where(valid, history - y_mean[:, None], 0.0)
+        slope = (dt * dy).sum(axis=1) / (dt * dt).sum(axis=1)
+    slope = np.where((n >= 2) & np.isfinite(slope), slope, 0.0)
+
+    predicted = np.clip(np.rint(counts + slope * horizon), 0, None).astype(int)
+    risk = np.where(predicted > capacities * 0.9, "High",
+                    np.where(predicted > capacities * 0.7, "Medium", "Low"))
+    suggestion = np.where(risk == "High", "Open Gate B", "Monitor")
+    return predicted, risk, suggestion
+
+def _predict_crowd_levels_rows(capacities, counts, history, timestamps, horizon):
+    # predict_crowd_levels_batch without NumPy, one zone at a time
+    predicted, risk, suggestion = [], [], []
+    for capacity, count, ys, ts in zip(capacities, counts, history, timestamps):
+        points = [(t, y) for t, y in zip(ts, ys) if not math.isnan(y)]
+        slope = 0.0
+        if len(points) >= 2:
+            t_mean = sum(t for t, _ in points) / len(points)
+            y_mean = sum(y for _, y in points) / len(points)
+            spread = sum((t - t_mean) ** 2 for t, _ in points)
+            if spread:
+                slope = sum((t - t_mean) * (y - y_mean) for t, y in points) / spread
+        value = max(0, round(count + slope * horizon))
+        level = "High" if value > capacity * 0.9 else "Medium" if value > capacity * 0.7 else "Low"
+        predicted.append(value)
+        risk.append(level)
+        suggestion.append("Open Gate B" if level == "High" else "Monitor")
+    return predicted, risk, suggestion
+
+def forecast_energy_fleet(history, horizon=5, alpha=0.5, beta=0.3):
+    # Holt's linear smoothing for every meter at once.
+    # history: (meters, buckets) average kW per bucket, oldest first, no
+    # gaps. Returns (meters, horizon) projected kW, floored at zero.
+    np = _numpy()
+    if np is None:
+        return [_forecast_energy_row(row, horizon, alpha, beta) for row in history]
+    history = np.asarray(history, dtype=float)
+    level = history[:, 0].copy()
+    trend = np.zeros(len(history)) if history.shape[1] < 2 else history[:, 1] - history[:, 0]
+    for t in range(1, history.shape[1]):
+        previous = level
+        level = alpha * history[:, t] + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous) + (1 - beta) * trend
+    steps = np.arange(1, horizon + 1)
+    return np.clip(level[:, None] + trend[:, None] * steps, 0, None)
+
+def _forecast_energy_row(row, horizon, alpha, beta):
+    # forecast_energy_fleet for one meter, without NumPy
+    level = row[0]
+    trend = row[1] - row[0] if len(row) > 1 else 0.0
+    for value in row[1:]:
+        previous = level
+        level = alpha * value + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous) + (1 - beta) * trend
+    return [max(0.0, level + trend * step) for step in range(1, horizon + 1)]
 
 def analyze_sentiment(feedback_text):
     # Mock sentiment analysis
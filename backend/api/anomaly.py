@@ -0,0 +1,169 @@
+import math
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+
+from .models import CrowdZone, EnergyMeter, SystemLog
+from .signals import notify_change
+
+# A reading that moved a sensor into (anomalous=True) or out of the anomaly state
+Alert = namedtuple('Alert', 'key anomalous value mean std rate score')
+
+
+def zone_status(count, capacity, anomalous=False):
+    # Over 90% full is red whatever the trend; an out-of-band count is yellow
+    if capacity and count / capacity > 0.9:
+        return 'red'
+    return 'yellow' if anomalous else 'green'
+
+
+def meter_status(anomalous):
+    return 'critical' if anomalous else 'optimal'
+
+
+class AnomalyDetector:
+    """
+    Streaming out-of-band detection with constant memory per sensor.
+
+    Each key keeps an exponentially weighted mean and variance of its
+    values and of their rate of change (per second), updated in O(1) as
+    readings arrive; history is never rescanned. A reading more than
+    ``threshold`` standard deviations from the mean, or changing faster
+    than that, flags the key after ``warmup`` readings. The flag clears
+    once values are back within ``clear`` deviations. Deviations feeding
+    the statistics are clipped to the band, so one spike doesn't widen it
+    for long, while a lasting level shift still becomes the new normal.
+    """
+
+    def __init__(self, alpha=None, threshold=None, clear=None, warmup=None, min_std=None):
+        self.alpha = alpha or settings.ANOMALY_ALPHA
+        self.threshold = threshold or settings.ANOMALY_THRESHOLD
+        self.clear = clear or settings.ANOMALY_CLEAR
+        self.warmup = warmup or settings.ANOMALY_WARMUP
+        self.min_std = min_std if min_std is not None else settings.ANOMALY_MIN_STD
+        self.counters = {'readings': 0, 'alerts': 0, 'recoveries': 0}
+        # key -> [readings, mean, variance, last value, last time, rate mean, rate variance, anomalous]
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def _fold(self, mean, var, value, std):
+        # EWMA update with the deviation clipped to the band
+        limit = self.threshold * std
+        diff = max(-limit, min(limit, value - mean))
+        step = self.alpha * diff
+        return mean + step, (1 - self.alpha) * (var + diff * step)
+
+    def update(self, key, timestamp, value):
+        """Fold one reading in; returns an Alert if it changed the key's state."""
+        state = self._state.get(key)
+        if state is None:
+            self._state[key] = [1, value, 0.0, value, timestamp, 0.0, 0.0, False]
+            return None
+        count, mean, var, last, last_time, rate_mean, rate_var, anomalous = state
+        if timestamp <= last_time:
+            return None  # replayed or out-of-order reading
+
+        rate = (value - last) / (timestamp - last_time)
+        std = max(math.sqrt(var), self.min_std)
+        rate_std = max(math.sqrt(rate_var), self.min_std)
+        score = abs(value - mean) / std
+        rate_score = abs(rate - rate_mean) / rate_std if count > 1 else 0.0
+
+        mean_before = mean
+        mean, var = self._fold(mean, var, value, std)
+        if count > 1:
+            rate_mean, rate_var = self._fold(rate_mean, rate_var, rate, rate_std)
+        else:
+            rate_mean = rate
+        count += 1
+
+        alert = None
+        if count > self.warmup:
+            if not anomalous and max(score, rate_score) > self.threshold:
+                anomalous = True
+                alert = Alert(key, True, value, mean_before, std, rate, max(score, rate_score))
+            elif anomalous and score < self.clear and rate_score < self.threshold:
+                anomalous = False
+                alert = Alert(key, False, value, mean_before, std, rate, score)
+        state[:] = [count, mean, var, value, timestamp, rate_mean, rate_var, anomalous]
+        return alert
+
+    def observe(self, readings):
+        """Fold (key, epoch seconds, value) readings in, oldest first; returns the alerts they raised."""
+        alerts = []
+        with self._lock:
+            update = self.update
+            for key, timestamp, value in readings:
+                alert = update(key, timestamp, value)
+                if alert is not None:
+                    alerts.append(alert)
+            self.counters['readings'] += len(readings)
+            for alert in alerts:
+                self.counters['alerts' if alert.anomalous else 'recoveries'] += 1
+        return alerts
+
+    def is_anomalous(self, key):
+        state = self._state.get(key)
+        return state is not None and state[7]
+
+    def stats(self):
+        return {**self.counters, "tracked": len(self._state),
+                "anomalous": sum(1 for state in self._state.values() if state[7])}
+
+
+zone_detector = AnomalyDetector()
+meter_detector = AnomalyDetector()
+
+
+def scan_zones(zones):
+    """
+    Feed zones' new counts (``last_updated``/``current_count``) to the
+    detector and set their status; returns the alerts to log.
+    """
+    alerts = []
+    if settings.ANOMALY_DETECTION:
+        alerts = zone_detector.observe([(z.id, z.last_updated.timestamp(), z.current_count) for z in zones])
+    for zone in zones:
+        zone.status = zone_status(zone.current_count, zone.capacity, zone_detector.is_anomalous(zone.id))
+    return alerts
+
+
+def scan_meters(meters):
+    """Same for meters' ``last_reading_time``/``current_usage_kw``."""
+    alerts = []
+    if settings.ANOMALY_DETECTION:
+        alerts = meter_detector.observe(
+            [(m.id, m.last_reading_time.timestamp(), m.current_usage_kw) for m in meters]
+        )
+        for meter in meters:
+            meter.status = meter_status(meter_detector.is_anomalous(meter.id))
+    return alerts
+
+
+def _message(name, alert, unit):
+    if not alert.anomalous:
+        return f"{name} back to normal at {alert.value:g}{unit}"
+    return (
+        f"{name} out of band at {alert.value:g}{unit}: expected {alert.mean:.1f} ± {alert.std:.1f}, "
+        f"changing {alert.rate:+.1f}{unit}/s"
+    )
+
+
+def log_alerts(zone_alerts=(), meter_alerts=()):
+    """One SystemLog row per alert (WARNING) or recovery (INFO); returns how many were written."""
+    logs = []
+    for model, module, unit, alerts in ((CrowdZone, 'Crowd', '', zone_alerts),
+                                        (EnergyMeter, 'Energy', ' kW', meter_alerts)):
+        if not alerts:
+            continue
+        names = dict(model.objects.filter(id__in=[a.key for a in alerts]).values_list('id', 'name'))
+        logs.extend(
+            SystemLog(module=module, level='WARNING' if alert.anomalous else 'INFO',
+                      message=_message(names.get(alert.key, f"#{alert.key}"), alert, unit))
+            for alert in alerts
+        )
+    if logs:
+        SystemLog.objects.bulk_create(logs)
+        notify_change(SystemLog)
+    return len(logs)
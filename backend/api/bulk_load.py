@@ -0,0 +1,239 @@
+import datetime
+import io
+import json
+import re
+from collections import Counter
+
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from . import counters
+from .signals import TRACKED_MODELS, notify_change
+from .timeseries import ROLLUP_RESOLUTIONS
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_text(value):
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    return str(value).translate(_COPY_ESCAPES)
+
+
+class BulkWriter:
+    """
+    Buffered inserts of value tuples into one model's table, written every
+    ``batch_size`` rows: COPY on PostgreSQL, executemany() elsewhere.
+
+    Rows bypass model save(), so auto_now fields keep the given values and
+    no signals are sent; callers refresh counters and caches afterwards.
+    Use as a context manager to write the last partial batch.
+    """
+
+    def __init__(self, model, fields, batch_size=10000, using=DEFAULT_DB_ALIAS):
+        self.connection = connections[using]
+        self.fields = [model._meta.get_field(name) for name in fields]
+        self.batch_size = batch_size
+        self.written = 0
+        self._rows = []
+
+        quote = self.connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        columns = ', '.join(quote(field.column) for field in self.fields)
+        self.copy = self.connection.vendor == 'postgresql'
+        if self.copy:
+            self.sql = f"COPY {table} ({columns}) FROM STDIN"
+        else:
+            self.sql = f"INSERT INTO {table} ({columns}) VALUES ({', '.join(['%s'] * len(self.fields))})"
+            # Only dates and decimals need the backend's adapters (sqlite stores them as text)
+            self._prepare = [
+                (i, field) for i, field in enumerate(self.fields)
+                if field.get_internal_type() in ('DateTimeField', 'DateField', 'DecimalField')
+            ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+    def add(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def flush(self):
+        rows, self._rows = self._rows, []
+        if not rows:
+            return
+        # One transaction per batch (executemany in autocommit commits every row)
+        with transaction.atomic(using=self.connection.alias), self.connection.cursor() as cursor:
+            if self.copy:
+                data = ''.join('\t'.join(map(_copy_text, row)) + '\n' for row in rows)
+                raw = cursor.cursor
+                if hasattr(raw, 'copy_expert'):  # psycopg2
+                    raw.copy_expert(self.sql, io.StringIO(data))
+                else:  # psycopg 3
+                    with raw.copy(self.sql) as copy:
+                        copy.write(data)
+            else:
+                if self._prepare:
+                    rows = [list(row) for row in rows]
+                    for row in rows:
+                        for i, field in self._prepare:
+                            row[i] = field.get_db_prep_save(row[i], self.connection)
+                cursor.executemany(self.sql, rows)
+        self.written += len(rows)
+
+
+class RollupAccumulator:
+    """
+    Folds time-ordered (key, epoch seconds, value) readings into rollup
+    rows for every resolution, handing each bucket to ``writer`` once a
+    later reading closes it. Holds one open bucket per key and resolution.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self._open = {}
+
+    def add(self, key, epoch, value):
+        for resolution in ROLLUP_RESOLUTIONS:
+            start = epoch - epoch % resolution
+            bucket = self._open.get((key, resolution))
+            if bucket is not None and bucket[0] != start:
+                self._emit(key, resolution, bucket)
+                bucket = None
+            if bucket is None:
+                self._open[(key, resolution)] = [start, 1, value, value, value, value]
+            else:
+                bucket[1] += 1
+                bucket[2] += value
+                bucket[3] = min(bucket[3], value)
+                bucket[4] = max(bucket[4], value)
+                bucket[5] = value
+
+    def _emit(self, key, resolution, bucket):
+        start, samples, total, low, high, last = bucket
+        start = datetime.datetime.fromtimestamp(start, tz=datetime.timezone.utc)
+        self.writer.add((key, resolution, start, samples, total, low, high, last))
+
+    def finish(self):
+        for (key, resolution), bucket in self._open.items():
+            self._emit(key, resolution, bucket)
+        self._open = {}
+
+
+_SPACE = re.compile(r'[ \t\r\n]*')
+
+
+def iter_json_array(stream, chunk_size=1 << 16):
+    """Yield the items of a top-level JSON array, reading ``stream`` in chunks."""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+    state = 'start'
+    while True:
+        pos = _SPACE.match(buffer, pos).end()
+        if pos == len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            chunk = stream.read(chunk_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+
+        char = buffer[pos]
+        if state == 'start':
+            if char != '[':
+                raise ValueError("Expected a JSON array")
+            pos, state = pos + 1, 'first'
+        elif char == ']' and state in ('first', 'sep'):
+            return
+        elif state == 'sep':
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' at offset {pos}")
+            pos, state = pos + 1, 'item'
+        else:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = None
+            if end is not None and not eof:
+                after = _SPACE.match(buffer, end).end()
+                if after == len(buffer) or buffer[after] not in ',]':
+                    end = None  # a number can decode early ("-0." of "-0.25")
+            if end is None:
+                # Item cut off by the chunk boundary: read more and retry
+                chunk = stream.read(chunk_size)
+                buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+                continue
+            yield item
+            pos, state = end, 'sep'
+
+
+def load_fixture(stream, batch_size=1000, using=DEFAULT_DB_ALIAS):
+    """
+    Load a dumpdata-format JSON fixture without holding it in memory.
+
+    Consecutive objects of the same model are deserialized and inserted
+    in batches, with their primary keys, in one transaction (as loaddata
+    does, so forward references are fine). Objects whose primary key
+    already exists, or that carry many-to-many data, go through the same
+    per-object save as loaddata. Returns rows loaded per model label.
+    """
+    loaded = Counter()
+    models = set()
+    batch = []
+
+    def flush():
+        objects = list(serializers.deserialize('python', batch, using=using, ignorenonexistent=True))
+        batch.clear()
+        model = type(objects[0].object)
+        models.add(model)
+        pks = [obj.object.pk for obj in objects if obj.object.pk is not None]
+        existing = set(model._base_manager.using(using).filter(pk__in=pks).values_list('pk', flat=True))
+
+        fields = model._meta.concrete_fields
+        with BulkWriter(model, [f.name for f in fields], batch_size=len(objects) or 1, using=using) as writer:
+            for obj in objects:
+                if obj.object.pk is None or obj.object.pk in existing or obj.m2m_data or obj.deferred_fields:
+                    obj.save(using=using)
+                else:
+                    writer.add(tuple(getattr(obj.object, f.attname) for f in fields))
+        loaded[model._meta.label] += len(objects)
+
+    with transaction.atomic(using=using):
+        for item in iter_json_array(stream):
+            if batch and (item.get('model') != batch[0].get('model') or len(batch) >= batch_size):
+                flush()
+            batch.append(item)
+        if batch:
+            flush()
+
+        # Explicit primary keys don't advance PostgreSQL sequences
+        connection = connections[using]
+        statements = connection.ops.sequence_reset_sql(no_style(), list(models))
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+    return dict(loaded)
+
+
+def refresh_after_load():
+    """Rows written without save() sent no signals: recount the KPIs and bump every version."""
+    counters.reconcile(fix=True)
+    with transaction.atomic():
+        for model in TRACKED_MODELS:
+            notify_change(model)
@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, connection, connections
+
+from . import metrics
+
+# Independent read queries of one request run on these threads, each on
+# its own database connection (kept for CONN_MAX_AGE like any other)
+_executor = ThreadPoolExecutor(max_workers=settings.QUERY_POOL_SIZE, thread_name_prefix='query')
+_worker = threading.local()
+
+
+def _timed(func):
+    # This thread's queries count toward the request that submitted them
+    timer = metrics.request_timer.get()
+    if timer is None:
+        return func()
+    with metrics.time_queries(timer):
+        return func()
+
+
+def _call(context, func):
+    _worker.active = True
+    close_old_connections()
+    try:
+        # The caller's context carries the request's replica routing,
+        # timezone and query timer
+        return context.run(_timed, func)
+    finally:
+        close_old_connections()
+        _worker.active = False
+
+
+def run_concurrently(*funcs):
+    """
+    Call ``funcs`` on the query pool and return their results in order.
+
+    Falls back to calling them one after another inside a transaction
+    (other connections wouldn't see its writes) or on a pool thread.
+    """
+    if len(funcs) < 2 or connection.in_atomic_block or getattr(_worker, 'active', False):
+        return [func() for func in funcs]
+    futures = [_executor.submit(_call, contextvars.copy_context(), func) for func in funcs]
+    return [future.result() for future in futures]
+
+
+async def gather(*funcs):
+    """Async counterpart of run_concurrently() for async views."""
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(
+        loop.run_in_executor(_executor, _call, contextvars.copy_context(), func) for func in funcs
+    ))
+
+
+async def iterate_in_thread(iterator):
+    """
+    Async iterator over a blocking ``iterator`` (e.g. one reading a
+    server-side cursor), advanced on a dedicated thread so its database
+    connection stays the same from the first chunk to the last.
+
+    Under ASGI, Django buffers a synchronous StreamingHttpResponse body
+    in full before sending it; handing it this instead keeps memory flat.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stream')
+    context = contextvars.copy_context()
+    done = object()
+    try:
+        while True:
+            chunk = await loop.run_in_executor(executor, context.run, next, iterator, done)
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        def close():
+            getattr(iterator, 'close', lambda: None)()
+            connections.close_all()  # this thread's connections only
+        await loop.run_in_executor(executor, close)
+        executor.shutdown(wait=False)
+
+
+def streaming_body(iterator, request):
+    """``iterator`` as a StreamingHttpResponse body suited to the server the request came through."""
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return iterate_in_thread(iterator)
+    return iterator
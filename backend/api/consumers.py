@@ -0,0 +1,67 @@
+import json
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .live import TOPICS, group_name, live_publisher
+
+
+class LiveConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws/live/?topics=dashboard,crowd
+
+    Clients can also send {"action": "subscribe" | "unsubscribe", "topics": [...]}.
+    Every new subscription receives a full "snapshot" message, followed by
+    "delta" messages carrying only the keys that changed.
+    """
+
+    @classmethod
+    async def encode_json(cls, content):
+        # Same encoder as the REST API, so payloads match dashboard-data
+        return json.dumps(content, cls=JSONEncoder)
+
+    async def connect(self):
+        self.topics = set()
+        await self.accept()
+        query = dict(
+            part.split('=', 1) for part in self.scope.get('query_string', b'').decode().split('&') if '=' in part
+        )
+        if query.get('topics'):
+            await self.subscribe(query['topics'].split(','))
+
+    async def disconnect(self, code):
+        await self.unsubscribe(list(self.topics))
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get('action')
+        topics = content.get('topics') or []
+        if action == 'subscribe':
+            await self.subscribe(topics)
+        elif action == 'unsubscribe':
+            await self.unsubscribe(topics)
+        else:
+            await self.send_json({"type": "error", "error": f"Unknown action: {action}"})
+
+    async def subscribe(self, topics):
+        for topic in topics:
+            if topic not in TOPICS:
+                await self.send_json({"type": "error", "error": f"Unknown topic: {topic}"})
+                continue
+            if topic in self.topics:
+                continue
+            self.topics.add(topic)
+            await self.channel_layer.group_add(group_name(topic), self.channel_name)
+            live_publisher.subscribe(topic)
+            data = await database_sync_to_async(live_publisher.current)(topic)
+            await self.send_json({"type": "snapshot", "topic": topic, "data": data})
+
+    async def unsubscribe(self, topics):
+        for topic in topics:
+            if topic in self.topics:
+                self.topics.discard(topic)
+                await self.channel_layer.group_discard(group_name(topic), self.channel_name)
+                live_publisher.unsubscribe(topic)
+
+    async def live_message(self, event):
+        await self.send_json(event['payload'])
@@ -0,0 +1,169 @@
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, Count, F, Q, Sum, Value, When
+
+from .models import CrowdZone, KpiCounter, Ticket
+
+FRAUD_THRESHOLD = 0.8
+
+TICKETS_SOLD = 'tickets_sold'
+FRAUD_ALERTS = 'fraud_alerts'
+TICKETS_VALIDATED = 'tickets_validated'
+ZONES = 'crowd_zones'
+CRITICAL_ZONES = 'critical_zones'
+OCCUPANCY = 'crowd_occupancy'
+CAPACITY = 'crowd_capacity'
+
+TICKET_COUNTERS = (TICKETS_SOLD, FRAUD_ALERTS, TICKETS_VALIDATED)
+ZONE_COUNTERS = (ZONES, CRITICAL_ZONES, OCCUPANCY, CAPACITY)
+NAMES = TICKET_COUNTERS + ZONE_COUNTERS
+
+# Fields the counters are derived from, in the order the *_totals helpers take them
+TICKET_FIELDS = ('fraud_score', 'is_validated')
+ZONE_FIELDS = ('capacity', 'current_count', 'status')
+
+
+def ticket_totals(rows):
+    """Counter contributions of (fraud_score, is_validated) rows."""
+    totals = Counter()
+    for fraud_score, is_validated in rows:
+        totals[TICKETS_SOLD] += 1
+        totals[FRAUD_ALERTS] += fraud_score > FRAUD_THRESHOLD
+        totals[TICKETS_VALIDATED] += bool(is_validated)
+    return totals
+
+
+def zone_totals(rows):
+    """Counter contributions of (capacity, current_count, status) rows."""
+    totals = Counter()
+    for capacity, current_count, status in rows:
+        totals[ZONES] += 1
+        totals[CRITICAL_ZONES] += status == 'red'
+        totals[OCCUPANCY] += current_count
+        totals[CAPACITY] += capacity
+    return totals
+
+
+def difference(after, before):
+    return {name: after.get(name, 0) - before.get(name, 0) for name in set(after) | set(before)}
+
+
+def _shard():
+    # Random per outermost transaction: writers spread over the shard rows,
+    # and a transaction only ever locks one row per counter (two rows of
+    # one counter taken in opposite orders could deadlock)
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return random.randrange(settings.KPI_COUNTER_SHARDS)
+    outermost = connection.atomic_blocks[0]
+    cached = getattr(connection, '_kpi_counter_shard', None)
+    if cached is None or cached[0] is not outermost:
+        cached = connection._kpi_counter_shard = (outermost, random.randrange(settings.KPI_COUNTER_SHARDS))
+    return cached[1]
+
+
+def add(deltas):
+    """
+    Move counters by ``deltas`` ({name: change}) with one UPDATE. Call it
+    inside the transaction that makes the change it accounts for.
+    """
+    deltas = {name: int(change) for name, change in deltas.items() if change}
+    if not deltas:
+        return
+    shard = _shard()
+    rows = KpiCounter.objects.filter(shard=shard)
+    increment = Case(*[When(name=name, then=Value(change)) for name, change in deltas.items()],
+                     default=Value(0), output_field=BigIntegerField())
+    if rows.filter(name__in=deltas).update(value=F('value') + increment) == len(deltas):
+        return
+    # First write to this shard: create the missing rows and apply their share
+    with transaction.atomic():
+        missing = set(deltas) - set(rows.filter(name__in=deltas).values_list('name', flat=True))
+        KpiCounter.objects.bulk_create([KpiCounter(name=name, shard=shard) for name in missing],
+                                       ignore_conflicts=True)
+        rows.filter(name__in=missing).update(value=F('value') + increment)
+
+
+def bulk_update_zones(zones, fields, batch_size=500):
+    """
+    bulk_update ``zones`` (loaded with at least ``capacity``) and move the
+    crowd counters by the difference. Call it inside a transaction: the
+    rows are locked first so concurrent writers can't count twice.
+    """
+    stored = {
+        row[0]: row[1:] for row in
+        CrowdZone.objects.select_for_update().filter(id__in=[z.id for z in zones]).order_by('id')
+        .values_list('id', *ZONE_FIELDS)
+    }
+    CrowdZone.objects.bulk_update(zones, fields, batch_size=batch_size)
+    after = zone_totals((z.capacity, z.current_count, z.status) for z in zones if z.id in stored)
+    add(difference(after, zone_totals(stored.values())))
+
+
+def read(names=NAMES):
+    """Current values of ``names``: a sum over at most KPI_COUNTER_SHARDS rows each."""
+    values = dict.fromkeys(names, 0)
+    values.update(
+        KpiCounter.objects.filter(name__in=names).values('name').annotate(total=Sum('value')).values_list('name', 'total')
+    )
+    return values
+
+
+def count_tickets(queryset):
+    """Ticket counter values for ``queryset``, aggregated in the database."""
+    stats = queryset.aggregate(
+        sold=Count('id'),
+        fraud=Count('id', filter=Q(fraud_score__gt=FRAUD_THRESHOLD)),
+        validated=Count('id', filter=Q(is_validated=True)),
+    )
+    return {TICKETS_SOLD: stats['sold'], FRAUD_ALERTS: stats['fraud'], TICKETS_VALIDATED: stats['validated']}
+
+
+def count_zones(queryset):
+    """Crowd counter values for ``queryset``, aggregated in the database."""
+    stats = queryset.aggregate(
+        zones=Count('id'),
+        critical=Count('id', filter=Q(status='red')),
+        occupancy=Sum('current_count'),
+        capacity=Sum('capacity'),
+    )
+    return {
+        ZONES: stats['zones'],
+        CRITICAL_ZONES: stats['critical'],
+        OCCUPANCY: stats['occupancy'] or 0,
+        CAPACITY: stats['capacity'] or 0,
+    }
+
+
+def recompute():
+    """Counter values computed from scratch with full scans (reconcile_counters)."""
+    return {**count_tickets(Ticket.objects.all()), **count_zones(CrowdZone.objects.all())}
+
+
+def reconcile(fix=False):
+    """
+    Compare every counter with a full recount; returns {name: (counter,
+    actual)}. With ``fix``, drifted counters are reset to the recount.
+
+    The counter rows stay locked while recounting, so writers that haven't
+    adjusted them yet wait and apply their change on top of the result.
+    """
+    with transaction.atomic():
+        locked = list(KpiCounter.objects.select_for_update().filter(name__in=NAMES).order_by('name', 'shard'))
+        current = Counter()
+        for row in locked:
+            current[row.name] += row.value
+        actual = recompute()
+        report = {name: (current[name], actual[name]) for name in NAMES}
+
+        if fix:
+            drifted = [name for name, (value, expected) in report.items() if value != expected]
+            for name in drifted:
+                # Collapse the shards into shard 0
+                KpiCounter.objects.filter(name=name).exclude(shard=0).update(value=0)
+                if not KpiCounter.objects.filter(name=name, shard=0).update(value=actual[name]):
+                    KpiCounter.objects.create(name=name, shard=0, value=actual[name])
+    return report
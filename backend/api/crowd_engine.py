@@ -0,0 +1,90 @@
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+from . import ai_services
+
+
+class CrowdPredictionEngine:
+    """
+    Predicts every zone in one NumPy pass from recent per-zone history.
+
+    Counts are recorded as they are written (tick engine, saves) into a
+    fixed-length ring buffer per zone. The zone listing with predictions
+    is cached per CrowdZone table version, so a write made by any process
+    replaces it; local changes also invalidate it straight away.
+    """
+
+    def __init__(self, window=None, horizon=None):
+        self.window = window or settings.CROWD_PREDICTION_WINDOW
+        self.horizon = horizon or settings.CROWD_PREDICTION_HORIZON
+        self._history = {}
+        self._cache = None  # (table version, rows)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def record(self, zone_ids, counts, timestamp=None):
+        timestamp = timestamp or time.time()
+        with self._lock:
+            for zone_id, count in zip(zone_ids, counts):
+                samples = self._history.get(zone_id)
+                if samples is None:
+                    samples = self._history[zone_id] = deque(maxlen=self.window)
+                samples.append((timestamp, count))
+        self.invalidate()
+
+    def invalidate(self):
+        self._generation += 1
+        self._cache = None
+
+    def _compute(self, zone_ids, capacities, counts):
+        if not zone_ids:
+            return {}
+        # NaN-padded (zones, window) rows; ai_services turns them into arrays
+        padding = [math.nan] * self.window
+        history, timestamps = [], []
+        now = time.time()
+        with self._lock:
+            for zone_id in zone_ids:
+                samples = self._history.get(zone_id, ())
+                history.append([count for _, count in samples] + padding[len(samples):])
+                timestamps.append([ts - now for ts, _ in samples] + padding[len(samples):])
+
+        predicted, risk, suggestion = ai_services.predict_crowd_levels_batch(
+            capacities, counts, history, timestamps, self.horizon
+        )
+        return {
+            zone_id: {"predicted_count": int(p), "risk_level": str(r), "suggestion": str(s)}
+            for zone_id, p, r, s in zip(zone_ids, predicted, risk, suggestion)
+        }
+
+    def listing(self, build_rows, version):
+        """
+        Zone rows from ``build_rows()`` (dicts with id, capacity and
+        current_count) with an 'ai_prediction' attached to each. The whole
+        listing is cached for CrowdZone's table ``version``, read before
+        calling, until the next local change.
+        """
+        cached = self._cache
+        if cached is not None and cached[0] >= version:
+            return cached[1]
+
+        generation = self._generation
+        rows = build_rows()
+        predictions = self._compute(
+            [row['id'] for row in rows],
+            [row['capacity'] for row in rows],
+            [row['current_count'] for row in rows],
+        )
+        for row in rows:
+            row['ai_prediction'] = predictions[row['id']]
+        if generation == self._generation:
+            # Don't cache rows that a concurrent write already made stale
+            self._cache = (version, rows)
+        return rows
+
+
+crowd_engine = CrowdPredictionEngine()
@@ -0,0 +1,79 @@
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DB_ALIAS = 'replica'
+STICKY_COOKIE = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+class _Routing:
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+# Set per request by ReplicaRoutingMiddleware; code outside a request
+# (tick engine, ingestion flush, management commands) reads the primary.
+# Mutated in place, so a write seen on a thread running a copy of the
+# request's context (query pool) still pins the request.
+_routing = ContextVar('db_routing', default=None)
+
+
+class PrimaryReplicaRouter:
+    """
+    Reads go to the replica only inside safe-method requests from clients
+    that haven't written recently; all writes go to the primary, and the
+    first write in a request pins the rest of it to the primary too.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None and routing.replica and REPLICA_DB_ALIAS in settings.DATABASES:
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.replica = False
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica follows the primary through replication
+        return db != REPLICA_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Routes safe-method requests to the replica and gives clients
+    read-your-writes: a request that wrote sets a short-lived cookie that
+    keeps that client's reads on the primary for DB_REPLICA_STICKY_SECONDS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sticky = request.COOKIES.get(STICKY_COOKIE, '')
+        pinned = sticky.isdigit() and int(sticky) > time.time()
+        routing = _Routing(replica=request.method in SAFE_METHODS and not pinned)
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if routing.wrote and settings.DB_REPLICA_STICKY_SECONDS:
+            until = int(time.time()) + settings.DB_REPLICA_STICKY_SECONDS
+            response.set_cookie(STICKY_COOKIE, str(until), max_age=settings.DB_REPLICA_STICKY_SECONDS,
+                                httponly=True, samesite=settings.SESSION_COOKIE_SAMESITE,
+                                secure=settings.SESSION_COOKIE_SECURE)
+        return response
@@ -0,0 +1,69 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import ai_services
+from .models import EnergyMeter, EnergyRollup
+
+CACHE_PREFIX = 'energy-forecast:'
+
+
+def cache_key(version):
+    # Every reading bumps EnergyMeter's table version (api/versions.py), in
+    # whichever process it lands, so a new version means new forecasts
+    return f"{CACHE_PREFIX}{version}"
+
+
+def _history_matrix(meters, resolution, window):
+    """(meters, window) average kW per bucket; gaps carry the last known value."""
+    now = int(timezone.now().timestamp())
+    first = now - now % resolution - (window - 1) * resolution
+    since = datetime.datetime.fromtimestamp(first, tz=datetime.timezone.utc)
+
+    row_of = {meter_id: row for row, (meter_id, _) in enumerate(meters)}
+    matrix = [[None] * window for _ in meters]
+    buckets = EnergyRollup.objects.filter(
+        resolution=resolution, bucket_start__gte=since, meter_id__in=row_of
+    ).values_list('meter_id', 'bucket_start', 'total', 'samples')
+    for meter_id, start, total, samples in buckets:
+        col = (int(start.timestamp()) - first) // resolution
+        if 0 <= col < window and samples:
+            matrix[row_of[meter_id]][col] = total / samples
+
+    # Leading gaps take the first known bucket (the current reading for
+    # meters without history); later gaps carry the last value forward
+    for row, (_, usage) in zip(matrix, meters):
+        previous = next((value for value in row if value is not None), usage)
+        for col, value in enumerate(row):
+            if value is None:
+                row[col] = previous
+            else:
+                previous = value
+    return matrix
+
+
+def compute_all():
+    """Forecast every meter in one vectorized pass."""
+    meters = list(EnergyMeter.objects.order_by('id').values_list('id', 'current_usage_kw'))
+    if not meters:
+        return {}
+    history = _history_matrix(meters, settings.ENERGY_FORECAST_RESOLUTION, settings.ENERGY_FORECAST_WINDOW)
+    projected = ai_services.forecast_energy_fleet(history, settings.ENERGY_FORECAST_HORIZON)
+    return {
+        meter_id: [round(float(v), 1) for v in row]
+        for (meter_id, _), row in zip(meters, projected)
+    }
+
+
+def forecasts_for(meter_ids, version):
+    """
+    Forecasts for ``meter_ids``, cached per EnergyMeter table ``version``
+    (read before calling); a miss triggers one fleet-wide pass.
+    """
+    forecasts = cache.get(cache_key(version))
+    if forecasts is None or any(meter_id not in forecasts for meter_id in meter_ids):
+        forecasts = compute_all()
+        cache.set(cache_key(version), forecasts, settings.ENERGY_FORECAST_TTL)
+    return {meter_id: forecasts.get(meter_id) for meter_id in meter_ids}
@@ -0,0 +1,136 @@
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncMinute
+from django.utils import timezone
+
+from .models import GateEntryBucket, Ticket
+from .timeseries import bucket_start
+
+MINUTE = 60
+
+
+def record(entries, gate='', when=None):
+    """
+    Add ``entries`` ({event_id: scans}, negative to take back) to the
+    minute of ``when`` at ``gate``: one UPDATE once the minute's bucket
+    exists. Call it inside the transaction that writes the entry times it
+    accounts for.
+    """
+    entries = {event: int(count) for event, count in entries.items() if count}
+    if not entries:
+        return
+    minute = bucket_start(when or timezone.now(), MINUTE)
+    rows = GateEntryBucket.objects.filter(gate=gate, minute=minute, event_id__in=entries)
+    increment = Case(*[When(event_id=event, then=Value(count)) for event, count in entries.items()],
+                     default=Value(0), output_field=IntegerField())
+    # An UPDATE that matches some of several buckets can't say which; only
+    # a single event's can take the fast path
+    if len(entries) == 1 and rows.update(entries=F('entries') + increment):
+        return
+    # First scan of the minute at this gate. Create the buckets, skipping
+    # ones a concurrent scan has created meanwhile, then add to all of them
+    with transaction.atomic():
+        GateEntryBucket.objects.bulk_create(
+            [GateEntryBucket(event_id=event, gate=gate, minute=minute) for event in entries], ignore_conflicts=True
+        )
+        rows.update(entries=F('entries') + increment)
+
+
+def rebuild(event_ids=None):
+    """
+    Recount the buckets of ``event_ids`` (default: all events) from the
+    tickets' entry times and gates, with one GROUP BY. For data written
+    without validation (bulk loads).
+    """
+    with transaction.atomic():
+        buckets = GateEntryBucket.objects.all()
+        tickets = Ticket.objects.filter(entry_time__isnull=False)
+        if event_ids is not None:
+            buckets = buckets.filter(event_id__in=event_ids)
+            tickets = tickets.filter(event_id__in=event_ids)
+        buckets.delete()
+        rows = (
+            tickets.values_list('event_id', 'entry_gate', TruncMinute('entry_time', tzinfo=datetime.timezone.utc))
+            .annotate(entries=Count('id')).order_by()
+        )
+        created = GateEntryBucket.objects.bulk_create(
+            [GateEntryBucket(event_id=event, gate=gate, minute=minute, entries=entries)
+             for event, gate, minute, entries in rows],
+            batch_size=1000,
+        )
+    return len(created)
+
+
+def summary(event, now=None):
+    """
+    Live ingress figures for ``event``: arrivals so far, current
+    throughput (scans per minute over the last ENTRY_FLOW_WINDOW seconds)
+    overall and per gate, and when the expected attendance will be
+    reached at that rate.
+    """
+    now = now or timezone.now()
+    window = max(settings.ENTRY_FLOW_WINDOW // MINUTE, 1)
+    since = bucket_start(now, MINUTE) - datetime.timedelta(minutes=window - 1)
+    # The window ends now, part way through its last minute
+    elapsed = (now - since).total_seconds() / MINUTE
+
+    gates = list(
+        GateEntryBucket.objects.filter(event=event, minute__lte=now).values('gate').order_by('gate')
+        .annotate(arrivals=Sum('entries'), recent=Sum('entries', filter=Q(minute__gte=since)))
+    )
+    arrivals = sum(row['arrivals'] for row in gates)
+    rate = sum(row['recent'] or 0 for row in gates) / elapsed
+
+    expected = event.expected_attendance
+    remaining = max(expected - arrivals, 0)
+    minutes_to_full = full_at = None
+    if expected and not remaining:
+        minutes_to_full, full_at = 0.0, now
+    elif expected and rate > 0:
+        minutes_to_full = round(remaining / rate, 1)
+        full_at = now + datetime.timedelta(minutes=remaining / rate)
+    return {
+        "event": event.id,
+        "as_of": now,
+        "arrivals": arrivals,
+        "expected_attendance": expected,
+        "occupancy": round(arrivals / expected, 4) if expected else None,
+        "throughput_per_minute": round(rate, 2),
+        "window_seconds": window * MINUTE,
+        "minutes_to_full": minutes_to_full,
+        "projected_full_at": full_at,
+        "gates": [{
+            "gate": row['gate'],
+            "arrivals": row['arrivals'],
+            "throughput_per_minute": round((row['recent'] or 0) / elapsed, 2),
+        } for row in gates],
+    }
+
+
+def histogram(event, start, end, resolution=MINUTE, gate=None):
+    """
+    Entries per ``resolution`` seconds (a multiple of a minute) between
+    ``start`` and ``end``, split by gate, with cumulative arrivals.
+    """
+    buckets = GateEntryBucket.objects.filter(event=event)
+    if gate is not None:
+        buckets = buckets.filter(gate=gate)
+    before = buckets.filter(minute__lt=start).aggregate(total=Sum('entries'))['total'] or 0
+
+    points = defaultdict(lambda: defaultdict(int))
+    for minute, bucket_gate, entries in (
+        buckets.filter(minute__gte=start, minute__lt=end).order_by('minute').values_list('minute', 'gate', 'entries')
+    ):
+        points[bucket_start(minute, resolution)][bucket_gate] += entries
+
+    series, cumulative = [], before
+    for time in sorted(points):
+        gates = points[time]
+        entries = sum(gates.values())
+        cumulative += entries
+        series.append({"time": time, "entries": entries, "cumulative": cumulative, "gates": dict(gates)})
+    return {"event": event.id, "resolution": resolution, "arrivals_before": before, "points": series}
@@ -0,0 +1,260 @@
+import csv
+import datetime
+import io
+
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Event, MerchandiseItem, Ticket, ZoneOccupancyReading
+
+# Output formats: content type and file extension
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+class Dataset:
+    """
+    One exportable table: ``columns`` are (header, values_list path, kind)
+    triples, ``event_field`` and ``time_field`` the lookups the event and
+    time range filters apply to (None when the data has no such link).
+    """
+
+    def __init__(self, queryset, columns, ordering, event_field=None, time_field=None):
+        self.queryset = queryset
+        self.columns = columns
+        self.ordering = ordering
+        self.event_field = event_field
+        self.time_field = time_field
+
+    @property
+    def names(self):
+        return [name for name, _, _ in self.columns]
+
+
+DATASETS = {
+    'tickets': Dataset(
+        lambda: Ticket.objects.all(),
+        (('id', 'id', 'int'), ('event_id', 'event_id', 'int'), ('ticket_code', 'ticket_code', 'str'),
+         ('customer_name', 'customer_name', 'str'), ('seat_number', 'seat_number', 'str'),
+         ('price', 'price', 'decimal'), ('fraud_score', 'fraud_score', 'float'),
+         ('is_validated', 'is_validated', 'bool'), ('entry_time', 'entry_time', 'datetime')),
+        ('id',), event_field='event_id', time_field='event__start_time',
+    ),
+    # Gate entries: scanned tickets in scan order
+    'entries': Dataset(
+        lambda: Ticket.objects.filter(entry_time__isnull=False),
+        (('entry_time', 'entry_time', 'datetime'), ('event_id', 'event_id', 'int'),
+         ('ticket_id', 'id', 'int'), ('ticket_code', 'ticket_code', 'str'), ('seat_number', 'seat_number', 'str')),
+        ('entry_time', 'id'), event_field='event_id', time_field='entry_time',
+    ),
+    # Readings aren't linked to events: an event filter selects its start..end window
+    'zone-readings': Dataset(
+        lambda: ZoneOccupancyReading.objects.all(),
+        (('zone_id', 'zone_id', 'int'), ('zone', 'zone__name', 'str'),
+         ('timestamp', 'timestamp', 'datetime'), ('count', 'count', 'int')),
+        ('zone_id', 'timestamp'), time_field='timestamp',
+    ),
+    # Sales are only kept as running totals per item
+    'merchandise': Dataset(
+        lambda: MerchandiseItem.objects.annotate(revenue=ExpressionWrapper(
+            F('price') * F('sold_count'), output_field=DecimalField(max_digits=14, decimal_places=2),
+        )),
+        (('id', 'id', 'int'), ('name', 'name', 'str'), ('category', 'category', 'str'),
+         ('price', 'price', 'decimal'), ('sold_count', 'sold_count', 'int'),
+         ('stock_quantity', 'stock_quantity', 'int'), ('revenue', 'revenue', 'decimal')),
+        ('id',),
+    ),
+}
+
+
+def parse_time(value, name):
+    """An ISO datetime, or a date (its midnight), in the current timezone."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"'{name}' must be an ISO date or datetime")
+        parsed = datetime.datetime.combine(day, datetime.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_id(value, name):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be an id")
+
+
+def queryset(dataset, event=None, start=None, end=None, zone=None):
+    """
+    Rows of ``dataset`` as a values_list() queryset, in a stable order.
+    ``start`` is inclusive, ``end`` exclusive. Raises ValueError for
+    filters the dataset doesn't support.
+    """
+    try:
+        spec = DATASETS[dataset]
+    except KeyError:
+        raise ValueError(f"Unknown dataset '{dataset}' (choose from {', '.join(DATASETS)})")
+    qs = spec.queryset()
+
+    if event is not None:
+        if dataset == 'zone-readings':
+            window = Event.objects.filter(pk=event).values_list('start_time', 'end_time').first()
+            if window is None:
+                raise ValueError(f"No event {event}")
+            start, end = max(filter(None, (start, window[0]))), min(filter(None, (end, window[1])))
+        elif spec.event_field:
+            qs = qs.filter(**{spec.event_field: event})
+        else:
+            raise ValueError(f"'{dataset}' can't be filtered by event")
+    if start is not None or end is not None:
+        if not spec.time_field:
+            raise ValueError(f"'{dataset}' can't be filtered by time")
+        if start is not None:
+            qs = qs.filter(**{f'{spec.time_field}__gte': start})
+        if end is not None:
+            qs = qs.filter(**{f'{spec.time_field}__lt': end})
+    if zone is not None:
+        if dataset != 'zone-readings':
+            raise ValueError(f"'{dataset}' can't be filtered by zone")
+        qs = qs.filter(zone_id=zone)
+
+    qs = qs.order_by(*spec.ordering).values_list(*[path for _, path, _ in spec.columns])
+    # The rows are read after the view returns: pin the database the router picks now
+    return qs.using(qs.db)
+
+
+def _chunks(rows, size):
+    while True:
+        chunk = [row for _, row in zip(range(size), rows)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def _csv(spec, rows, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(spec.names)
+    dates = [i for i, (_, _, kind) in enumerate(spec.columns) if kind == 'datetime']
+    for chunk in _chunks(rows, chunk_size):
+        if dates:
+            chunk = [list(row) for row in chunk]
+            for row in chunk:
+                for i in dates:
+                    if row[i] is not None:
+                        row[i] = row[i].isoformat()
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # header of an empty export
+        yield buffer.getvalue().encode()
+
+
+class _Sink:
+    """Write-only file for ParquetWriter whose bytes are taken as they come."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._size = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self._parts = b''.join(self._parts), []
+        return data
+
+
+def _arrow_type(pa, kind, field):
+    if kind == 'decimal':
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    return {
+        'int': pa.int64(), 'str': pa.string(), 'float': pa.float64(), 'bool': pa.bool_(),
+        'datetime': pa.timestamp('us', tz='UTC'),
+    }[kind]
+
+
+def _parquet(spec, rows, chunk_size, fields):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, _arrow_type(pa, kind, field))
+                        for (name, _, kind), field in zip(spec.columns, fields)])
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        # One row group per chunk, sent as soon as it is written
+        for chunk in _chunks(rows, chunk_size):
+            columns = zip(*chunk)
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=column.type) for values, column in zip(columns, schema)], schema=schema,
+            ))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _output_fields(qs, spec):
+    # Model/annotation fields behind decimal columns, for their precision
+    fields = []
+    for _, path, kind in spec.columns:
+        if kind != 'decimal':
+            fields.append(None)
+        elif path in qs.query.annotations:
+            fields.append(qs.query.annotations[path].output_field)
+        else:
+            fields.append(qs.model._meta.get_field(path))
+    return fields
+
+
+def export(dataset, format='csv', chunk_size=10000, **filters):
+    """
+    (content type, file name, body) for ``dataset`` as ``format``: the body
+    yields bytes a chunk of ``chunk_size`` rows at a time, read from the
+    database with a chunked iterator, so memory stays flat however many
+    rows there are. Raises ValueError for bad parameters before any row
+    is read.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format '{format}' (choose from {', '.join(FORMATS)})")
+    if format == 'parquet':
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+    qs = queryset(dataset, **filters)
+    spec = DATASETS[dataset]
+    rows = qs.iterator(chunk_size=chunk_size)
+    content_type, extension = FORMATS[format]
+    if format == 'csv':
+        body = _csv(spec, rows, chunk_size)
+    else:
+        body = _parquet(spec, rows, chunk_size, _output_fields(qs, spec))
+    return content_type, f"{dataset}.{extension}", body
@@ -0,0 +1,172 @@
+import decimal
+import json
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .concurrency import streaming_body
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Same options JSONRenderer passes to json.dumps, so output is byte-identical
+_encoder = json.JSONEncoder(
+    ensure_ascii=not api_settings.UNICODE_JSON,
+    allow_nan=not api_settings.STRICT_JSON,
+    separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '),
+)
+
+
+def encode(rows):
+    """JSON for a list of primitive rows, as JSONRenderer would render it."""
+    if orjson is not None and settings.FAST_JSON_ENCODER == 'orjson':
+        # Faster, but spells some floats differently (1e-05 -> 0.00001)
+        return orjson.dumps(rows)
+    text = _encoder.encode(rows)
+    return text.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+
+
+def _datetime():
+    tz = timezone.get_current_timezone()
+
+    def convert(value):
+        value = value.astimezone(tz) if value.tzinfo is not None else timezone.make_aware(value, tz)
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _decimal(field):
+    # Same quantize DecimalField.to_representation applies
+    step = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        return f'{value.quantize(step, rounding=rounding, context=context):f}'
+    return convert
+
+
+def plan(serializer):
+    """
+    (names, columns, converters) reproducing ``serializer``'s output from
+    values_list() tuples, or None if it uses a field this path can't copy.
+    """
+    names, columns, converters = [], [], []
+    for name, field in serializer.fields.items():
+        kind = type(field)
+        if field.write_only:
+            continue
+        if kind in (serializers.IntegerField, serializers.CharField, serializers.BooleanField,
+                    serializers.FloatField, serializers.PrimaryKeyRelatedField):
+            convert = None
+        elif kind is serializers.BigIntegerField:
+            if getattr(field, 'coerce_to_string', getattr(api_settings, 'COERCE_BIGINT_TO_STRING', False)):
+                return None
+            convert = None
+        elif kind is serializers.DateTimeField and getattr(field, 'format', api_settings.DATETIME_FORMAT) == 'iso-8601':
+            convert = _datetime()
+        elif kind is serializers.DecimalField and not field.localize and not field.normalize_output \
+                and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING):
+            convert = _decimal(field)
+        else:
+            return None
+        if '.' in field.source:
+            return None
+        names.append(name)
+        columns.append(field.source)
+        converters.append(convert)
+    return names, columns, converters
+
+
+def to_dicts(rows, names, converters):
+    convert = [(i, c) for i, c in enumerate(converters) if c is not None]
+    for row in rows:
+        if convert:
+            row = list(row)
+            for i, c in convert:
+                if row[i] is not None:
+                    row[i] = c(row[i])
+        yield dict(zip(names, row))
+
+
+def stream(queryset, names, columns, converters, chunk_size=2000):
+    """Yield a JSON array of ``queryset`` rows in chunks, without building model instances."""
+    rows = to_dicts(queryset.values_list(*columns).iterator(chunk_size=chunk_size), names, converters)
+    yield b'['
+    first = True
+    while True:
+        chunk = [row for _, row in zip(range(chunk_size), rows)]
+        if not chunk:
+            break
+        if not first:
+            yield b','
+        yield encode(chunk)[1:-1]
+        first = False
+    yield b']'
+
+
+class FastReadMixin:
+    """
+    Opt-in fast path for list and retrieve on read-heavy viewsets.
+
+    Rows are read with values_list() and converted with the serializer's
+    own rules (decimal strings, ISO datetimes), skipping model instances
+    and per-field serializer calls; the JSON is identical to the regular
+    path. Unpaginated lists are streamed in chunks. Requests for other
+    renderers (the browsable API, ?format=api, indented JSON) take the
+    regular path.
+    """
+
+    def _fast_plan(self):
+        request = self.request
+        if type(request.accepted_renderer) is not JSONRenderer or request.accepted_media_type != 'application/json':
+            return None
+        return plan(self.get_serializer())
+
+    def list(self, request, *args, **kwargs):
+        fast = self._fast_plan()
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+        names, columns, converters = fast
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if self.paginator is not None:
+            # Cursor pagination reads its position from row dicts
+            ordering = [f.lstrip('-') for f in self.paginator.get_ordering(request, queryset, self)]
+            extra = [f for f in ordering if f not in columns]
+            page = self.paginator.paginate_queryset(queryset.values(*columns, *extra), request, view=self)
+            rows = list(to_dicts(([row[c] for c in columns] for row in page), names, converters))
+            return self.paginator.get_paginated_response(rows)
+
+        # The body is produced after the view returns: pin the database
+        # the router picks for this request now
+        queryset = queryset.using(queryset.db)
+        response = StreamingHttpResponse(
+            streaming_body(stream(queryset, names, columns, converters, settings.FAST_SERIALIZATION_CHUNK), request),
+            content_type='application/json',
+        )
+        response.headers['Vary'] = 'Accept'
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        fast = self._fast_plan()
+        if fast is None:
+            return super().retrieve(request, *args, **kwargs)
+        names, columns, converters = fast
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        row = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup]}
+        ).values_list(*columns).first()
+        if row is None:
+            raise Http404
+        return Response(next(to_dicts([row], names, converters)))
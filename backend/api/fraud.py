@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import ai_services, counters
+from .models import Ticket
+from .signals import notify_change
+
+# What a ticket is compared against: tickets per customer at this event,
+# and the median and spread of its prices
+Profile = namedtuple('Profile', 'typical_tickets price_median price_scale')
+
+_model = None
+_model_lock = threading.Lock()
+_profiles = {}  # event id -> (expires, Profile)
+
+
+def model():
+    """The process-wide FraudModel, loaded from FRAUD_MODEL_PATH on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                path = settings.FRAUD_MODEL_PATH
+                _model = ai_services.FraudModel.from_file(path) if path else ai_services.FraudModel()
+    return _model
+
+
+def _weighted_median(pairs):
+    # Median of (value, count) pairs sorted by value
+    total = sum(n for _, n in pairs)
+    seen = 0
+    for value, n in pairs:
+        seen += n
+        if seen * 2 >= total:
+            return value
+    return None
+
+
+def event_profile(event_id, refresh=False):
+    """The event's Profile, from two aggregate queries; cached for FRAUD_PROFILE_TTL seconds."""
+    cached = _profiles.get(event_id)
+    if cached and not refresh and cached[0] > time.monotonic():
+        return cached[1]
+    tickets = Ticket.objects.filter(event_id=event_id)
+    totals = tickets.aggregate(tickets=Count('id'), customers=Count('customer_name', distinct=True))
+    # Prices come in a few tiers: group them rather than read every row
+    prices = [(float(price), n) for price, n in
+              tickets.filter(price__gt=0).values_list('price').annotate(n=Count('id')).order_by('price')]
+    median = scale = None
+    if prices:
+        median = _weighted_median(prices)
+        mad = _weighted_median(sorted((abs(price - median), n) for price, n in prices))
+        scale = max(1.4826 * mad, 0.05 * median, 1.0)
+    typical = max(settings.FRAUD_BURST_LIMIT, totals['tickets'] / max(totals['customers'], 1))
+    profile = Profile(typical, median, scale)
+    _profiles[event_id] = (time.monotonic() + settings.FRAUD_PROFILE_TTL, profile)
+    return profile
+
+
+def _counts(tickets, field, values):
+    return tickets.filter(**{f'{field}__in': values}).values_list(field).annotate(n=Count('id')).order_by()
+
+
+def _features(code, customer_tickets, seat_tickets, price, profile):
+    return ai_services.fraud_features(code, customer_tickets, profile.typical_tickets, seat_tickets,
+                                      price, profile.price_median, profile.price_scale)
+
+
+def score_tickets(tickets):
+    """
+    Fraud scores for new, unsaved ``tickets``, in order. Each is counted
+    with the event's stored tickets and the others in the list: two
+    grouped queries per event, and one vectorized model call.
+    """
+    rows = [None] * len(tickets)
+    by_event = defaultdict(list)
+    for i, ticket in enumerate(tickets):
+        by_event[ticket.event_id].append(i)
+    for event_id, indexes in by_event.items():
+        profile = event_profile(event_id)
+        customers = Counter(tickets[i].customer_name for i in indexes)
+        seats = Counter(tickets[i].seat_number for i in indexes)
+        stored = Ticket.objects.filter(event_id=event_id)
+        customers.update(dict(_counts(stored, 'customer_name', list(customers))))
+        seats.update(dict(_counts(stored, 'seat_number', list(seats))))
+        for i in indexes:
+            t = tickets[i]
+            rows[i] = _features(t.ticket_code, customers[t.customer_name], seats[t.seat_number], t.price, profile)
+    return model().score_many(rows)
+
+
+def rescore_event(event_id, chunk_size=None, dry_run=False):
+    """
+    Recompute ``fraud_score`` for every ticket of an event, ``chunk_size``
+    tickets (FRAUD_RESCORE_CHUNK) per transaction. Changed scores are
+    written with one UPDATE per distinct score, stamping ``updated_at``
+    so gate manifest deltas pick them up, and the fraud-alert counter
+    moves in the same transaction. Returns counts of what changed.
+    """
+    chunk_size = chunk_size or settings.FRAUD_RESCORE_CHUNK
+    tickets = Ticket.objects.filter(event_id=event_id)
+    profile = event_profile(event_id, refresh=True)
+    # Whole-event context up front: one entry per distinct customer and seat
+    customers = dict(tickets.values_list('customer_name').annotate(n=Count('id')).order_by())
+    seats = dict(tickets.values_list('seat_number').annotate(n=Count('id')).order_by())
+    scorer = model()
+    stats = Counter(tickets=0, changed=0, flagged=0, cleared=0)
+    model_seconds = 0.0
+    last = 0
+    while True:
+        with transaction.atomic():
+            # Locked, so the old scores the counter adjustment is based on
+            # can't change under us
+            rows = list(
+                tickets.filter(id__gt=last).order_by('id').select_for_update()
+                .values_list('id', 'ticket_code', 'customer_name', 'seat_number', 'price',
+                             'fraud_score', 'is_validated')[:chunk_size]
+            )
+            if not rows:
+                break
+            last = rows[-1][0]
+            features = [_features(code, customers.get(customer, 1), seats.get(seat, 1), price, profile)
+                        for _, code, customer, seat, price, _, _ in rows]
+            started = time.perf_counter()
+            scores = scorer.score_many(features)
+            model_seconds += time.perf_counter() - started
+
+            changed = defaultdict(list)  # new score -> ticket ids
+            for row, score in zip(rows, scores):
+                if score != row[5]:
+                    changed[score].append(row[0])
+                    was_flagged, flagged = row[5] > counters.FRAUD_THRESHOLD, score > counters.FRAUD_THRESHOLD
+                    stats['flagged'] += flagged and not was_flagged
+                    stats['cleared'] += was_flagged and not flagged
+            stats['tickets'] += len(rows)
+            stats['changed'] += sum(len(ids) for ids in changed.values())
+            if dry_run or not changed:
+                continue
+            now = timezone.now()
+            for score, ids in changed.items():
+                Ticket.objects.filter(id__in=ids).update(fraud_score=score, updated_at=now)
+            counters.add(counters.difference(
+                counters.ticket_totals(zip(scores, (row[6] for row in rows))),
+                counters.ticket_totals((row[5], row[6]) for row in rows),
+            ))
+    if stats['changed'] and not dry_run:
+        notify_change(Ticket)
+    stats['model_us_per_ticket'] = model_seconds / stats['tickets'] * 1e6 if stats['tickets'] else 0.0
+    return stats
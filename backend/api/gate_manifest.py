@@ -0,0 +1,231 @@
+import datetime
+import hashlib
+import hmac
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.utils import timezone
+
+from .counters import FRAUD_THRESHOLD
+from .models import RevokedTicket, Ticket
+
+# Binary layout, little-endian:
+#   header  magic, format, flags, event id, version and since (ms since the
+#           epoch), ticket count, revoked count, fingerprint salt
+#   body    count sorted u64 code fingerprints, then a validated bitset and
+#           a fraud bitset of count bits each, in fingerprint order, then
+#           revoked count sorted u64 fingerprints of tickets to drop
+#           (deltas only)
+#   trailer HMAC-SHA256 of everything before it
+MAGIC = b'SSGM'
+FORMAT = 2
+FLAG_DELTA = 1
+HEADER = struct.Struct('<4sHHQqqII16s')
+SIGNATURE_SIZE = 32
+
+VALID = 'valid'
+SCANNED = 'scanned'
+FRAUD = 'fraud'
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def signing_key():
+    """GATE_MANIFEST_KEY, shared with the gate devices (defaults to one derived from SECRET_KEY)."""
+    if settings.GATE_MANIFEST_KEY:
+        return settings.GATE_MANIFEST_KEY.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), b'api.gate_manifest', hashlib.sha256).digest()
+
+
+def event_salt(key, event_id):
+    # Same for every manifest of an event, so deltas line up with the full one
+    return hmac.new(key, b'fingerprint:%d' % event_id, hashlib.sha256).digest()[:16]
+
+
+def fingerprint(code, salt):
+    return int.from_bytes(hashlib.blake2b(code.encode(), digest_size=8, key=salt).digest(), 'little')
+
+
+def _u64(values):
+    data = array('Q', values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
+
+
+def _bits(flags):
+    bits = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            bits[i >> 3] |= 1 << (i & 7)
+    return bytes(bits)
+
+
+def _millis(value):
+    return int(value.timestamp() * 1000)
+
+
+def revoke(event_id, codes):
+    """Record that ``codes`` left ``event_id``; bulk paths that delete or move tickets call this."""
+    RevokedTicket.objects.bulk_create([RevokedTicket(event_id=event_id, ticket_code=code) for code in codes])
+
+
+def build(event_id, since=None, key=None):
+    """
+    Signed manifest of ``event_id``'s tickets: every ticket, or with
+    ``since`` (a previous manifest's version) only those changed after
+    it, plus those revoked after it. Returns (bytes, version). About 8
+    bytes per ticket.
+    """
+    key = key or signing_key()
+    salt = event_salt(key, event_id)
+    # Taken before reading, so nothing committed from here on is missed
+    now = timezone.now()
+    tickets = Ticket.objects.filter(event_id=event_id)
+    flags = 0
+    revoked = []
+    if since is not None:
+        # Transactions still open when that manifest was read may have
+        # committed earlier timestamps: overlap by a margin (re-sending
+        # a ticket's state is harmless)
+        overlap = datetime.timedelta(seconds=settings.GATE_MANIFEST_DELTA_OVERLAP)
+        start = datetime.datetime.fromtimestamp(since / 1000, tz=datetime.timezone.utc) - overlap
+        tickets = tickets.filter(updated_at__gt=start)
+        flags |= FLAG_DELTA
+        codes = set(RevokedTicket.objects.filter(event_id=event_id, revoked_at__gt=start)
+                    .values_list('ticket_code', flat=True))
+        if codes:
+            # Back in the event since (moved back, reissued): sent as a ticket instead
+            codes -= set(Ticket.objects.filter(event_id=event_id, ticket_code__in=codes)
+                         .values_list('ticket_code', flat=True))
+        revoked = sorted(fingerprint(code, salt) for code in codes)
+
+    rows = sorted(
+        (fingerprint(code, salt), validated, fraud_score > FRAUD_THRESHOLD)
+        for code, validated, fraud_score in
+        tickets.values_list('ticket_code', 'is_validated', 'fraud_score').iterator(chunk_size=10000)
+    )
+    version = _millis(now)
+    body = b''.join((
+        HEADER.pack(MAGIC, FORMAT, flags, event_id, version, since or 0, len(rows), len(revoked), salt),
+        _u64(row[0] for row in rows),
+        _bits([row[1] for row in rows]),
+        _bits([row[2] for row in rows]),
+        _u64(revoked),
+    ))
+    return body + hmac.new(key, body, hashlib.sha256).digest(), version
+
+
+class Manifest:
+    """
+    A gate's copy of an event manifest: verified, loaded without a
+    per-ticket parse, and answering lookups by binary search. Deltas are
+    merged in with apply(); local scans are marked with mark_scanned().
+    This is the reference for gate devices.
+    """
+
+    def __init__(self, event_id, version, salt, fingerprints, validated, fraud, revoked=()):
+        self.event_id = event_id
+        self.version = version
+        self.salt = salt
+        self.fingerprints = fingerprints
+        self.validated = validated
+        self.fraud = fraud
+        self.revoked = revoked
+
+    @classmethod
+    def parse(cls, data, key):
+        """Check the signature and decode; returns (manifest, is_delta)."""
+        if len(data) < HEADER.size + SIGNATURE_SIZE:
+            raise ManifestError("Manifest too short")
+        body, signature = data[:-SIGNATURE_SIZE], data[-SIGNATURE_SIZE:]
+        if not hmac.compare_digest(hmac.new(key, body, hashlib.sha256).digest(), signature):
+            raise ManifestError("Bad manifest signature")
+        magic, version_format, flags, event_id, version, since, count, revoked_count, salt = HEADER.unpack_from(body)
+        if magic != MAGIC or version_format != FORMAT:
+            raise ManifestError("Not a gate manifest, or an unsupported format")
+        nbits = (count + 7) // 8
+        if len(body) != HEADER.size + 8 * count + 2 * nbits + 8 * revoked_count:
+            raise ManifestError("Manifest size doesn't match its ticket count")
+
+        offset = HEADER.size
+        fingerprints = cls._u64s(body, offset, count)
+        offset += 8 * count
+        validated = bytearray(body[offset:offset + nbits])
+        fraud = bytearray(body[offset + nbits:offset + 2 * nbits])
+        revoked = cls._u64s(body, offset + 2 * nbits, revoked_count)
+        return cls(event_id, version, salt, fingerprints, validated, fraud, revoked), bool(flags & FLAG_DELTA)
+
+    @staticmethod
+    def _u64s(body, offset, count):
+        values = array('Q')
+        values.frombytes(body[offset:offset + 8 * count])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+    def _find(self, code):
+        fp = fingerprint(code, self.salt)
+        i = bisect_left(self.fingerprints, fp)
+        return i if i < len(self.fingerprints) and self.fingerprints[i] == fp else None
+
+    @staticmethod
+    def _get(bits, i):
+        return bool(bits[i >> 3] & (1 << (i & 7)))
+
+    @staticmethod
+    def _set(bits, i, value):
+        if value:
+            bits[i >> 3] |= 1 << (i & 7)
+        else:
+            bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    def lookup(self, code):
+        """VALID, SCANNED, FRAUD, or None for an unknown code."""
+        i = self._find(code)
+        if i is None:
+            return None
+        if self._get(self.fraud, i):
+            return FRAUD
+        return SCANNED if self._get(self.validated, i) else VALID
+
+    def mark_scanned(self, code):
+        i = self._find(code)
+        if i is not None:
+            self._set(self.validated, i, True)
+
+    def apply(self, delta):
+        """
+        Merge a delta manifest of the same event: changed tickets take its
+        state, new ones are added and revoked ones dropped.
+        """
+        if delta.event_id != self.event_id or delta.salt != self.salt:
+            raise ManifestError("Delta is for another event")
+        revoked = set(delta.revoked)
+        added = []
+        for j, fp in enumerate(delta.fingerprints):
+            state = (self._get(delta.validated, j), self._get(delta.fraud, j))
+            i = bisect_left(self.fingerprints, fp)
+            if i < len(self.fingerprints) and self.fingerprints[i] == fp:
+                # A scan recorded here stays, even if the server hasn't seen it yet
+                self._set(self.validated, i, state[0] or self._get(self.validated, i))
+                self._set(self.fraud, i, state[1])
+            else:
+                added.append((fp,) + state)
+        if added or revoked:
+            rows = sorted(added + [
+                (fp, self._get(self.validated, i), self._get(self.fraud, i))
+                for i, fp in enumerate(self.fingerprints) if fp not in revoked
+            ])
+            self.fingerprints = array('Q', (row[0] for row in rows))
+            self.validated = bytearray(_bits([row[1] for row in rows]))
+            self.fraud = bytearray(_bits([row[2] for row in rows]))
+        self.version = max(self.version, delta.version)
+
+    def __len__(self):
+        return len(self.fingerprints)
@@ -0,0 +1,164 @@
+import datetime
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import anomaly, counters
+from .crowd_engine import crowd_engine
+from .models import CrowdZone, EnergyMeter
+from .signals import notify_change
+from .timeseries import record_energy_readings, record_zone_readings
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFull(Exception):
+    pass
+
+
+def parse_reading(item, now):
+    """(kind, id, timestamp, value) from one ingested line, or None if invalid."""
+    if not isinstance(item, dict):
+        return None
+    ts = item.get('ts')
+    try:
+        if ts is None:
+            ts = now
+        elif isinstance(ts, (int, float)):
+            ts = datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc)
+        else:
+            ts = datetime.datetime.fromisoformat(ts)
+            if timezone.is_naive(ts):
+                ts = timezone.make_aware(ts, datetime.timezone.utc)
+        if 'zone' in item:
+            return 'zone', int(item['zone']), ts, max(0, int(item['count']))
+        if 'meter' in item:
+            return 'meter', int(item['meter']), ts, round(float(item['kw']), 1)
+    except (KeyError, TypeError, ValueError, OverflowError):
+        pass
+    return None
+
+
+class IngestBuffer:
+    """
+    Coalesces streamed sensor readings and writes them on an interval.
+
+    Only the newest reading per zone and per meter is kept between
+    flushes; a background thread writes them every INGEST_FLUSH_INTERVAL
+    with one bulk_update per model, so database writes scale with the
+    number of sensors, not with the reading rate. Once INGEST_BUFFER_SIZE
+    readings are waiting (the writer is falling behind), new batches are
+    rejected and the caller should retry later.
+    """
+
+    COUNTERS = ('accepted', 'coalesced', 'dropped', 'rejected', 'flushed', 'flushes')
+
+    def __init__(self, capacity=None, interval=None):
+        self.capacity = capacity or settings.INGEST_BUFFER_SIZE
+        self.interval = interval or settings.INGEST_FLUSH_INTERVAL
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self._zones = {}
+        self._meters = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, items):
+        """Buffer a batch of parsed NDJSON items; returns (accepted, dropped)."""
+        if self._pending + len(items) > self.capacity:
+            self.counters['rejected'] += len(items)
+            raise BufferFull()
+
+        now = timezone.now()
+        accepted = dropped = coalesced = 0
+        with self._lock:
+            buffers = {'zone': self._zones, 'meter': self._meters}
+            for item in items:
+                reading = parse_reading(item, now)
+                if reading is None:
+                    dropped += 1
+                    continue
+                kind, key, ts, value = reading
+                buffer = buffers[kind]
+                accepted += 1
+                previous = buffer.get(key)
+                if previous is not None:
+                    coalesced += 1
+                    if previous[0] > ts:
+                        continue  # out-of-order reading, keep the newer one
+                buffer[key] = (ts, value)
+            self._pending += accepted
+            counters = self.counters
+            counters['accepted'] += accepted
+            counters['dropped'] += dropped
+            counters['coalesced'] += coalesced
+        self.start()
+        return accepted, dropped
+
+    def flush(self):
+        """Write the buffered readings; returns how many rows were updated."""
+        with self._lock:
+            zones, self._zones = self._zones, {}
+            meters, self._meters = self._meters, {}
+            self._pending = 0
+        if not zones and not meters:
+            return 0
+
+        with transaction.atomic():
+            # Rows are locked in id order, zones then meters, like the tick
+            # engine's; unknown ids are dropped here rather than in add()
+            zone_rows = list(CrowdZone.objects.select_for_update().filter(id__in=zones).order_by('id').only('id', 'capacity'))
+            meter_rows = list(EnergyMeter.objects.select_for_update().filter(id__in=meters).order_by('id').only('id', 'status'))
+            for zone in zone_rows:
+                zone.last_updated, zone.current_count = zones[zone.id]
+            for meter in meter_rows:
+                meter.last_reading_time, meter.current_usage_kw = meters[meter.id]
+
+            zone_alerts = anomaly.scan_zones(zone_rows)
+            meter_alerts = anomaly.scan_meters(meter_rows)
+            counters.bulk_update_zones(zone_rows, ['current_count', 'status', 'last_updated'])
+            EnergyMeter.objects.bulk_update(meter_rows, ['current_usage_kw', 'last_reading_time', 'status'],
+                                            batch_size=500)
+        anomaly.log_alerts(zone_alerts, meter_alerts)
+
+        if zone_rows:
+            record_zone_readings([(z.id, z.last_updated, z.current_count) for z in zone_rows])
+            crowd_engine.record([z.id for z in zone_rows], [z.current_count for z in zone_rows])
+            notify_change(CrowdZone)
+        if meter_rows:
+            record_energy_readings([(m.id, m.last_reading_time, m.current_usage_kw) for m in meter_rows])
+            notify_change(EnergyMeter)
+
+        written = len(zone_rows) + len(meter_rows)
+        self.counters['dropped'] += len(zones) + len(meters) - written
+        self.counters['flushed'] += written
+        self.counters['flushes'] += 1
+        return written
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.run, name='ingest-flush', daemon=True)
+                self._thread.start()
+
+    def run(self):
+        while True:
+            started = time.monotonic()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Ingest flush failed")
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def stats(self):
+        return {**self.counters, "pending": self._pending, "capacity": self.capacity}
+
+
+ingest_buffer = IngestBuffer()
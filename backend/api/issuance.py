@@ -0,0 +1,119 @@
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+
+from . import counters, fraud
+from .models import Event, Ticket
+from .signals import notify_change
+from .ticket_index import ticket_index
+
+REQUIRED_FIELDS = ('event', 'customer_name', 'ticket_code', 'seat_number', 'price')
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _clean(row):
+    """Validate one incoming row; returns (Ticket, None) or (None, error)."""
+    if not isinstance(row, dict):
+        return None, "Row must be an object"
+    missing = [f for f in REQUIRED_FIELDS if row.get(f) in (None, '')]
+    if missing:
+        return None, f"Missing fields: {', '.join(missing)}"
+    try:
+        event_id = int(row['event'])
+        price = Decimal(str(row['price'])).quantize(Decimal('0.01'))
+    except (TypeError, ValueError, InvalidOperation):
+        return None, "Invalid event or price"
+    code = str(row['ticket_code']).strip()
+    if len(code) > Ticket._meta.get_field('ticket_code').max_length:
+        return None, "ticket_code too long"
+    return Ticket(
+        event_id=event_id,
+        customer_name=str(row['customer_name'])[:100],
+        ticket_code=code,
+        seat_number=str(row['seat_number'])[:20],
+        price=price,
+    ), None
+
+
+def issue_tickets(rows, batch_size=1000):
+    """
+    Insert tickets in batches of ``batch_size`` rows.
+
+    ``rows`` can be any iterable of dicts (a JSON array or a csv.DictReader),
+    and is consumed lazily. Each batch is validated, fraud-scored in one
+    vectorized call and written with a single bulk_create. Rows that fail,
+    including duplicate ticket codes, are reported individually and do not
+    abort the rest of the import.
+    """
+    created = 0
+    errors = []
+    known_events = set()
+
+    for offset, chunk in enumerate(_chunks(rows, batch_size)):
+        start = offset * batch_size
+        candidates = []
+        seen = set()
+        for i, row in enumerate(chunk, start=start):
+            ticket, error = _clean(row)
+            if error is None and ticket.ticket_code in seen:
+                error = "Duplicate ticket_code in upload"
+            if error:
+                errors.append({"row": i, "ticket_code": row.get('ticket_code') if isinstance(row, dict) else None,
+                               "error": error})
+                continue
+            seen.add(ticket.ticket_code)
+            candidates.append((i, ticket))
+
+        # One query each for unknown events and already-issued codes
+        event_ids = {t.event_id for _, t in candidates} - known_events
+        known_events |= set(Event.objects.filter(id__in=event_ids).values_list('id', flat=True))
+        taken = set(Ticket.objects.filter(ticket_code__in=seen).values_list('ticket_code', flat=True))
+
+        batch = []
+        for i, ticket in candidates:
+            if ticket.event_id not in known_events:
+                errors.append({"row": i, "ticket_code": ticket.ticket_code, "error": "Event not found"})
+            elif ticket.ticket_code in taken:
+                errors.append({"row": i, "ticket_code": ticket.ticket_code, "error": "ticket_code already exists"})
+            else:
+                batch.append((i, ticket))
+        if not batch:
+            continue
+
+        scores = fraud.score_tickets([t for _, t in batch])
+        for (_, ticket), score in zip(batch, scores):
+            ticket.fraud_score = score
+
+        try:
+            with transaction.atomic():
+                Ticket.objects.bulk_create([t for _, t in batch])
+                counters.add(counters.ticket_totals((t.fraud_score, t.is_validated) for _, t in batch))
+            inserted = [t for _, t in batch]
+        except IntegrityError:
+            # Lost a race with a concurrent issuer: fall back to per-row
+            # inserts so only the conflicting rows are rejected
+            inserted = []
+            for i, ticket in batch:
+                try:
+                    with transaction.atomic():
+                        ticket.save(force_insert=True)
+                    inserted.append(ticket)
+                except IntegrityError:
+                    errors.append({"row": i, "ticket_code": ticket.ticket_code, "error": "ticket_code already exists"})
+
+        ticket_index.add_many(t.ticket_code for t in inserted)
+        created += len(inserted)
+
+    if created:
+        notify_change(Ticket)
+    errors.sort(key=lambda e: e['row'])
+    return {"created": created, "failed": len(errors), "errors": errors}
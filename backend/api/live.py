@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from .models import CrowdZone, EnergyMeter, SystemLog
+from .snapshots import dashboard_snapshot
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ('dashboard', 'crowd', 'energy', 'alerts')
+
+# Topics whose payload depends on a model; None means "any tracked model"
+TOPIC_MODELS = {
+    'dashboard': None,
+    'crowd': CrowdZone,
+    'energy': EnergyMeter,
+    'alerts': SystemLog,
+}
+
+
+def group_name(topic):
+    return f"live.{topic}"
+
+
+# Collectors return {key: value}; deltas are computed per key
+def collect_dashboard():
+    document = dashboard_snapshot.get()
+    document.pop("snapshot", None)
+    return document
+
+
+def collect_crowd():
+    return {
+        str(zone['id']): zone
+        for zone in CrowdZone.objects.values('id', 'name', 'capacity', 'current_count', 'status')
+    }
+
+
+def collect_energy():
+    return {
+        str(meter['id']): {
+            "id": meter['id'],
+            "zone": meter['location'],
+            "type": meter['name'],
+            "current_reading": meter['current_usage_kw'],
+            "status": meter['status'],
+        }
+        for meter in EnergyMeter.objects.values('id', 'location', 'name', 'current_usage_kw', 'status')
+    }
+
+
+def collect_alerts():
+    logs = SystemLog.objects.filter(level__in=('WARNING', 'ERROR')).order_by('-timestamp')[:20]
+    return {
+        str(log.id): {
+            "id": log.id,
+            "module": log.module,
+            "level": log.level,
+            "message": log.message,
+            "time": log.timestamp.strftime("%H:%M"),
+        }
+        for log in logs
+    }
+
+
+COLLECTORS = {
+    'dashboard': collect_dashboard,
+    'crowd': collect_crowd,
+    'energy': collect_energy,
+    'alerts': collect_alerts,
+}
+
+
+def diff(previous, current):
+    changed = {key: value for key, value in current.items() if previous.get(key) != value}
+    removed = [key for key in previous if key not in current]
+    return changed, removed
+
+
+class LivePublisher:
+    """
+    Pushes per-topic deltas to websocket groups.
+
+    One task on the ASGI event loop collects each subscribed topic at most
+    once per LIVE_PUSH_INTERVAL, and only when a write marked it dirty (or
+    LIVE_RESYNC_INTERVAL elapsed, for writes made by other processes). The
+    delta is sent once to the topic's group and the channel layer does the
+    fan-out, so query cost does not depend on the number of clients.
+    """
+
+    def __init__(self, interval=None, resync=None):
+        self.interval = interval if interval is not None else settings.LIVE_PUSH_INTERVAL
+        self.resync = resync if resync is not None else settings.LIVE_RESYNC_INTERVAL
+        self._state = {}
+        self._collected_at = {}
+        self._dirty = set(TOPICS)
+        self._subscribers = Counter()
+        self._lock = threading.Lock()
+        self._task = None
+
+    def mark_dirty(self, model):
+        for topic, topic_model in TOPIC_MODELS.items():
+            if topic_model is None or topic_model is model:
+                self._dirty.add(topic)
+
+    def subscribe(self, topic):
+        if not self._subscribers[topic]:
+            # Nobody holds a baseline for this topic; start from fresh state
+            self._state.pop(topic, None)
+        self._subscribers[topic] += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def unsubscribe(self, topic):
+        self._subscribers[topic] -= 1
+        if self._subscribers[topic] <= 0:
+            del self._subscribers[topic]
+
+    def current(self, topic):
+        """Full state for a newly subscribed client."""
+        with self._lock:
+            if topic not in self._state:
+                self._state[topic] = COLLECTORS[topic]()
+                self._collected_at[topic] = time.monotonic()
+            return self._state[topic]
+
+    def step(self):
+        """Collect dirty topics; returns the (topic, payload) deltas to publish."""
+        now = time.monotonic()
+        deltas = []
+        for topic in list(self._subscribers):
+            expired = now - self._collected_at.get(topic, 0) > self.resync
+            if topic not in self._dirty and not expired:
+                continue
+            self._dirty.discard(topic)
+            with self._lock:
+                current = COLLECTORS[topic]()
+                previous = self._state.get(topic)
+                self._state[topic] = current
+                self._collected_at[topic] = now
+            if previous is None:
+                # No baseline yet: subscribers get this state as their snapshot
+                continue
+            changed, removed = diff(previous, current)
+            if changed or removed:
+                deltas.append((topic, {"type": "delta", "topic": topic, "changed": changed, "removed": removed}))
+        return deltas
+
+    async def run(self):
+        # Channels is only needed by the ASGI server; keep it off the WSGI import path
+        from channels.db import database_sync_to_async
+        from channels.layers import get_channel_layer
+
+        layer = get_channel_layer()
+        while self._subscribers:
+            started = time.monotonic()
+            try:
+                for topic, payload in await database_sync_to_async(self.step)():
+                    await layer.group_send(group_name(topic), {"type": "live.message", "payload": payload})
+            except Exception:
+                logger.exception("Live publisher step failed")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+live_publisher = LivePublisher()
@@ -0,0 +1,86 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+
+from api.snapshots import DashboardSnapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "p50/p99 latency of a full dashboard rebuild under concurrent load: sections queried one "
+        "after another (sync view) vs side by side on the query pool (async view)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--clients', type=int, default=4, help="Concurrent clients")
+        parser.add_argument('--rtt-ms', type=float, default=0.0,
+                            help="Extra delay per query, to emulate a database across the network")
+
+    def handle(self, *args, **options):
+        n, clients, rtt = options['requests'], options['clients'], options['rtt_ms'] / 1000
+        if rtt:
+            def delay(execute, sql, params, many, context):
+                time.sleep(rtt)
+                return execute(sql, params, many, context)
+
+            def add_delay(sender, connection, **kwargs):
+                if delay not in connection.execute_wrappers:
+                    connection.execute_wrappers.append(delay)
+
+            connections.close_all()
+            connection_created.connect(add_delay, weak=False)
+
+        # Every client issues its share back to back; each request rebuilds
+        # all sections, as a snapshot miss would
+        shares = [n // clients + (i < n % clients) for i in range(clients)]
+        self.stdout.write(f"{n} requests from {clients} clients, query pool of {settings.QUERY_POOL_SIZE}, "
+                          f"+{options['rtt_ms']}ms per query")
+        DashboardSnapshot().get()
+
+        def sync_client(count):
+            latencies = []
+            try:
+                for _ in range(count):
+                    started = time.perf_counter()
+                    DashboardSnapshot().get()
+                    latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            return latencies
+
+        async def async_client(count):
+            latencies = []
+            for _ in range(count):
+                started = time.perf_counter()
+                await DashboardSnapshot().aget()
+                latencies.append(time.perf_counter() - started)
+            return latencies
+
+        async def run_async():
+            return await asyncio.gather(*(async_client(count) for count in shares))
+
+        # A threaded worker: one thread (and connection) per client
+        started = time.perf_counter()
+        with ThreadPoolExecutor(clients) as workers:
+            results = list(workers.map(sync_client, shares))
+        self.report("sync", results, time.perf_counter() - started)
+
+        # One event loop; each request fans its sections out to the query pool
+        started = time.perf_counter()
+        results = asyncio.run(run_async())
+        self.report("async", results, time.perf_counter() - started)
+
+    def report(self, label, results, elapsed):
+        latencies = [latency * 1000 for client in results for latency in client]
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        self.stdout.write(
+            f"{label:>6}: p50 {cuts[49]:7.2f}ms  p99 {cuts[98]:7.2f}ms  "
+            f"mean {statistics.fmean(latencies):7.2f}ms  {len(latencies) / elapsed:8.1f} req/s"
+        )
@@ -0,0 +1,65 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api import counters, fast_serialization
+from api.models import Event, Ticket
+from api.serializers import TicketSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare the DRF serializer path with the fast read path on a ticket listing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        n, repeat = options['tickets'], options['repeat']
+        prefix = f"SER-{uuid.uuid4().hex[:8]}-"
+        now = timezone.now()
+        event = Event.objects.create(name="Serialization benchmark", start_time=now, end_time=now, status='upcoming')
+        try:
+            Ticket.objects.bulk_create(
+                [Ticket(event=event, customer_name=f"Fan {i}", ticket_code=f"{prefix}{i}", seat_number=f"S{i % 500}",
+                        price=f"{50 + i % 100}.50", fraud_score=(i % 97) / 100,
+                        is_validated=i % 3 == 0, entry_time=now if i % 3 == 0 else None)
+                 for i in range(n)],
+                batch_size=2000,
+            )
+            # Counted, so the cascade delete below leaves the KPI counters as they were
+            counters.add(counters.count_tickets(event.tickets.all()))
+            queryset = Ticket.objects.filter(event=event).order_by('id')
+            plan = fast_serialization.plan(TicketSerializer())
+
+            def regular():
+                return JSONRenderer().render(TicketSerializer(queryset, many=True).data)
+
+            def fast():
+                return b''.join(fast_serialization.stream(queryset, *plan))
+
+            expected = self.measure("DRF serializer", regular, n, repeat)
+            body = self.measure("fast path", fast, n, repeat)
+            style = self.style.SUCCESS if body == expected else self.style.ERROR
+            self.stdout.write(style(f"byte-identical: {body == expected} ({len(body):,} bytes)"))
+
+            if fast_serialization.orjson is not None:
+                with override_settings(FAST_JSON_ENCODER='orjson'):
+                    body = self.measure("fast path + orjson", fast, n, repeat)
+                self.stdout.write(f"orjson byte-identical: {body == expected}")
+        finally:
+            event.delete()
+
+    def measure(self, label, fn, count, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        self.stdout.write(f"{label:>20}: {count} rows in {best:.2f}s = {count / best:,.0f} rows/s")
+        return body
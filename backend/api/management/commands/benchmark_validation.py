@@ -0,0 +1,81 @@
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api import counters
+from api.models import Event, Ticket
+from api.ticket_index import ticket_index
+from api.validation import validate_codes
+
+
+class Command(BaseCommand):
+    help = "Measure ticket validation throughput (single vs batch) and check double-scan safety."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=5000)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--gates', type=int, default=4,
+                            help="Concurrent scanners racing on the same codes.")
+
+    def handle(self, *args, **options):
+        n, batch_size, gates = options['tickets'], options['batch_size'], options['gates']
+        prefix = f"BENCH-{uuid.uuid4().hex[:8]}-"
+        event = Event.objects.create(
+            name="Validation benchmark", start_time=timezone.now(), end_time=timezone.now(), status='upcoming'
+        )
+        try:
+            Ticket.objects.bulk_create(
+                [Ticket(event=event, customer_name="Bench", ticket_code=f"{prefix}{i}",
+                        seat_number=str(i), price=0) for i in range(3 * n)],
+                batch_size=1000,
+            )
+            # Counted, so the cascade delete below leaves the KPI counters as they were
+            counters.add(counters.count_tickets(event.tickets.all()))
+            codes = [f"{prefix}{i}" for i in range(3 * n)]
+            ticket_index.add_many(codes)  # as issuance does; bulk_create sends no signals
+
+            # 1. One code per call (the old validate-ticket path)
+            started = time.perf_counter()
+            for code in codes[:n]:
+                validate_codes([code])
+            self.report("single", n, time.perf_counter() - started)
+
+            # 2. Batched calls
+            batch = codes[n:2 * n]
+            started = time.perf_counter()
+            for i in range(0, n, batch_size):
+                validate_codes(batch[i:i + batch_size])
+            self.report(f"batch({batch_size})", n, time.perf_counter() - started)
+
+            # 3. Concurrent gates scanning the same codes: exactly one may win
+            race = codes[2 * n:]
+            wins = []
+
+            def gate():
+                close_old_connections()
+                local = 0
+                for i in range(0, n, batch_size):
+                    local += sum(r['valid'] for r in validate_codes(race[i:i + batch_size]))
+                wins.append(local)
+                close_old_connections()
+
+            threads = [threading.Thread(target=gate) for _ in range(gates)]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.report(f"{gates} racing gates", n * gates, time.perf_counter() - started)
+
+            total = sum(wins)
+            style = self.style.SUCCESS if total == n else self.style.ERROR
+            self.stdout.write(style(f"double-scan check: {total} accepted for {n} codes"))
+        finally:
+            event.delete()
+
+    def report(self, label, count, seconds):
+        self.stdout.write(f"{label:>18}: {count} scans in {seconds:.2f}s = {count / seconds * 60:,.0f} scans/min")
@@ -0,0 +1,55 @@
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import exports
+
+
+class Command(BaseCommand):
+    help = (
+        "Export tickets, gate entries, zone readings or merchandise sales as CSV or Parquet, "
+        "streamed from the database in chunks so memory stays flat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(exports.DATASETS))
+        parser.add_argument('--format', choices=list(exports.FORMATS), default='csv')
+        parser.add_argument('--event', help="Event id")
+        parser.add_argument('--zone', help="Zone id (zone-readings)")
+        parser.add_argument('--start', help="ISO date or datetime, inclusive")
+        parser.add_argument('--end', help="ISO date or datetime, exclusive")
+        parser.add_argument('--output', '-o', default='-', help="File to write, or - for stdout")
+        parser.add_argument('--chunk-size', type=int, default=settings.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            _, filename, body = exports.export(
+                options['dataset'], options['format'], options['chunk_size'],
+                event=exports.parse_id(options['event'], 'event'),
+                zone=exports.parse_id(options['zone'], 'zone'),
+                start=exports.parse_time(options['start'], 'start'),
+                end=exports.parse_time(options['end'], 'end'),
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        started = time.perf_counter()
+        output = options['output']
+        written = 0
+        out = sys.stdout.buffer if output == '-' else open(output, 'wb')
+        try:
+            for data in body:
+                out.write(data)
+                written += len(data)
+        finally:
+            if output == '-':
+                out.flush()
+            else:
+                out.close()
+
+        if output != '-':
+            self.stderr.write(self.style.SUCCESS(
+                f"Wrote {written:,} bytes to {output} in {time.perf_counter() - started:.1f}s"
+            ))
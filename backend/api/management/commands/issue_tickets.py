@@ -0,0 +1,37 @@
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.issuance import issue_tickets
+
+
+class Command(BaseCommand):
+    help = "Bulk-issue tickets from a CSV file or a JSON array (event, customer_name, ticket_code, seat_number, price)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'json'], default=None,
+                            help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--show-errors', type=int, default=20,
+                            help="How many row errors to print.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or path.rsplit('.', 1)[-1].lower()
+        if fmt not in ('csv', 'json'):
+            raise CommandError("Use --format csv or --format json")
+
+        started = time.perf_counter()
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = csv.DictReader(f) if fmt == 'csv' else json.load(f)
+            result = issue_tickets(rows, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        for error in result['errors'][:options['show_errors']]:
+            self.stdout.write(self.style.WARNING(f"row {error['row']} ({error['ticket_code']}): {error['error']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Issued {result['created']} tickets, {result['failed']} rejected in {elapsed:.1f}s"
+        ))
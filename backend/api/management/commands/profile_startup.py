@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter so nothing is already imported
+STARTUP = """
+import os, time
+started = time.perf_counter()
+os.environ['DJANGO_SETTINGS_MODULE'] = {settings!r}
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print('ready', time.perf_counter() - started)
+"""
+
+
+class Command(BaseCommand):
+    help = "Report cold-start import time per module for a settings profile (python -X importtime)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', default='smart_stadium.settings_serverless',
+                            help="Settings module to boot (default: the serverless profile).")
+        parser.add_argument('--top', type=int, default=25)
+        parser.add_argument('--by', choices=('package', 'module'), default='package',
+                            help="Group self time by top-level package or list single modules.")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP.format(settings=options['profile'])],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        wall = time.perf_counter() - started
+        if result.returncode:
+            self.stderr.write(result.stderr[-2000:])
+            return
+
+        # Lines look like: "import time:   self [us] | cumulative | imported package"
+        self_us = defaultdict(int)
+        modules = 0
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'imported package' in line:
+                continue
+            own, _, name = line[len('import time:'):].split('|')
+            name = name.strip()
+            key = name.split('.')[0] if options['by'] == 'package' else name
+            self_us[key] += int(own)
+            modules += 1
+
+        ready = next((float(l.split()[1]) for l in result.stdout.splitlines() if l.startswith('ready ')), 0.0)
+        total = sum(self_us.values())
+        self.stdout.write(f"{options['profile']}: {modules} modules, {total / 1e6:.3f}s importing, "
+                          f"{ready:.3f}s to ready, {wall:.3f}s including interpreter start")
+        for name, us in sorted(self_us.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"{us / 1000:9.1f} ms  {us / total:6.1%}  {name}")
@@ -0,0 +1,23 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import EnergyReading, ZoneOccupancyReading
+from api.timeseries import prune_raw
+
+
+class Command(BaseCommand):
+    help = "Delete raw sensor readings older than the retention window (rollups are kept)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.TIMESERIES_RAW_RETENTION_HOURS)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - datetime.timedelta(hours=options['hours'])
+        for model in (ZoneOccupancyReading, EnergyReading):
+            deleted = prune_raw(model, before)
+            self.stdout.write(self.style.SUCCESS(
+                f"Deleted {deleted} {model._meta.verbose_name_plural} older than {before:%Y-%m-%d %H:%M}"
+            ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api import entry_flow
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the per-minute entry-flow buckets from ticket entry times, after loading tickets "
+        "without validation. Gates of past scans are not stored on tickets, so the split by gate is lost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, action='append', dest='events', help="Event id (repeatable)")
+
+    def handle(self, *args, **options):
+        buckets = entry_flow.rebuild(options['events'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets:,} entry-flow buckets"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from api import counters
+from api.models import CrowdZone, Ticket
+from api.signals import notify_change
+
+
+class Command(BaseCommand):
+    help = "Recount the dashboard KPI counters from the tables and report (or --fix) any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Reset drifted counters to the recount")
+
+    def handle(self, *args, **options):
+        report = counters.reconcile(fix=options['fix'])
+        drifted = 0
+        for name, (value, actual) in report.items():
+            drift = value - actual
+            drifted += bool(drift)
+            line = f"{name:>20}: counter {value:>12,}  actual {actual:>12,}  drift {drift:+,}"
+            self.stdout.write(self.style.WARNING(line) if drift else line)
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All counters match"))
+        elif options['fix']:
+            notify_change(Ticket)
+            notify_change(CrowdZone)
+            self.stdout.write(self.style.SUCCESS(f"Reset {drifted} counter(s)"))
+        else:
+            self.stdout.write(self.style.WARNING(f"{drifted} counter(s) drifted; rerun with --fix to reset them"))
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.simulation import TickEngine, ensure_zones
+
+
+class Command(BaseCommand):
+    help = "Advance crowd zones and energy meters on a fixed tick (replaces the jitter in dashboard-data)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=settings.SIMULATION_TICK_INTERVAL,
+                            help="Seconds between ticks.")
+        parser.add_argument('--zones', type=int, default=None,
+                            help="Number of zones to advance; synthetic zones are created if fewer exist.")
+        parser.add_argument('--ticks', type=int, default=None,
+                            help="Stop after this many ticks (default: run until interrupted).")
+
+    def handle(self, *args, **options):
+        zones = options['zones']
+        if zones:
+            created = ensure_zones(zones)
+            if created:
+                self.stdout.write(f"Created {created} synthetic zones")
+
+        engine = TickEngine(interval=options['interval'], zone_limit=zones)
+        self.stdout.write(f"Ticking every {engine.interval}s (Ctrl+C to stop)")
+        started = time.monotonic()
+        try:
+            engine.run(max_ticks=options['ticks'])
+        except KeyboardInterrupt:
+            pass
+        elapsed = time.monotonic() - started
+        avg_ms = engine.busy_seconds / engine.ticks * 1000 if engine.ticks else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{engine.ticks} ticks in {elapsed:.1f}s (avg tick {avg_ms:.1f} ms)"
+        ))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.bulk_load import load_fixture, refresh_after_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Load dumpdata-format JSON fixtures (e.g. local_data.json) like loaddata, but streamed and "
+        "inserted in batches, so large fixtures load in constant memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        loaded = {}
+        for path in options['paths']:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    for label, count in load_fixture(f, batch_size=options['batch_size']).items():
+                        loaded[label] = loaded.get(label, 0) + count
+            except (OSError, ValueError) as e:
+                raise CommandError(f"{path}: {e}")
+        refresh_after_load()
+
+        for label, count in loaded.items():
+            self.stdout.write(f"{label:>24}: {count:,}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {sum(loaded.values()):,} objects in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,50 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.ticket_index import TicketCodeIndex, ticket_index
+
+
+class Command(BaseCommand):
+    help = "Warm the ticket code index and report its size, memory footprint and lookup speed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--synthetic', type=int, default=0,
+                            help="Size the index with N generated codes instead of the database.")
+        parser.add_argument('--probes', type=int, default=100000,
+                            help="Number of unknown codes to probe for the false-positive rate.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+
+        def make_code():
+            return "T-" + "".join(rng.choices(string.ascii_uppercase + string.digits, k=10))
+
+        started = time.perf_counter()
+        if options['synthetic']:
+            index = TicketCodeIndex(error_rate=ticket_index.error_rate)
+            index.load([make_code() for _ in range(options['synthetic'])])
+        else:
+            index = ticket_index
+            index.warm()
+        build_seconds = time.perf_counter() - started
+
+        stats = index.stats()
+        self.stdout.write(f"codes:          {stats['codes']:,} (built in {build_seconds:.2f}s)")
+        self.stdout.write(f"bloom filter:   {stats['bloom_bytes'] / 2**20:.2f} MB, "
+                          f"{stats['bloom_hashes']} hashes")
+        self.stdout.write(f"fingerprints:   {stats['fingerprint_bytes'] / 2**20:.2f} MB")
+        self.stdout.write(f"resident total: {stats['memory_bytes'] / 2**20:.2f} MB")
+
+        # Unknown codes use a different alphabet so they can't be real tickets
+        probes = ["X-" + "".join(rng.choices(string.ascii_lowercase, k=10)) for _ in range(options['probes'])]
+        bloom_hits = 0
+        started = time.perf_counter()
+        for code in probes:
+            if index._contains(code):
+                bloom_hits += 1
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"negative lookups: {len(probes) / elapsed:,.0f}/s, "
+                          f"{bloom_hits} of {len(probes)} would reach the database")
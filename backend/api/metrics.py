@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+slow_logger = logging.getLogger('api.slow_requests')
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name -> (help text, buckets)
+HISTOGRAMS = {
+    'stadium_http_request_duration_seconds': ("Wall time per request", SECONDS_BUCKETS),
+    'stadium_http_request_db_seconds': ("Time spent in SQL per request", SECONDS_BUCKETS),
+    'stadium_http_request_serialize_seconds': ("Time spent rendering the response body", SECONDS_BUCKETS),
+    'stadium_http_request_queries': ("SQL queries per request", QUERY_BUCKETS),
+    'stadium_http_response_bytes': ("Response body size", BYTES_BUCKETS),
+}
+
+
+def label_value(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """In-process histograms keyed by metric name and (route, method) labels."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._requests = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, status, values):
+        with self._lock:
+            key = (*labels, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            for name, value in values.items():
+                histogram = self._histograms.get((name, labels))
+                if histogram is None:
+                    histogram = self._histograms[(name, labels)] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            requests = sorted(self._requests.items())
+            histograms = sorted(
+                (name, labels, list(h.counts), h.sum, h.count, h.buckets)
+                for (name, labels), h in self._histograms.items()
+            )
+
+        lines = [
+            "# HELP stadium_http_requests_total Requests by route, method and status",
+            "# TYPE stadium_http_requests_total counter",
+        ]
+        for (route, method, status), count in requests:
+            lines.append(f'stadium_http_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+
+        current = None
+        for name, (route, method), counts, total, count, buckets in histograms:
+            if name != current:
+                current = name
+                lines.append(f"# HELP {name} {HISTOGRAMS[name][0]}")
+                lines.append(f"# TYPE {name} histogram")
+            label = f'route="{route}",method="{method}"'
+            cumulative = 0
+            for bound, n in zip((*buckets, '+Inf'), counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{label}}} {total:.6f}")
+            lines.append(f"{name}_count{{{label}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# The QueryTimer of the request being handled; query-pool threads
+# (api/concurrency.py) count their queries into it too
+request_timer = ContextVar('request_timer', default=None)
+
+
+class QueryTimer:
+    """connection.execute_wrapper hook: counts and times SQL, keeping the text only when asked."""
+
+    def __init__(self, keep_sql):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = [] if keep_sql else None
+        self._lock = threading.Lock()  # shared with the request's query-pool threads
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.count += 1
+                self.seconds += elapsed
+                if self.statements is not None:
+                    self.statements.append((elapsed, sql))
+
+
+@contextmanager
+def time_queries(timer):
+    """Send this thread's queries on every database alias (primary, replica) through ``timer``."""
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(timer))
+        yield timer
+
+
+class RequestMetricsMiddleware:
+    """
+    Records wall time, query count, DB time, render time and response size
+    for every /api/ route (labelled by URL pattern, not the raw path).
+    Queries count on every database alias, including those a view runs on
+    the query pool.
+
+    Requests slower than SLOW_REQUEST_MS are logged to 'api.slow_requests'
+    with their slowest SQL statements; statement text is only kept while
+    that log is enabled.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED or not request.path.startswith('/api/'):
+            return self.get_response(request)
+
+        timer = QueryTimer(keep_sql=bool(settings.SLOW_REQUEST_MS))
+        token = request_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            with time_queries(timer):
+                response = self.get_response(request)
+        finally:
+            request_timer.reset(token)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = label_value(match.route.lstrip('^').rstrip('$')) if match else 'unmatched'
+        size = 0 if response.streaming else len(response.content)
+        registry.observe((route, request.method), response.status_code, {
+            'stadium_http_request_duration_seconds': elapsed,
+            'stadium_http_request_db_seconds': timer.seconds,
+            'stadium_http_request_serialize_seconds': getattr(request, '_render_seconds', 0.0),
+            'stadium_http_request_queries': timer.count,
+            'stadium_http_response_bytes': size,
+        })
+
+        if settings.SLOW_REQUEST_MS and elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+            slowest = sorted(timer.statements, reverse=True)[:10]
+            slow_logger.warning(
+                "Slow request %s %s: %.0fms, %s queries (%.0fms SQL)\n%s",
+                request.method, request.get_full_path(), elapsed * 1000, timer.count, timer.seconds * 1000,
+                "\n".join(f"  {seconds * 1000:.1f}ms {sql}" for seconds, sql in slowest),
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before DRF renders the body; the callback runs right after
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._render_seconds = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
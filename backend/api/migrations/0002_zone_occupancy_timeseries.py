@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZoneOccupancyReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('count', models.IntegerField()),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='api.crowdzone')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['zone', 'timestamp'], name='api_zoneocc_zone_id_e97922_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ZoneOccupancyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.IntegerField()),
+                ('bucket_start', models.DateTimeField()),
+                ('samples', models.IntegerField(default=0)),
+                ('total', models.BigIntegerField(default=0)),
+                ('min_value', models.IntegerField()),
+                ('max_value', models.IntegerField()),
+                ('last_value', models.IntegerField()),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='api.crowdzone')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('zone', 'resolution', 'bucket_start'), name='unique_zone_rollup_bucket')],
+            },
+        ),
+    ]
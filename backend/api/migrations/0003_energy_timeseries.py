@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_zone_occupancy_timeseries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnergyReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('usage_kw', models.FloatField()),
+                ('meter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='api.energymeter')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['meter', 'timestamp'], name='api_energyr_meter_i_7d2ef7_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EnergyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.IntegerField()),
+                ('bucket_start', models.DateTimeField()),
+                ('samples', models.IntegerField(default=0)),
+                ('total', models.FloatField(default=0.0)),
+                ('min_value', models.FloatField()),
+                ('max_value', models.FloatField()),
+                ('last_value', models.FloatField()),
+                ('meter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='api.energymeter')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resolution', 'bucket_start'], name='api_energyr_resolut_38fd17_idx')],
+                'constraints': [models.UniqueConstraint(fields=('meter', 'resolution', 'bucket_start'), name='unique_meter_rollup_bucket')],
+            },
+        ),
+    ]
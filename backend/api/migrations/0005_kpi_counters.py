@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:48
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def seed_counters(apps, schema_editor):
+    # Start from the current data; later writes keep the counters in step
+    Ticket = apps.get_model('api', 'Ticket')
+    CrowdZone = apps.get_model('api', 'CrowdZone')
+    KpiCounter = apps.get_model('api', 'KpiCounter')
+    tickets = Ticket.objects.aggregate(
+        tickets_sold=Count('id'),
+        fraud_alerts=Count('id', filter=Q(fraud_score__gt=0.8)),
+        tickets_validated=Count('id', filter=Q(is_validated=True)),
+    )
+    zones = CrowdZone.objects.aggregate(
+        crowd_zones=Count('id'),
+        critical_zones=Count('id', filter=Q(status='red')),
+        crowd_occupancy=Sum('current_count'),
+        crowd_capacity=Sum('capacity'),
+    )
+    KpiCounter.objects.bulk_create([
+        KpiCounter(name=name, shard=0, value=value or 0) for name, value in {**tickets, **zones}.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_table_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KpiCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('shard', models.SmallIntegerField(default=0)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('name', 'shard'), name='unique_kpi_counter_shard')],
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:03
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMinute
+
+
+def seed_buckets(apps, schema_editor):
+    # Entries scanned so far, without a gate; later scans add to the buckets
+    Ticket = apps.get_model('api', 'Ticket')
+    GateEntryBucket = apps.get_model('api', 'GateEntryBucket')
+    rows = (
+        Ticket.objects.filter(entry_time__isnull=False)
+        .values_list('event_id', TruncMinute('entry_time', tzinfo=datetime.timezone.utc))
+        .annotate(entries=Count('id')).order_by()
+    )
+    GateEntryBucket.objects.bulk_create(
+        [GateEntryBucket(event_id=event, minute=minute, entries=entries) for event, minute, entries in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_kpi_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GateEntryBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gate', models.CharField(blank=True, default='', max_length=50)),
+                ('minute', models.DateTimeField()),
+                ('entries', models.IntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entry_buckets', to='api.event')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('event', 'minute', 'gate'), name='unique_gate_entry_bucket')],
+            },
+        ),
+        migrations.RunPython(seed_buckets, migrations.RunPython.noop),
+    ]
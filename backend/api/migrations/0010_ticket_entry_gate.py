@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_ticket_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='entry_gate',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+    ]
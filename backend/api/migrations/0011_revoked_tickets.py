@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_ticket_entry_gate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket_code', models.CharField(max_length=50)),
+                ('revoked_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revoked_tickets', to='api.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event', 'revoked_at'], name='api_revoked_event_i_fc46c8_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,17 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.utils import timezone
 
+class CountedModel(models.Model):
+    # The save signals adjust the KPI counters (api/counters.py); run the
+    # save in a transaction so those adjustments commit with the row
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
 class Event(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -12,20 +23,42 @@ class Event(models.Model):
     def __str__(self):
         return self.name
 
-class Ticket(models.Model):
+class Ticket(CountedModel):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='tickets')
     customer_name = models.CharField(max_length=100)
     ticket_code = models.CharField(max_length=50, unique=True)
     is_validated = models.BooleanField(default=False)
     entry_time = models.DateTimeField(null=True, blank=True)
+    # Scanner that recorded entry_time, so corrections reach its entry-flow bucket
+    entry_gate = models.CharField(max_length=50, blank=True, default='', editable=False)
     fraud_score = models.FloatField(default=0.0)
     seat_number = models.CharField(max_length=20)
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Delta gate manifests (api/gate_manifest.py) send tickets changed since a
+    # time; bulk UPDATEs of validation or fraud state must set it too. Not
+    # auto_now, so fixtures without it still load.
+    updated_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        # Fraud scoring counts a new ticket's customer and seat at its event;
+        # the ticket index syncs by updated_at across events
+        indexes = [
+            models.Index(fields=['event', 'updated_at']),
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['event', 'customer_name']),
+            models.Index(fields=['event', 'seat_number']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.updated_at = timezone.now()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_at'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.ticket_code} - {self.customer_name}"
 
-class CrowdZone(models.Model):
+class CrowdZone(CountedModel):
     name = models.CharField(max_length=100)
     capacity = models.IntegerField()
     current_count = models.IntegerField(default=0)
@@ -63,3 +96,120 @@ class SystemLog(models.Model):
 
     def __str__(self):
         return f"{self.timestamp} - {self.module}: {self.message}"
+
+class ZoneOccupancyReading(models.Model):
+    # Append-only raw samples; charts read ZoneOccupancyRollup instead
+    zone = models.ForeignKey(CrowdZone, on_delete=models.CASCADE, related_name='readings')
+    timestamp = models.DateTimeField()
+    count = models.IntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['zone', 'timestamp'])]
+
+    def __str__(self):
+        return f"{self.zone_id} @ {self.timestamp}: {self.count}"
+
+class ZoneOccupancyRollup(models.Model):
+    zone = models.ForeignKey(CrowdZone, on_delete=models.CASCADE, related_name='rollups')
+    resolution = models.IntegerField() # bucket width in seconds: 60, 300, 3600
+    bucket_start = models.DateTimeField()
+    samples = models.IntegerField(default=0)
+    total = models.BigIntegerField(default=0)
+    min_value = models.IntegerField()
+    max_value = models.IntegerField()
+    last_value = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['zone', 'resolution', 'bucket_start'], name='unique_zone_rollup_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.zone_id} {self.resolution}s @ {self.bucket_start}"
+
+class EnergyReading(models.Model):
+    # Raw meter samples, only stored when ENERGY_STORE_RAW_READINGS is on
+    meter = models.ForeignKey(EnergyMeter, on_delete=models.CASCADE, related_name='readings')
+    timestamp = models.DateTimeField()
+    usage_kw = models.FloatField()
+
+    class Meta:
+        indexes = [models.Index(fields=['meter', 'timestamp'])]
+
+    def __str__(self):
+        return f"{self.meter_id} @ {self.timestamp}: {self.usage_kw} kW"
+
+class EnergyRollup(models.Model):
+    meter = models.ForeignKey(EnergyMeter, on_delete=models.CASCADE, related_name='rollups')
+    resolution = models.IntegerField() # bucket width in seconds: 60, 300, 3600
+    bucket_start = models.DateTimeField()
+    samples = models.IntegerField(default=0)
+    total = models.FloatField(default=0.0)
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+    last_value = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['meter', 'resolution', 'bucket_start'], name='unique_meter_rollup_bucket'),
+        ]
+        indexes = [models.Index(fields=['resolution', 'bucket_start'])]
+
+    def __str__(self):
+        return f"{self.meter_id} {self.resolution}s @ {self.bucket_start}"
+
+class TableVersion(models.Model):
+    # Bumped on every write to a tracked model; drives the ETags
+    model = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.model} v{self.version}"
+
+class KpiCounter(models.Model):
+    # Running dashboard totals (api/counters.py); a counter's value is the
+    # sum of its shards, which spread concurrent increments over rows
+    name = models.CharField(max_length=50)
+    shard = models.SmallIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'shard'], name='unique_kpi_counter_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}[{self.shard}] = {self.value}"
+
+class GateEntryBucket(models.Model):
+    # Scans per event, gate and minute (api/entry_flow.py), kept up to date
+    # by validation; gate is '' for entries not recorded by a scanner
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='entry_buckets')
+    gate = models.CharField(max_length=50, blank=True, default='')
+    minute = models.DateTimeField()
+    entries = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'minute', 'gate'], name='unique_gate_entry_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id}/{self.gate or '-'} @ {self.minute}: {self.entries}"
+
+class RevokedTicket(models.Model):
+    # A ticket code that left its event (deleted, moved to another event,
+    # code changed); delta gate manifests (api/gate_manifest.py) tell the
+    # gates to drop it
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='revoked_tickets')
+    ticket_code = models.CharField(max_length=50)
+    revoked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'revoked_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id}/{self.ticket_code} revoked @ {self.revoked_at}"
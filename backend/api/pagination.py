@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key, newest first.
+
+    Each page is one ``WHERE id < cursor ORDER BY id DESC LIMIT n`` query on
+    the primary key index, so cost and response size stay flat however
+    deep the client pages or however large the table grows.
+    """
+    ordering = '-id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
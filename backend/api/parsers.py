@@ -0,0 +1,53 @@
+import codecs
+import csv
+import json
+
+from rest_framework.parsers import BaseParser
+
+
+class CSVStreamParser(BaseParser):
+    """
+    Parses text/csv lazily: ``request.data`` is a csv.DictReader over the
+    request stream, so large uploads are consumed row by row.
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding') or 'utf-8'
+        return csv.DictReader(codecs.iterdecode(stream or [], encoding))
+
+
+class NDJSONItems(list):
+    """Parsed NDJSON lines; ``errors`` holds (line number, message) for each malformed one."""
+
+    def __init__(self):
+        super().__init__()
+        self.errors = []
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON into a list with one item per line.
+
+    Every line is decoded on its own, so a malformed line (say two objects
+    separated by a comma) can't pass for several records. Malformed lines
+    become None and are listed in the result's ``errors`` by line number.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding') or 'utf-8'
+        decode = _decoder.decode
+        items = NDJSONItems()
+        for number, line in enumerate((stream.read() if stream else b'').splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(decode(line.decode(encoding)))
+            except ValueError as e:  # includes UnicodeDecodeError
+                items.append(None)
+                items.errors.append((number, str(e)))
+        return items
+
+
+_decoder = json.JSONDecoder()
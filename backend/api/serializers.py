@@ -1,12 +1,25 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from .models import *
 
+class SparseFieldsMixin:
+    # ?fields=id,ticket_code trims the payload to the listed fields on reads;
+    # writes always validate and save every field
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        fields = request.query_params.get('fields') if request and request.method in SAFE_METHODS else None
+        if fields:
+            wanted = {f.strip() for f in fields.split(',')}
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
 class EventSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
         fields = '__all__'
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = '__all__'
@@ -26,7 +39,7 @@ class MerchandiseItemSerializer(serializers.ModelSerializer):
         model = MerchandiseItem
         fields = '__all__'
 
-class SystemLogSerializer(serializers.ModelSerializer):
+class SystemLogSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = SystemLog
         fields = '__all__'
@@ -0,0 +1,141 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import counters, entry_flow, gate_manifest
+from .models import CrowdZone, EnergyMeter, Event, MerchandiseItem, SystemLog, Ticket
+from .crowd_engine import crowd_engine
+from .live import live_publisher
+from .snapshots import dashboard_snapshot
+from .ticket_index import ticket_index
+from .timeseries import record_energy_readings, record_zone_readings
+from .versions import bump
+
+TRACKED_MODELS = (Event, Ticket, CrowdZone, EnergyMeter, MerchandiseItem, SystemLog)
+
+
+def notify_change(model):
+    """Propagate a write on ``model``; bulk code paths that bypass signals call this directly."""
+    bump(model)
+    dashboard_snapshot.invalidate(model)
+    live_publisher.mark_dirty(model)
+    if model is CrowdZone:
+        crowd_engine.invalidate()
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def model_changed(sender, **kwargs):
+    if sender in TRACKED_MODELS:
+        notify_change(sender)
+
+
+# KPI counters: the pre_save handlers remember the row as stored, the
+# post_save/post_delete ones apply the difference in the same transaction
+# (see CountedModel). Bulk paths adjust the counters themselves.
+COUNTED_FIELDS = {
+    Ticket: (counters.TICKET_FIELDS, counters.ticket_totals),
+    CrowdZone: (counters.ZONE_FIELDS, counters.zone_totals),
+}
+
+
+@receiver(pre_save, sender=Ticket)
+@receiver(pre_save, sender=CrowdZone)
+def counted_before_save(sender, instance, update_fields=None, using=None, **kwargs):
+    fields, _ = COUNTED_FIELDS[sender]
+    instance._counted_before = None
+    if update_fields is not None and not set(fields) & set(update_fields):
+        instance._counted_before = ()  # counters unaffected
+    elif instance.pk is not None:
+        # Locked until CountedModel.save commits, so a concurrent save of the
+        # same row waits and then counts from this one's result
+        instance._counted_before = (
+            sender.objects.using(using).select_for_update().filter(pk=instance.pk).values_list(*fields).first()
+        )
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_save, sender=CrowdZone)
+def counted_saved(sender, instance, created, **kwargs):
+    fields, totals = COUNTED_FIELDS[sender]
+    before = getattr(instance, '_counted_before', None)
+    if before == ():
+        return
+    after = totals([tuple(getattr(instance, f) for f in fields)])
+    counters.add(counters.difference(after, totals([before] if before else [])))
+
+
+@receiver(post_delete, sender=Ticket)
+@receiver(post_delete, sender=CrowdZone)
+def counted_deleted(sender, instance, origin=None, **kwargs):
+    if sender is Ticket and _deleted_with_event(origin):
+        return  # counted once by event_deleted
+    fields, totals = COUNTED_FIELDS[sender]
+    counters.add(counters.difference({}, totals([tuple(getattr(instance, f) for f in fields)])))
+
+
+def _deleted_with_event(origin):
+    return isinstance(origin, Event) or (isinstance(origin, QuerySet) and origin.model is Event)
+
+
+@receiver(pre_delete, sender=Event)
+def event_deleted(sender, instance, **kwargs):
+    # One aggregate for the whole cascade instead of an UPDATE per ticket
+    counters.add(counters.difference({}, counters.count_tickets(instance.tickets.all())))
+
+
+# Entry flow: scans come through validation; an entry time changed or
+# cleared with save() (admin, API) is corrected at the ticket's entry_gate.
+# Deletes keep the arrival. Gate manifests: a ticket deleted, moved to
+# another event or given a new code is revoked at its old event.
+STORED_FIELDS = ('event_id', 'entry_time', 'entry_gate', 'ticket_code')
+
+
+@receiver(pre_save, sender=Ticket)
+def ticket_before_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    instance._stored = None
+    if raw or (update_fields is not None and not {'event', *STORED_FIELDS} & set(update_fields)):
+        instance._stored = ()
+    elif instance.pk is not None:
+        instance._stored = sender.objects.filter(pk=instance.pk).values_list(*STORED_FIELDS).first()
+
+
+@receiver(post_save, sender=Ticket)
+def entry_saved(sender, instance, **kwargs):
+    before = getattr(instance, '_stored', None)
+    if before == () or (before and before[:3] == (instance.event_id, instance.entry_time, instance.entry_gate)):
+        return
+    # Taken back at the gate that booked it
+    if before and before[1] is not None:
+        entry_flow.record({before[0]: -1}, before[2], when=before[1])
+    if instance.entry_time is not None:
+        entry_flow.record({instance.event_id: 1}, instance.entry_gate, when=instance.entry_time)
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, **kwargs):
+    ticket_index.add(instance.ticket_code)
+    before = getattr(instance, '_stored', None)
+    if before and (before[0], before[3]) != (instance.event_id, instance.ticket_code):
+        gate_manifest.revoke(before[0], [before[3]])
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_event(origin):
+        gate_manifest.revoke(instance.event_id, [instance.ticket_code])
+
+
+@receiver(post_save, sender=CrowdZone)
+def crowd_zone_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return  # fixture loading
+    record_zone_readings([(instance.pk, instance.last_updated, instance.current_count)])
+    crowd_engine.record([instance.pk], [instance.current_count])
+
+
+@receiver(post_save, sender=EnergyMeter)
+def energy_meter_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    record_energy_readings([(instance.pk, instance.last_reading_time, instance.current_usage_kw)])
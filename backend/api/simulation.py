@@ -0,0 +1,105 @@
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import anomaly, counters
+from .crowd_engine import crowd_engine
+from .models import CrowdZone, EnergyMeter
+from .signals import notify_change
+from .timeseries import record_energy_readings, record_zone_readings
+
+logger = logging.getLogger(__name__)
+
+
+class TickEngine:
+    """
+    Advances crowd zone counts and energy meter readings on a fixed cadence.
+
+    Each tick reads the live rows once and writes them back with one
+    bulk_update per model, so write volume depends on the tick interval
+    and not on how many clients are reading the dashboard. The rows stay
+    locked from read to write, so ingested readings flushed meanwhile
+    (api/ingest.py) wait for the tick and are not lost.
+    """
+
+    def __init__(self, interval=None, zone_limit=None, rng=None):
+        self.interval = interval if interval is not None else settings.SIMULATION_TICK_INTERVAL
+        self.zone_limit = zone_limit
+        self.rng = rng or random.Random()
+        self.ticks = 0
+        self.busy_seconds = 0.0
+        self._stop = threading.Event()
+
+    def tick(self):
+        now = timezone.now()
+        # Read-modify-write under the row locks the ingest flush writes with
+        # (same id order), so a flush is never overwritten with stale counts
+        with transaction.atomic():
+            zones = CrowdZone.objects.select_for_update().order_by('id').only('id', 'capacity', 'current_count', 'status')
+            if self.zone_limit:
+                zones = zones[:self.zone_limit]
+            zones = list(zones)
+            for zone in zones:
+                change = self.rng.randint(-5, 5)
+                zone.current_count = max(0, min(zone.capacity, zone.current_count + change))
+                zone.last_updated = now
+
+            meters = list(EnergyMeter.objects.select_for_update().order_by('id').only('id', 'current_usage_kw', 'status'))
+            for meter in meters:
+                meter.current_usage_kw = round(max(50, meter.current_usage_kw + self.rng.uniform(-2, 2)), 1)
+                meter.last_reading_time = now
+
+            # Statuses follow the anomaly detectors (api/anomaly.py)
+            zone_alerts = anomaly.scan_zones(zones)
+            meter_alerts = anomaly.scan_meters(meters)
+            counters.bulk_update_zones(zones, ['current_count', 'status', 'last_updated'])
+            EnergyMeter.objects.bulk_update(meters, ['current_usage_kw', 'last_reading_time', 'status'],
+                                            batch_size=500)
+        anomaly.log_alerts(zone_alerts, meter_alerts)
+
+        record_zone_readings([(z.id, now, z.current_count) for z in zones])
+        record_energy_readings([(m.id, now, m.current_usage_kw) for m in meters])
+        crowd_engine.record([z.id for z in zones], [z.current_count for z in zones])
+        notify_change(CrowdZone)
+        notify_change(EnergyMeter)
+        self.ticks += 1
+        return len(zones), len(meters)
+
+    def run(self, max_ticks=None):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            close_old_connections()
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Simulation tick failed")
+            self.busy_seconds += time.monotonic() - started
+            if max_ticks is not None and self.ticks >= max_ticks:
+                break
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def stop(self):
+        self._stop.set()
+
+    def start_background(self):
+        thread = threading.Thread(target=self.run, name='simulation-tick', daemon=True)
+        thread.start()
+        return thread
+
+
+def ensure_zones(count):
+    """Create synthetic zones until at least ``count`` exist (load testing)."""
+    existing = CrowdZone.objects.count()
+    missing = count - existing
+    if missing > 0:
+        zones = [CrowdZone(name=f"Sim Section {i + 1}", capacity=500, current_count=250) for i in range(existing, count)]
+        with transaction.atomic():
+            CrowdZone.objects.bulk_create(zones, batch_size=1000)
+            counters.add(counters.zone_totals((z.capacity, z.current_count, z.status) for z in zones))
+        notify_change(CrowdZone)
+    return max(missing, 0)
@@ -0,0 +1,211 @@
+import asyncio
+import datetime
+import threading
+import time
+
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import concurrency, counters
+from .models import CrowdZone, EnergyMeter, Event, MerchandiseItem, SystemLog, Ticket
+from .serializers import MerchandiseItemSerializer
+from .versions import current
+
+
+# Section builders: each one owns a slice of the dashboard payload and
+# only queries the tables it depends on.
+def build_events():
+    return {"active_events": Event.objects.filter(status='active').count()}
+
+
+def build_ticketing():
+    # Running counters (api/counters.py): constant time however many tickets exist
+    values = counters.read(counters.TICKET_COUNTERS)
+    return {"ticketing": {
+        "total_sold": values[counters.TICKETS_SOLD],
+        "fraud_alerts": values[counters.FRAUD_ALERTS],
+    }}
+
+
+def build_crowd():
+    values = counters.read(counters.ZONE_COUNTERS)
+    total_occupancy = values[counters.OCCUPANCY]
+    total_capacity = values[counters.CAPACITY] or 1
+    return {
+        "occupancy_percentage": int((total_occupancy / total_capacity) * 100),
+        "crowd": {
+            "critical_zones": values[counters.CRITICAL_ZONES],
+            "total_zones": values[counters.ZONES],
+        },
+    }
+
+
+def build_energy():
+    total_energy = EnergyMeter.objects.aggregate(Sum('current_usage_kw'))['current_usage_kw__sum'] or 0
+    return {"energy": {"total_usage": round(total_energy, 1)}}
+
+
+def build_merchandise():
+    merch_stats = MerchandiseItem.objects.aggregate(
+        revenue=Sum(F('price') * F('sold_count')),
+        total_items=Sum('stock_quantity')
+    )
+    return {
+        "merchandise": {
+            "total_revenue": round(merch_stats['revenue'] or 0, 2),
+            "total_items": merch_stats['total_items'] or 0,
+            "breakdown": MerchandiseItemSerializer(MerchandiseItem.objects.all()[:4], many=True).data
+        }
+    }
+
+
+def build_activity():
+    serialized_logs = [
+        {
+            "id": log.id,
+            "user": "System",
+            "action": log.module,
+            "detail": log.message,
+            "time": log.timestamp.strftime("%H:%M"),
+            "level": log.level
+        }
+        for log in SystemLog.objects.order_by('-timestamp')[:10]
+    ]
+    return {"activity": serialized_logs[:5], "alerts": serialized_logs[5:10]}
+
+
+SECTIONS = {
+    'events': build_events,
+    'ticketing': build_ticketing,
+    'crowd': build_crowd,
+    'energy': build_energy,
+    'merchandise': build_merchandise,
+    'activity': build_activity,
+}
+
+# Which sections have to be rebuilt when a model changes
+MODEL_SECTIONS = {
+    Event: ('events',),
+    Ticket: ('ticketing',),
+    CrowdZone: ('crowd',),
+    EnergyMeter: ('energy',),
+    MerchandiseItem: ('merchandise',),
+    SystemLog: ('activity',),
+}
+
+
+# Table versions (api/versions.py) each section is built from
+SECTION_LABELS = {
+    name: sorted(model._meta.label_lower for model, names in MODEL_SECTIONS.items() if name in names)
+    for name in SECTIONS
+}
+
+
+class DashboardSnapshot:
+    """
+    Materialized /api/dashboard-data payload.
+
+    Each section is stored with the table versions it was built from and
+    rebuilt once they move on, so a write made by any worker process is
+    picked up by the next read; local writes also mark sections dirty.
+    The next read rebuilds the stale sections once, no matter how many
+    consoles are polling. Readers that find a rebuild in progress serve
+    the current sections, together with the versions they were built
+    from, so their ETag never claims newer data than the body holds.
+    """
+
+    def __init__(self):
+        self._sections = {}  # name -> (payload, built at, versions)
+        self._dirty = set(SECTIONS)
+        self._lock = threading.Lock()
+
+    def invalidate(self, model=None):
+        if model is None:
+            self._dirty.update(SECTIONS)
+        else:
+            self._dirty.update(MODEL_SECTIONS.get(model, ()))
+
+    def _stale(self, versions):
+        stale = set(self._dirty)
+        for name, labels in SECTION_LABELS.items():
+            built = self._sections.get(name)
+            # Built by a reader that saw newer versions is still good
+            if built is None or any(built[2][label] < versions[label] for label in labels):
+                stale.add(name)
+        return stale
+
+    def _store(self, name, section, versions):
+        self._sections[name] = (section, time.monotonic(), {label: versions[label] for label in SECTION_LABELS[name]})
+
+    def refresh(self, versions, force=False):
+        stale = set(SECTIONS) if force else self._stale(versions)
+        if not stale:
+            return
+        # A single reader rebuilds; everybody else keeps serving the
+        # current document unless there is nothing to serve yet.
+        blocking = len(self._sections) < len(SECTIONS)
+        if not self._lock.acquire(blocking=blocking):
+            return
+        try:
+            for name in stale:
+                self._dirty.discard(name)
+                self._store(name, SECTIONS[name](), versions)
+        finally:
+            self._lock.release()
+
+    async def arefresh(self, versions, force=False):
+        """Like refresh(), but the stale sections are built concurrently."""
+        stale = set(SECTIONS) if force else self._stale(versions)
+        if not stale:
+            return
+        if not self._lock.acquire(blocking=False):
+            if len(self._sections) == len(SECTIONS):
+                return
+            # Wait for the first build without blocking the event loop
+            await asyncio.to_thread(self._lock.acquire)
+        try:
+            names = sorted(stale)
+            self._dirty.difference_update(names)
+            sections = await concurrency.gather(*(SECTIONS[name] for name in names))
+            for name, section in zip(names, sections):
+                self._store(name, section, versions)
+        finally:
+            self._lock.release()
+
+    def _document(self, versions):
+        """The document and the versions its sections were built from."""
+        document, built_from, built_at = {}, {}, []
+        for name in SECTIONS:
+            section, at, section_versions = self._sections[name]
+            document.update(section)
+            built_from.update(section_versions)
+            built_at.append(at)
+
+        age = time.monotonic() - min(built_at)
+        document["snapshot"] = {
+            "generated_at": (timezone.now() - datetime.timedelta(seconds=age)).isoformat(),
+            "age_seconds": round(age, 3),
+            "stale_sections": sorted(self._stale(versions)),
+        }
+        return document, built_from
+
+    def serve(self, versions=None):
+        """(document, versions it was built from) given current() ``versions`` of MODEL_SECTIONS."""
+        if versions is None:
+            versions = current(MODEL_SECTIONS)
+        self.refresh(versions)
+        return self._document(versions)
+
+    async def aserve(self, versions):
+        await self.arefresh(versions)
+        return self._document(versions)
+
+    def get(self):
+        return self.serve()[0]
+
+    async def aget(self):
+        [versions] = await concurrency.gather(lambda: current(MODEL_SECTIONS))
+        return (await self.aserve(versions))[0]
+
+
+dashboard_snapshot = DashboardSnapshot()
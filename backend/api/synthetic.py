@@ -0,0 +1,228 @@
+import datetime
+import math
+import random
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import counters, entry_flow
+from .anomaly import zone_status
+from .bulk_load import BulkWriter, RollupAccumulator, refresh_after_load
+from .models import (
+    CrowdZone, EnergyMeter, EnergyReading, EnergyRollup, Event, SystemLog, Ticket, ZoneOccupancyReading,
+    ZoneOccupancyRollup,
+)
+
+EVENT_NAMES = (
+    "Championship Final", "League Derby", "World Cup Qualifier", "Rock Fest", "Cup Semi-Final",
+    "Season Opener", "Charity Match", "Summer Concert", "Legends Game", "Playoff Decider",
+)
+FIRST_NAMES = ("Aarav", "Maya", "Liam", "Zara", "Noah", "Ivy", "Omar", "Lena", "Ravi", "Sofia", "Kai", "Ana")
+LAST_NAMES = ("Patel", "Smith", "Khan", "Garcia", "Chen", "Nowak", "Silva", "Okafor", "Müller", "Sato")
+STANDS = ("North Stand", "South Stand", "East Stand", "West Stand")
+ZONE_KINDS = ("Section", "Concourse", "Gate", "Food Court", "VIP Box")
+METER_KINDS = ("Lighting", "HVAC", "Scoreboard", "Kitchen", "Pumps", "Escalators", "Floodlights")
+METER_LOCATIONS = STANDS + ("Roof", "Basement", "Parking", "Concourse")
+PRICE_TIERS = (Decimal('35.00'), Decimal('60.00'), Decimal('95.00'), Decimal('150.00'), Decimal('400.00'))
+LOG_MODULES = ("Ticketing", "Crowd", "Energy", "Security", "Merchandise", "System")
+LOG_LEVELS = (("INFO", 85), ("WARNING", 12), ("ERROR", 3))
+LOG_MESSAGES = {
+    "INFO": ("Routine check completed", "Gate throughput nominal", "Batch processed", "Sensor heartbeat"),
+    "WARNING": ("Zone nearing capacity", "Meter reading above baseline", "Scanner retrying", "Slow response"),
+    "ERROR": ("Sensor offline", "Payment gateway timeout", "Meter reading rejected", "Scanner fault"),
+}
+
+
+def attendance_curve(phase):
+    """Share of capacity in use at ``phase`` (0..1) of the window: gates open, match, exit."""
+    return 0.05 + 0.85 * math.exp(-((phase - 0.7) / 0.12) ** 2)
+
+
+class DatasetGenerator:
+    """
+    Event-scale synthetic data, written with BulkWriter (COPY on
+    PostgreSQL) in batches of ``batch_size`` rows.
+
+    Small tables (events, zones, meters) are created with bulk_create so
+    their ids are known; tickets, readings, rollups and logs are produced
+    lazily and streamed, so memory stays flat however many rows are asked
+    for. Readings cover ``hours`` up to now at ``interval`` seconds, and
+    the rollups are folded from them on the way in.
+    """
+
+    def __init__(self, seed=None, batch_size=10000, now=None, progress=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.now = now or timezone.now()
+        self.progress = progress or (lambda label, count: None)
+        self.prefix = f"GEN-{uuid.uuid4().hex[:8]}-"
+
+    def writer(self, model, fields):
+        return BulkWriter(model, fields, batch_size=self.batch_size)
+
+    # -- small tables -----------------------------------------------------
+    def events(self, count, tickets):
+        events = []
+        for i in range(count):
+            # One live event, the rest spread over the past and coming weeks
+            offset = (i - count // 2) * 7
+            start = self.now + datetime.timedelta(days=offset, hours=-1 if offset == 0 else 0)
+            status = 'active' if offset == 0 else ('finished' if offset < 0 else 'upcoming')
+            events.append(Event(
+                name=f"{EVENT_NAMES[i % len(EVENT_NAMES)]} {self.now.year}",
+                description="Synthetic dataset",
+                start_time=start, end_time=start + datetime.timedelta(hours=3),
+                status=status, expected_attendance=tickets // max(count, 1),
+            ))
+        return Event.objects.bulk_create(events)
+
+    def zones(self, count):
+        zones = []
+        for i in range(count):
+            kind = ZONE_KINDS[i % len(ZONE_KINDS)]
+            capacity = {"Gate": 400, "VIP Box": 80, "Food Court": 600}.get(kind, self.rng.randrange(800, 3000, 50))
+            zones.append(CrowdZone(name=f"{STANDS[i % len(STANDS)]} {kind} {i + 1}", capacity=capacity))
+        return CrowdZone.objects.bulk_create(zones)
+
+    def meters(self, count):
+        meters = []
+        for i in range(count):
+            kind = METER_KINDS[i % len(METER_KINDS)]
+            meters.append(EnergyMeter(name=f"{kind} {i + 1}", location=METER_LOCATIONS[i % len(METER_LOCATIONS)]))
+        return EnergyMeter.objects.bulk_create(meters)
+
+    # -- streamed tables --------------------------------------------------
+    def tickets(self, events, count, fraud_rate=0.02):
+        fields = ('event', 'customer_name', 'ticket_code', 'is_validated', 'entry_time', 'entry_gate',
+                  'fraud_score', 'seat_number', 'price', 'updated_at')
+        rng = self.rng
+        with self.writer(Ticket, fields) as writer:
+            for i in range(count):
+                event = events[i % len(events)]
+                seat = i // len(events)  # unique within the event
+                # Fans of live and past events have mostly been scanned in
+                scanned = event.status != 'upcoming' and rng.random() < 0.85
+                entry = event.start_time - datetime.timedelta(minutes=rng.uniform(0, 120)) if scanned else None
+                fraud = round(rng.uniform(0.81, 0.99), 2) if rng.random() < fraud_rate else round(rng.uniform(0, 0.2), 2)
+                writer.add((
+                    event.id,
+                    f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    f"{self.prefix}{i}",
+                    scanned and fraud <= counters.FRAUD_THRESHOLD,
+                    entry,
+                    '',
+                    fraud,
+                    f"{STANDS[seat % 4][0]}{seat // 4 % 40 + 1}-{seat // 160 + 1}",
+                    rng.choice(PRICE_TIERS),
+                    self.now,
+                ))
+        return writer.written
+
+    def _timeline(self, hours, interval):
+        end = int(self.now.timestamp())
+        start = end - int(hours * 3600)
+        start -= start % interval
+        steps = (end - start) // interval
+        for step in range(steps + 1):
+            yield step / max(steps, 1), start + step * interval
+
+    def zone_readings(self, zones, hours, interval):
+        """Occupancy readings for every zone; zone counts end at their last reading."""
+        rng = self.rng
+        factors = [rng.uniform(0.6, 1.1) for _ in zones]
+        last = {}
+        with self.writer(ZoneOccupancyReading, ('zone', 'timestamp', 'count')) as raw, \
+                self.writer(ZoneOccupancyRollup, ('zone', 'resolution', 'bucket_start', 'samples', 'total',
+                                                  'min_value', 'max_value', 'last_value')) as rollups:
+            accumulator = RollupAccumulator(rollups)
+            for phase, epoch in self._timeline(hours, interval):
+                ts = datetime.datetime.fromtimestamp(epoch, tz=datetime.timezone.utc)
+                share = attendance_curve(phase)
+                for zone, factor in zip(zones, factors):
+                    count = max(0, min(zone.capacity, int(zone.capacity * share * factor + rng.gauss(0, 5))))
+                    raw.add((zone.id, ts, count))
+                    accumulator.add(zone.id, epoch, count)
+                    last[zone.id] = (ts, count)
+            accumulator.finish()
+
+        for zone in zones:
+            zone.last_updated, zone.current_count = last[zone.id]
+            zone.status = zone_status(zone.current_count, zone.capacity)
+        CrowdZone.objects.bulk_update(zones, ['current_count', 'status', 'last_updated'], batch_size=1000)
+        return raw.written, rollups.written
+
+    def energy_readings(self, meters, hours, interval, keep_raw=None):
+        """Meter readings folded into the rollups; raw rows only if ENERGY_STORE_RAW_READINGS."""
+        keep_raw = settings.ENERGY_STORE_RAW_READINGS if keep_raw is None else keep_raw
+        rng = self.rng
+        baselines = [rng.uniform(20, 450) for _ in meters]
+        last = {}
+        with self.writer(EnergyReading, ('meter', 'timestamp', 'usage_kw')) as raw, \
+                self.writer(EnergyRollup, ('meter', 'resolution', 'bucket_start', 'samples', 'total',
+                                           'min_value', 'max_value', 'last_value')) as rollups:
+            accumulator = RollupAccumulator(rollups)
+            for phase, epoch in self._timeline(hours, interval):
+                ts = datetime.datetime.fromtimestamp(epoch, tz=datetime.timezone.utc)
+                load = 0.4 + 0.6 * attendance_curve(phase)
+                for meter, baseline in zip(meters, baselines):
+                    kw = round(max(5.0, baseline * load + rng.gauss(0, baseline * 0.03)), 1)
+                    if keep_raw:
+                        raw.add((meter.id, ts, kw))
+                    accumulator.add(meter.id, epoch, kw)
+                    last[meter.id] = (ts, kw)
+            accumulator.finish()
+
+        for meter in meters:
+            meter.last_reading_time, meter.current_usage_kw = last[meter.id]
+        EnergyMeter.objects.bulk_update(meters, ['current_usage_kw', 'last_reading_time'], batch_size=1000)
+        return raw.written, rollups.written
+
+    def logs(self, count, hours):
+        rng = self.rng
+        levels = [level for level, _ in LOG_LEVELS]
+        weights = [weight for _, weight in LOG_LEVELS]
+        span = hours * 3600
+        start = self.now - datetime.timedelta(seconds=span)
+        with self.writer(SystemLog, ('timestamp', 'module', 'level', 'message')) as writer:
+            for i in range(count):
+                # Evenly spaced, oldest first, like a real append-only log
+                level = rng.choices(levels, weights)[0]
+                writer.add((
+                    start + datetime.timedelta(seconds=span * i / max(count, 1)),
+                    rng.choice(LOG_MODULES),
+                    level,
+                    rng.choice(LOG_MESSAGES[level]),
+                ))
+        return writer.written
+
+    def generate(self, events=5, tickets=250000, zones=500, meters=1000, logs=1000000, hours=24, interval=60):
+        """Create a full dataset; returns rows written per table."""
+        written = {}
+        event_rows = self.events(events, tickets) if events else []
+        written['events'] = len(event_rows)
+        if event_rows and tickets:
+            written['tickets'] = self.tickets(event_rows, tickets)
+            written['entry_buckets'] = entry_flow.rebuild([event.id for event in event_rows])
+            self.progress("tickets", written['tickets'])
+
+        zone_rows = self.zones(zones) if zones else []
+        written['zones'] = len(zone_rows)
+        if zone_rows:
+            written['zone_readings'], written['zone_rollups'] = self.zone_readings(zone_rows, hours, interval)
+            self.progress("zone readings", written['zone_readings'])
+
+        meter_rows = self.meters(meters) if meters else []
+        written['meters'] = len(meter_rows)
+        if meter_rows:
+            written['energy_readings'], written['energy_rollups'] = self.energy_readings(meter_rows, hours, interval)
+            self.progress("energy rollups", written['energy_rollups'])
+
+        if logs:
+            written['logs'] = self.logs(logs, hours)
+            self.progress("logs", written['logs'])
+
+        refresh_after_load()
+        return written
+
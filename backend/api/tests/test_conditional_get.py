@@ -0,0 +1,84 @@
+import json
+import time
+
+from django.db.models import F
+from django.test import RequestFactory, TransactionTestCase
+from django.utils import timezone
+from django.utils.http import http_date
+
+from api.crowd_engine import crowd_engine
+from api.models import CrowdZone, MerchandiseItem, TableVersion
+from api.snapshots import dashboard_snapshot
+from api.views import DashboardDataView
+
+
+def change_elsewhere(model, **values):
+    """Update every row and bump the table version, as another worker would: no signals reach this process."""
+    model.objects.update(**values)
+    TableVersion.objects.filter(model=model._meta.label_lower).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+
+
+class CachedBodyMatchesETagTests(TransactionTestCase):
+    def setUp(self):
+        # Versions restart with the database; start every test from empty caches
+        dashboard_snapshot.invalidate()
+        crowd_engine.invalidate()
+        MerchandiseItem.objects.create(name="Scarf", category="Apparel", price=10, stock_quantity=5, sold_count=1)
+
+    def check_dashboard(self, get):
+        first = get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(json.loads(first.content)['merchandise']['total_revenue'], 10)
+
+        change_elsewhere(MerchandiseItem, sold_count=3)
+        second = get()
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(json.loads(second.content)['merchandise']['total_revenue'], 30)
+        self.assertEqual(get(HTTP_IF_NONE_MATCH=second['ETag']).status_code, 304)
+        self.assertEqual(get(HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    def test_dashboard_async_view(self):
+        self.check_dashboard(lambda **headers: self.client.get('/api/dashboard-data', **headers))
+
+    def test_dashboard_drf_view(self):
+        view = DashboardDataView.as_view()
+
+        def get(**headers):
+            response = view(RequestFactory().get('/api/dashboard-data', **headers))
+            return response.render() if hasattr(response, 'render') else response
+        self.check_dashboard(get)
+
+    def test_served_etag_follows_sections_served(self):
+        versions = dashboard_snapshot.serve()[1]
+        change_elsewhere(MerchandiseItem, sold_count=3)
+        # A reader that can't rebuild (another one holds the lock) serves the old sections
+        with dashboard_snapshot._lock:
+            document, built_from = dashboard_snapshot.serve()
+        self.assertEqual(built_from, versions)
+        self.assertEqual(document['merchandise']['total_revenue'], 10)
+        self.assertEqual(document['snapshot']['stale_sections'], ['merchandise'])
+
+    def test_zone_listing(self):
+        CrowdZone.objects.create(name="North", capacity=100, current_count=10)
+        first = self.client.get('/api/crowd/')
+        change_elsewhere(CrowdZone, current_count=40)
+        second = self.client.get('/api/crowd/')
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.json()[0]['current_count'], 40)
+
+
+class ETagOnlyTests(TransactionTestCase):
+    def test_second_write_in_same_second_is_not_modified(self):
+        item = MerchandiseItem.objects.create(name="Scarf", category="Apparel", price=10, stock_quantity=5)
+        first = self.client.get('/api/merchandise/')
+        self.assertNotIn('Last-Modified', first)
+        item.stock_quantity = 4
+        item.save()
+        # A client that only sends If-Modified-Since never gets a 304
+        second = self.client.get('/api/merchandise/', HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 1))
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(json.loads(b''.join(second.streaming_content))[0]['stock_quantity'], 4)
+        self.assertEqual(self.client.get('/api/merchandise/', HTTP_IF_NONE_MATCH=second['ETag']).status_code, 304)
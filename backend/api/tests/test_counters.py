@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from api import counters
+from api.models import Event, KpiCounter, Ticket
+
+from .utils import run_in_threads
+
+
+class CounterShardTests(TransactionTestCase):
+    def test_concurrent_adds_spread_over_shards(self):
+        def add(i):
+            for _ in range(10):
+                with transaction.atomic():
+                    counters.add({counters.TICKETS_SOLD: 1})
+                    counters.add({counters.TICKETS_SOLD: 1})  # same shard within the transaction
+
+        run_in_threads(add, 4)
+        shards = KpiCounter.objects.filter(name=counters.TICKETS_SOLD).values_list('shard', flat=True)
+        self.assertGreater(len(set(shards)), 1)
+        self.assertEqual(counters.read()[counters.TICKETS_SOLD], 80)
+
+    def test_transaction_uses_one_shard(self):
+        with transaction.atomic():
+            shard = counters._shard()
+            self.assertTrue(all(counters._shard() == shard for _ in range(20)))
+
+    def test_reconcile_sums_shards(self):
+        now = timezone.now()
+        event = Event.objects.create(name="Final", start_time=now, end_time=now)
+
+        def issue(i):
+            for n in range(10):
+                Ticket.objects.create(event=event, customer_name="Fan", ticket_code=f"T-{i}-{n}",
+                                      seat_number=f"S{i}-{n}", price=50, fraud_score=0.9 if n == 0 else 0.1)
+
+        run_in_threads(issue, 4)
+        report = counters.reconcile()
+        self.assertEqual(report[counters.TICKETS_SOLD], (40, 40))
+        self.assertEqual(report[counters.FRAUD_ALERTS], (4, 4))
+        self.assertTrue(all(value == actual for value, actual in report.values()))
@@ -0,0 +1,85 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.utils import timezone
+
+from api.db_router import REPLICA_DB_ALIAS, STICKY_COOKIE, ReplicaRoutingMiddleware
+from api.models import Event, Ticket
+
+# Routing decisions only: no query reaches the replica alias
+with_replica = mock.patch.dict(settings.DATABASES, {REPLICA_DB_ALIAS: {**settings.DATABASES['default']}})
+
+
+@with_replica
+class ReplicaRoutingTests(SimpleTestCase):
+    def handle(self, method='get', cookies=None, write=False, status=200):
+        """Run a request through the middleware; returns (response, read aliases before/after writing)."""
+        seen = []
+
+        def view(request):
+            seen.append(router.db_for_read(Ticket))
+            if write:
+                router.db_for_write(Ticket)
+                seen.append(router.db_for_read(Ticket))
+            return HttpResponse(status=status)
+
+        request = getattr(RequestFactory(), method)('/api/tickets/')
+        request.COOKIES.update(cookies or {})
+        return ReplicaRoutingMiddleware(view)(request), seen
+
+    def test_safe_request_reads_replica(self):
+        response, seen = self.handle('get')
+        self.assertEqual(seen, [REPLICA_DB_ALIAS])
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_write_goes_to_primary_and_sets_cookie(self):
+        self.assertEqual(router.db_for_write(Ticket), 'default')
+        response, seen = self.handle('post', write=True)
+        self.assertEqual(seen, ['default', 'default'])
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+    def test_write_pins_rest_of_safe_request(self):
+        response, seen = self.handle('get', write=True)
+        self.assertEqual(seen, [REPLICA_DB_ALIAS, 'default'])
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+    def test_failed_request_without_write_sets_no_cookie(self):
+        response, _ = self.handle('post', status=400)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_sticky_cookie_reads_primary(self):
+        until = str(int(time.time()) + settings.DB_REPLICA_STICKY_SECONDS)
+        _, seen = self.handle('get', cookies={STICKY_COOKIE: until})
+        self.assertEqual(seen, ['default'])
+        _, seen = self.handle('get', cookies={STICKY_COOKIE: str(int(time.time()) - 1)})
+        self.assertEqual(seen, [REPLICA_DB_ALIAS])
+
+    def test_routing_resets_between_requests(self):
+        self.handle('get')
+        self.assertEqual(router.db_for_read(Ticket), 'default')
+
+        def failing(request):
+            raise RuntimeError
+        with self.assertRaises(RuntimeError):
+            ReplicaRoutingMiddleware(failing)(RequestFactory().get('/api/tickets/'))
+        self.assertEqual(router.db_for_read(Ticket), 'default')
+
+
+class StickyCookieTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.event = Event.objects.create(name="Final", start_time=now, end_time=now)
+
+    def test_cookie_only_after_a_write(self):
+        payload = {"event": self.event.id, "customer_name": "Ada", "ticket_code": "T-1", "seat_number": "N1-1"}
+        response = self.client.post('/api/tickets/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)  # no price
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+        response = self.client.post('/api/tickets/', {**payload, "price": "50.00"}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(STICKY_COOKIE, response.cookies)
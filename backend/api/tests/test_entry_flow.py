@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+
+from api import entry_flow
+from api.models import Event, GateEntryBucket, Ticket
+from api.validation import validate_codes
+
+
+class RecordTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.event = Event.objects.create(name="Final", start_time=now, end_time=now)
+        self.other = Event.objects.create(name="Cup", start_time=now, end_time=now)
+        self.when = now
+
+    def entries(self, event, gate='A'):
+        return GateEntryBucket.objects.filter(event=event, gate=gate).values_list('entries', flat=True).first()
+
+    def test_bucket_created_by_concurrent_scan(self):
+        update = QuerySet.update
+        minute = entry_flow.bucket_start(self.when, entry_flow.MINUTE)
+        raced = []
+
+        def racing_update(queryset, **kwargs):
+            updated = update(queryset, **kwargs)
+            if queryset.model is GateEntryBucket and not updated and not raced:
+                # Another scan of the same gate creates the minute's bucket right after our UPDATE missed
+                raced.append(GateEntryBucket.objects.create(event=self.event, gate='A', minute=minute, entries=1))
+            return updated
+
+        with mock.patch.object(QuerySet, 'update', racing_update):
+            entry_flow.record({self.event.id: 1}, 'A', self.when)
+        self.assertEqual(self.entries(self.event), 2)
+
+    def test_several_events_with_one_bucket_missing(self):
+        entry_flow.record({self.event.id: 1}, 'A', self.when)
+        entry_flow.record({self.event.id: 2, self.other.id: 3}, 'A', self.when)
+        self.assertEqual((self.entries(self.event), self.entries(self.other)), (3, 3))
+        entry_flow.record({self.event.id: -1, self.other.id: 1}, 'A', self.when)
+        self.assertEqual((self.entries(self.event), self.entries(self.other)), (2, 4))
+
+
+class EntryCorrectionTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.event = Event.objects.create(name="Final", start_time=now, end_time=now)
+        self.ticket = Ticket.objects.create(event=self.event, customer_name="Fan", ticket_code="T-1",
+                                            seat_number="N1-1", price=50)
+
+    def gates(self):
+        return {row['gate']: row['arrivals'] for row in entry_flow.summary(self.event)['gates']}
+
+    def test_cleared_entry_is_taken_back_at_its_gate(self):
+        validate_codes(["T-1"], gate='B')
+        self.assertEqual(self.gates(), {'B': 1})
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.entry_gate, 'B')
+
+        self.ticket.entry_time = None
+        self.ticket.save()
+        self.assertEqual(self.gates(), {'B': 0})
+
+    def test_moved_entry_stays_at_its_gate(self):
+        validate_codes(["T-1"], gate='B')
+        self.ticket.refresh_from_db()
+        self.ticket.entry_time -= timezone.timedelta(minutes=5)
+        self.ticket.save()
+        self.assertEqual(self.gates(), {'B': 1})
+        self.assertEqual(GateEntryBucket.objects.filter(gate='B', entries=1).count(), 1)
+
+    def test_rebuild_keeps_gates(self):
+        validate_codes(["T-1"], gate='B')
+        entry_flow.rebuild([self.event.id])
+        self.assertEqual(self.gates(), {'B': 1})
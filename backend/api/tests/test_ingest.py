@@ -0,0 +1,34 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.ingest import IngestBuffer
+
+
+class NDJSONIngestTests(SimpleTestCase):
+    def setUp(self):
+        # Buffered only: the flush thread never starts, so nothing reaches the database
+        for patcher in (mock.patch('api.views.ingest_buffer', IngestBuffer(capacity=100)),
+                        mock.patch.object(IngestBuffer, 'start')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post(self, body):
+        return self.client.post('/api/ingest', body, content_type='application/x-ndjson')
+
+    def test_comma_joined_line_is_rejected(self):
+        body = b'{"zone": 1, "count": 5}\n{"zone": 2, "count": 6}, {"zone": 3, "count": 7}\n\n{"meter": 1, "kw": 3.5}\n'
+        response = self.post(body)
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        self.assertEqual((data['accepted'], data['dropped']), (2, 1))
+        self.assertEqual([error['line'] for error in data['errors']], [2])
+
+    def test_array_split_over_lines_is_rejected(self):
+        data = self.post(b'[{"zone": 1, "count": 5},\n{"zone": 2, "count": 6}]\n').json()
+        self.assertEqual((data['accepted'], data['dropped']), (0, 2))
+        self.assertEqual([error['line'] for error in data['errors']], [1, 2])
+
+    def test_valid_lines_report_no_errors(self):
+        data = self.post(b'{"zone": 1, "count": 5}\r\n{"zone": 2, "count": 6}').json()
+        self.assertEqual(data, {"accepted": 2, "dropped": 0})
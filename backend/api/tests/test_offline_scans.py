@@ -0,0 +1,91 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from api import gate_manifest
+from api.gate_manifest import Manifest
+from api.models import Event, RevokedTicket, Ticket
+
+
+class OfflineScansTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.event = Event.objects.create(name="Final", start_time=now, end_time=now)
+        Ticket.objects.create(event=self.event, customer_name="Fan", ticket_code="T-1", seat_number="N1-1", price=50)
+        self.url = f'/api/gate-manifest/{self.event.id}/scans'
+
+    def upload(self, *scans):
+        return self.client.post(self.url, {"gate": "B", "scans": list(scans)}, content_type='application/json')
+
+    def test_rejects_malformed_ts(self):
+        for ts in ({"a": 1}, [1], True, None, "yesterday", float('inf')):
+            with self.subTest(ts=ts):
+                response = self.upload({"code": "T-1", "ts": ts})
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Ticket.objects.get(ticket_code="T-1").is_validated)
+
+    def test_accepts_epoch_and_iso_ts(self):
+        scanned_at = timezone.now().replace(microsecond=0) - timezone.timedelta(minutes=5)
+        response = self.upload({"code": "T-1", "ts": scanned_at.isoformat()},
+                               {"code": "T-1", "ts": scanned_at.timestamp() + 60})
+        self.assertEqual(response.status_code, 200)
+        first, second = response.json()['results']
+        self.assertTrue(first['valid'])
+        self.assertFalse(second['valid'])
+        self.assertEqual(Ticket.objects.get(ticket_code="T-1").entry_time, scanned_at)
+
+
+class ManifestRevocationTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.event = Event.objects.create(name="Final", start_time=now, end_time=now)
+        self.other = Event.objects.create(name="Cup", start_time=now, end_time=now)
+        for code in ("T-1", "T-2", "T-3"):
+            Ticket.objects.create(event=self.event, customer_name="Fan", ticket_code=code, seat_number=code, price=50)
+
+    def fetch(self, since=None):
+        url = f'/api/gate-manifest/{self.event.id}' + (f'?since={since}' if since else '')
+        manifest, _ = Manifest.parse(self.client.get(url).content, gate_manifest.signing_key())
+        return manifest
+
+    def test_delta_drops_deleted_and_moved_tickets(self):
+        gate = self.fetch()
+        Ticket.objects.get(ticket_code="T-1").delete()
+        moved = Ticket.objects.get(ticket_code="T-2")
+        moved.event = self.other
+        moved.save()
+
+        delta = self.fetch(since=gate.version)
+        self.assertEqual(len(delta.revoked), 2)
+        gate.apply(delta)
+        self.assertEqual([gate.lookup(code) for code in ("T-1", "T-2", "T-3")], [None, None, gate_manifest.VALID])
+        self.assertEqual(len(gate), 1)
+
+    def test_changed_code_is_revoked(self):
+        gate = self.fetch()
+        ticket = Ticket.objects.get(ticket_code="T-1")
+        ticket.ticket_code = "T-1B"
+        ticket.save()
+        gate.apply(self.fetch(since=gate.version))
+        self.assertIsNone(gate.lookup("T-1"))
+        self.assertEqual(gate.lookup("T-1B"), gate_manifest.VALID)
+
+    def test_ticket_moved_back_is_not_revoked(self):
+        gate = self.fetch()
+        ticket = Ticket.objects.get(ticket_code="T-1")
+        ticket.event = self.other
+        ticket.save()
+        ticket.event = self.event
+        ticket.save()
+        delta = self.fetch(since=gate.version)
+        self.assertEqual(len(delta.revoked), 0)
+        gate.apply(delta)
+        self.assertEqual(gate.lookup("T-1"), gate_manifest.VALID)
+
+    def test_full_manifest_has_no_revocations(self):
+        Ticket.objects.get(ticket_code="T-1").delete()
+        manifest = self.fetch()
+        self.assertEqual((len(manifest), len(manifest.revoked)), (2, 0))
+
+    def test_event_delete_records_nothing(self):
+        self.event.delete()
+        self.assertFalse(RevokedTicket.objects.exists())
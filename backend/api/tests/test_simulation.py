@@ -0,0 +1,64 @@
+import random
+from unittest import mock
+
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TransactionTestCase
+
+from api.ingest import IngestBuffer
+from api.models import CrowdZone, EnergyMeter
+from api.simulation import TickEngine
+
+
+class LockCheckingRandom(random.Random):
+    """Records whether each change is drawn inside the transaction that writes it."""
+
+    def __init__(self):
+        super().__init__(0)
+        self.in_transaction = []
+
+    def randint(self, a, b):
+        self.in_transaction.append(connection.in_atomic_block)
+        return super().randint(a, b)
+
+
+class TickLockingTests(TransactionTestCase):
+    def setUp(self):
+        self.zone = CrowdZone.objects.create(name="North", capacity=1000, current_count=100)
+        self.meter = EnergyMeter.objects.create(name="Main", current_usage_kw=200)
+
+    def locked_models(self, run):
+        locked = []
+        select_for_update = QuerySet.select_for_update
+
+        def spy(queryset, *args, **kwargs):
+            locked.append((queryset.model, connection.in_atomic_block))
+            return select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'select_for_update', spy):
+            run()
+        return locked
+
+    def test_tick_modifies_locked_rows_in_one_transaction(self):
+        rng = LockCheckingRandom()
+        locked = self.locked_models(TickEngine(rng=rng).tick)
+        self.assertIn((CrowdZone, True), locked)
+        self.assertIn((EnergyMeter, True), locked)
+        self.assertEqual(rng.in_transaction, [True])
+
+    def test_flush_locks_rows_before_writing(self):
+        buffer = IngestBuffer()
+        with mock.patch.object(IngestBuffer, 'start'):
+            buffer.add([{"zone": self.zone.id, "count": 412}, {"meter": self.meter.id, "kw": 310.5}])
+        locked = self.locked_models(buffer.flush)
+        self.assertIn((CrowdZone, True), locked)
+        self.assertIn((EnergyMeter, True), locked)
+
+    def test_tick_builds_on_flushed_reading(self):
+        buffer = IngestBuffer()
+        with mock.patch.object(IngestBuffer, 'start'):
+            buffer.add([{"zone": self.zone.id, "count": 412}])
+        buffer.flush()
+        TickEngine(rng=random.Random(0)).tick()
+        self.zone.refresh_from_db()
+        self.assertLessEqual(abs(self.zone.current_count - 412), 5)
@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Event, Ticket
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.event = Event.objects.create(name="Final", start_time=now, end_time=now)
+        self.payload = {"event": self.event.id, "customer_name": "Ada Lovelace", "ticket_code": "QX7-9F2K-LM3P",
+                        "seat_number": "N1-1", "price": "95.00"}
+
+    def test_write_with_fields_saves_every_field(self):
+        response = self.client.post('/api/tickets/?fields=id', self.payload, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        ticket = Ticket.objects.get(ticket_code="QX7-9F2K-LM3P")
+        self.assertEqual((ticket.customer_name, ticket.seat_number, ticket.price),
+                         ("Ada Lovelace", "N1-1", Decimal('95.00')))
+
+    def test_write_with_fields_still_validates(self):
+        del self.payload['price']
+        response = self.client.post('/api/tickets/?fields=id', self.payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('price', response.json())
+
+    def test_partial_update_with_fields(self):
+        ticket = Ticket.objects.create(event=self.event, customer_name="Ada", ticket_code="T-1",
+                                       seat_number="N1-1", price=95)
+        response = self.client.patch(f'/api/tickets/{ticket.id}/?fields=id', {"seat_number": "N1-2"},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.seat_number, ticket.customer_name), ("N1-2", "Ada"))
+
+    def test_read_with_fields_trims_payload(self):
+        ticket = Ticket.objects.create(event=self.event, customer_name="Ada", ticket_code="T-1",
+                                       seat_number="N1-1", price=95)
+        response = self.client.get(f'/api/tickets/{ticket.id}/?fields=id,ticket_code')
+        self.assertEqual(response.json(), {"id": ticket.id, "ticket_code": "T-1"})
@@ -0,0 +1,62 @@
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.models import Event, Ticket
+from api.ticket_index import ticket_index
+from api.validation import NOT_FOUND, validate_codes
+
+
+class TicketIssuedElsewhereTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.event = Event.objects.create(name="Final", start_time=now, end_time=now)
+        ticket_index.warm()
+
+    def ticket(self, code, **fields):
+        return Ticket(event=self.event, customer_name="Fan", ticket_code=code, seat_number=code, price=50, **fields)
+
+    def issue_elsewhere(self, *tickets):
+        # bulk_create sends no signals: to this worker's index, another worker issued them
+        Ticket.objects.bulk_create(tickets)
+
+    def test_local_save_doesnt_hide_other_workers_tickets(self):
+        self.issue_elsewhere(*[self.ticket(f"OTHER-{i}") for i in range(5)])
+        self.ticket("LOCAL-1").save()
+        ticket_index.sync(force=True)
+        self.assertTrue(ticket_index.might_exist("OTHER-0"))
+
+    @override_settings(TICKET_INDEX_SYNC_INTERVAL=0)
+    def test_ticket_from_other_worker_validates_after_interval(self):
+        self.issue_elsewhere(self.ticket("UNSYNCED-0"))
+        result, = validate_codes(["UNSYNCED-0"])
+        self.assertTrue(result['valid'])
+
+    def test_ticket_with_lower_id_is_synced(self):
+        self.ticket("LOCAL-1", id=1000).save()
+        ticket_index.sync(force=True)
+        self.issue_elsewhere(self.ticket("FIXTURE-1", id=5))
+        ticket_index.sync(force=True)
+        result, = validate_codes(["FIXTURE-1"])
+        self.assertTrue(result['valid'])
+
+    def test_transaction_in_flight_during_sync_is_caught_by_overlap(self):
+        # Stamped before the previous sync started, committed after it
+        self.issue_elsewhere(self.ticket("SLOW-1", updated_at=timezone.now() - timezone.timedelta(seconds=5)))
+        ticket_index.sync(force=True)
+        self.assertTrue(ticket_index.might_exist("SLOW-1"))
+
+    @override_settings(TICKET_INDEX_SYNC_INTERVAL=60)
+    def test_forged_code_runs_no_query(self):
+        ticket_index.sync(force=True)
+        with self.assertNumQueries(0):
+            result, = validate_codes(["FORGED-1"])
+        self.assertEqual(result['reason'], NOT_FOUND)
+        with self.assertNumQueries(0):
+            results = validate_codes([f"FORGED-{i}" for i in range(100)])
+        self.assertTrue(all(r['reason'] == NOT_FOUND for r in results))
+
+    @override_settings(TICKET_INDEX_SYNC_INTERVAL=0)
+    def test_stale_index_syncs_once_per_lookup(self):
+        with self.assertNumQueries(1):
+            result, = validate_codes(["FORGED-2"])
+        self.assertEqual(result['reason'], NOT_FOUND)
@@ -0,0 +1,54 @@
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from api import counters
+from api.models import Event, Ticket
+from api.ticket_index import ticket_index
+from api.validation import ALREADY_SCANNED, validate_codes
+
+from .utils import run_in_threads
+
+
+def create_tickets(codes):
+    now = timezone.now()
+    event = Event.objects.create(name="Final", start_time=now, end_time=now)
+    Ticket.objects.bulk_create(
+        Ticket(event=event, customer_name="Fan", ticket_code=code, seat_number=code, price=50) for code in codes
+    )
+    ticket_index.add_many(codes)  # as issuance does; bulk_create sends no signals
+
+
+class DuplicateScanTests(TestCase):
+    def test_duplicates_in_one_batch(self):
+        create_tickets(["T-1", "T-2"])
+        results = validate_codes(["T-1", "T-2", "T-1", "T-1"])
+        self.assertEqual([r['valid'] for r in results], [True, True, False, False])
+        self.assertEqual([r.get('reason') for r in results[2:]], [ALREADY_SCANNED, ALREADY_SCANNED])
+
+    def test_duplicates_across_batches(self):
+        create_tickets(["T-1"])
+        first, = validate_codes(["T-1"])
+        second, = validate_codes(["T-1"])
+        self.assertTrue(first['valid'])
+        self.assertEqual((second['valid'], second['reason']), (False, ALREADY_SCANNED))
+
+    def test_duplicates_in_one_request(self):
+        create_tickets(["T-1"])
+        response = self.client.post('/api/validate-tickets', {"codes": ["T-1", "T-1"]},
+                                    content_type='application/json')
+        self.assertEqual([r['valid'] for r in response.json()['results']], [True, False])
+
+
+class ConcurrentScanTests(TransactionTestCase):
+    def test_one_gate_wins(self):
+        codes = [f"T-{i}" for i in range(20)]
+        create_tickets(codes)
+        # Every gate scans every code, in a different order
+        batches = run_in_threads(lambda gate: validate_codes(codes[gate:] + codes[:gate], gate=f"G{gate}"), 4)
+
+        for code in codes:
+            outcomes = [r for batch in batches for r in batch if r['code'] == code]
+            self.assertEqual(sum(r['valid'] for r in outcomes), 1, code)
+            self.assertEqual({r['reason'] for r in outcomes if not r['valid']}, {ALREADY_SCANNED})
+        self.assertEqual(Ticket.objects.filter(is_validated=True).count(), len(codes))
+        self.assertEqual(counters.read()[counters.TICKETS_VALIDATED], len(codes))
@@ -0,0 +1,31 @@
+import threading
+from contextlib import nullcontext
+
+from django.db import connection
+
+
+def run_in_threads(target, threads):
+    """Call target(i) for i in range(threads), each on its own thread and connection; returns the results."""
+    # SQLite's shared in-memory test database takes one writer at a time,
+    # so there the threads take turns
+    results = [None] * threads
+    errors = []
+    turn = threading.Lock() if connection.vendor == 'sqlite' else nullcontext()
+
+    def run(i):
+        try:
+            with turn:
+                results[i] = target(i)
+        except Exception as e:  # surfaced by the test
+            errors.append(e)
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if errors:
+        raise errors[0]
+    return results
@@ -0,0 +1,232 @@
+import datetime
+import hashlib
+import logging
+import math
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import Ticket
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(code):
+    """Two independent 64-bit hashes of a ticket code."""
+    digest = hashlib.blake2b(code.encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little', signed=True), int.from_bytes(digest[8:], 'little')
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over the code fingerprint."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1024)
+        self.size = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, h1, h2):
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, h1, h2):
+        for pos in self._positions(h1, h2):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, hashes):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(*hashes))
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+
+class TicketCodeIndex:
+    """
+    Per-process index of known ticket codes for the validation hot path.
+
+    A Bloom filter rejects most unknown codes after a few bit tests; codes
+    that pass are confirmed against a sorted array of 64-bit fingerprints
+    (8 bytes per ticket), so forged codes never reach the database. Codes
+    that may exist still go to the database, which stays the source of
+    truth for deletions and state.
+
+    Inserts from this process are added through signals and the bulk
+    paths; inserts made by other workers are picked up by an incremental
+    sync of tickets whose ``updated_at`` is past the previous sync's start,
+    less TICKET_INDEX_SYNC_OVERLAP for transactions then in flight. A
+    negative lookup syncs first when the last sync is older than
+    TICKET_INDEX_SYNC_INTERVAL, so a "no" can be trusted: at worst a ticket
+    another worker committed within the interval is not known yet, and
+    the database is queried at most once per interval however many
+    forged codes arrive.
+    """
+
+    MERGE_THRESHOLD = 10000
+
+    def __init__(self, error_rate=0.01):
+        self.error_rate = error_rate
+        self.ready = False
+        self._bloom = BloomFilter(0, error_rate)
+        self._sorted = array('q')
+        self._pending = set()
+        self._synced_through = None
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._warming = False
+
+    # -- building ---------------------------------------------------------
+    def _build(self, codes, capacity):
+        bloom = BloomFilter(int(capacity * 1.25), self.error_rate)
+        prints = array('q')
+        for code in codes:
+            h1, h2 = fingerprint(code)
+            bloom.add(h1, h2)
+            prints.append(h1)
+        # Ticket codes are unique, so duplicates only come from 64-bit
+        # collisions, which are harmless for bisect lookups
+        return bloom, array('q', sorted(prints))
+
+    def load(self, codes):
+        """Build from a list of codes instead of the database (sizing, benchmarks)."""
+        bloom, prints = self._build(codes, len(codes))
+        with self._lock:
+            self._bloom, self._sorted, self._pending = bloom, prints, set()
+            self._synced_through = timezone.now()
+            self._synced_at = time.monotonic()
+            self.ready = True
+
+    def warm(self):
+        """Stream every ticket code from the database and rebuild the index."""
+        started = time.monotonic()
+        # Taken before reading, so the next sync covers everything committed after
+        synced_through = timezone.now()
+        capacity = Ticket.objects.count()
+        codes = Ticket.objects.values_list('ticket_code', flat=True).iterator(chunk_size=10000)
+
+        bloom, prints = self._build(codes, capacity)
+        with self._lock:
+            # Codes added while streaming stay pending and must be in the new filter
+            for h1, h2 in self._pending:
+                bloom.add(h1, h2)
+            self._bloom, self._sorted = bloom, prints
+            self._synced_through = synced_through
+            self._synced_at = time.monotonic()
+            self.ready = True
+        logger.info("Ticket index warmed: %s codes in %.2fs", len(prints), time.monotonic() - started)
+
+    def start_warmup(self):
+        if self._warming:
+            return
+        self._warming = True
+
+        def run():
+            try:
+                self.warm()
+            except Exception:
+                logger.exception("Ticket index warm-up failed")
+            finally:
+                close_old_connections()
+                self._warming = False
+
+        threading.Thread(target=run, name='ticket-index-warmup', daemon=True).start()
+
+    # -- updates ----------------------------------------------------------
+    def add(self, code):
+        hashes = fingerprint(code)
+        with self._lock:
+            self._bloom.add(*hashes)
+            self._pending.add(hashes)
+            if len(self._pending) >= self.MERGE_THRESHOLD:
+                self._merge()
+
+    def add_many(self, codes):
+        for code in codes:
+            self.add(code)
+
+    def _merge(self):
+        merged = self._sorted.tolist()
+        merged.extend(h1 for h1, _ in self._pending)
+        merged.sort()
+        self._sorted = array('q', merged)
+        self._pending = set()
+
+    def sync(self, force=False):
+        """Pick up tickets inserted by other processes since the last sync; returns how many were new."""
+        with self._sync_lock:
+            # Requests that waited here are covered by the sync that just ran
+            if not force and time.monotonic() - self._synced_at < settings.TICKET_INDEX_SYNC_INTERVAL:
+                return 0
+            started = timezone.now()
+            changed = Ticket.objects.all()
+            if self._synced_through is not None:
+                overlap = datetime.timedelta(seconds=settings.TICKET_INDEX_SYNC_OVERLAP)
+                changed = changed.filter(updated_at__gte=self._synced_through - overlap)
+            count = 0
+            # Updated tickets (scans, rescoring) come back too; only new codes are added
+            for code in changed.values_list('ticket_code', flat=True).iterator(chunk_size=10000):
+                if not self._contains(code):
+                    self.add(code)
+                    count += 1
+            self._synced_through = started
+            self._synced_at = time.monotonic()
+        return count
+
+    # -- lookups ----------------------------------------------------------
+    def _contains(self, code):
+        hashes = fingerprint(code)
+        if hashes not in self._bloom:
+            return False
+        if hashes in self._pending:
+            return True
+        h1 = hashes[0]
+        prints = self._sorted
+        i = bisect_left(prints, h1)
+        return i < len(prints) and prints[i] == h1
+
+    def might_exist(self, code):
+        """
+        False means no ticket had the code as of a sync at most
+        TICKET_INDEX_SYNC_INTERVAL ago, so it can be rejected without a query.
+        """
+        if not self.ready:
+            self.start_warmup()
+            return True
+        if not isinstance(code, str):
+            return True
+        if self._contains(code):
+            return True
+        # Unknown here: maybe another worker issued it since the last sync
+        return bool(self.sync()) and self._contains(code)
+
+    # -- reporting --------------------------------------------------------
+    def stats(self):
+        return {
+            "ready": self.ready,
+            "codes": len(self._sorted) + len(self._pending),
+            "synced_through": self._synced_through.isoformat() if self._synced_through else None,
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hashes,
+            "bloom_bytes": self._bloom.nbytes,
+            "fingerprint_bytes": self._sorted.buffer_info()[1] * self._sorted.itemsize,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+    def memory_bytes(self):
+        return (
+            sys.getsizeof(self._bloom.bits)
+            + sys.getsizeof(self._sorted)
+            # pending entries are (int, int) tuples: ~56 + 2 * 32 bytes each
+            + sys.getsizeof(self._pending) + 120 * len(self._pending)
+        )
+
+
+ticket_index = TicketCodeIndex(error_rate=settings.TICKET_INDEX_ERROR_RATE)
@@ -0,0 +1,240 @@
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import EnergyMeter, EnergyReading, EnergyRollup, ZoneOccupancyReading, ZoneOccupancyRollup
+
+# Rollup bucket widths in seconds, finest first
+ROLLUP_RESOLUTIONS = (60, 300, 3600)
+
+
+class RangeError(ValueError):
+    pass
+
+
+def bucket_start(ts, resolution):
+    epoch = int(ts.timestamp())
+    return datetime.datetime.fromtimestamp(epoch - epoch % resolution, tz=datetime.timezone.utc)
+
+
+def apply_rollups(rollup_model, key_field, readings):
+    """
+    Fold ``readings`` ((key, timestamp, value) tuples, oldest first) into
+    every rollup resolution of ``rollup_model``.
+
+    Partial aggregates are computed in memory, then merged into the
+    affected buckets with one locking read, one bulk_update and one
+    bulk_create per resolution, independent of how many raw readings the
+    batch holds.
+    """
+    for resolution in ROLLUP_RESOLUTIONS:
+        partials = {}
+        for key, ts, value in readings:
+            bucket = (key, bucket_start(ts, resolution))
+            agg = partials.get(bucket)
+            if agg is None:
+                partials[bucket] = [1, value, value, value, value]
+            else:
+                agg[0] += 1
+                agg[1] += value
+                agg[2] = min(agg[2], value)
+                agg[3] = max(agg[3], value)
+                agg[4] = value
+        if not partials:
+            continue
+
+        try:
+            _merge_rollups(rollup_model, key_field, resolution, partials)
+        except IntegrityError:
+            # A concurrent writer created one of our new buckets first;
+            # the retry finds it and merges into it instead
+            _merge_rollups(rollup_model, key_field, resolution, partials)
+
+
+def _merge_rollups(rollup_model, key_field, resolution, partials):
+    with transaction.atomic():
+        existing = {
+            (getattr(row, key_field), row.bucket_start): row
+            for row in rollup_model.objects.select_for_update().filter(**{
+                'resolution': resolution,
+                f'{key_field}__in': {key for key, _ in partials},
+                'bucket_start__in': {start for _, start in partials},
+            })
+        }
+        to_update, to_create = [], []
+        for (key, start), (samples, total, low, high, last) in partials.items():
+            row = existing.get((key, start))
+            if row is None:
+                to_create.append(rollup_model(**{
+                    key_field: key, 'resolution': resolution, 'bucket_start': start,
+                    'samples': samples, 'total': total,
+                    'min_value': low, 'max_value': high, 'last_value': last,
+                }))
+            else:
+                row.samples += samples
+                row.total += total
+                row.min_value = min(row.min_value, low)
+                row.max_value = max(row.max_value, high)
+                row.last_value = last
+                to_update.append(row)
+        rollup_model.objects.bulk_update(
+            to_update, ['samples', 'total', 'min_value', 'max_value', 'last_value'], batch_size=1000
+        )
+        rollup_model.objects.bulk_create(to_create, batch_size=1000)
+
+
+def record_zone_readings(readings, keep_raw=True):
+    """Append (zone_id, timestamp, count) readings and update their rollups."""
+    readings = sorted(readings, key=lambda r: r[1])
+    if keep_raw:
+        ZoneOccupancyReading.objects.bulk_create(
+            [ZoneOccupancyReading(zone_id=z, timestamp=ts, count=c) for z, ts, c in readings],
+            batch_size=1000,
+        )
+    apply_rollups(ZoneOccupancyRollup, 'zone_id', readings)
+
+
+def choose_resolution(resolution):
+    """Coarsest stored resolution that still satisfies the requested one (0 = raw)."""
+    usable = [r for r in ROLLUP_RESOLUTIONS if r <= resolution and resolution % r == 0]
+    return usable[-1] if usable else 0
+
+
+def parse_range(params, default_window=3600, default_resolution=60):
+    """Read start/end (ISO 8601) and resolution (seconds) from query params."""
+    end = params.get('end')
+    start = params.get('start')
+    try:
+        end = datetime.datetime.fromisoformat(end) if end else timezone.now()
+        start = datetime.datetime.fromisoformat(start) if start else end - datetime.timedelta(seconds=default_window)
+        resolution = int(params.get('resolution', default_resolution))
+    except ValueError:
+        raise RangeError("start/end must be ISO 8601 and resolution an integer number of seconds")
+    if timezone.is_naive(start):
+        start = timezone.make_aware(start, datetime.timezone.utc)
+    if timezone.is_naive(end):
+        end = timezone.make_aware(end, datetime.timezone.utc)
+    if resolution <= 0 or start >= end:
+        raise RangeError("resolution must be positive and start before end")
+    if (end - start).total_seconds() / resolution > settings.TIMESERIES_MAX_POINTS:
+        raise RangeError(f"Too many points; use a coarser resolution (max {settings.TIMESERIES_MAX_POINTS})")
+    return start, end, resolution
+
+
+def _series(rows, resolution):
+    """Re-bucket (key, bucket_start, samples, total, min, max, last) rows, ordered by key and time."""
+    series = defaultdict(list)
+    current = {}
+    for key, start, samples, total, low, high, last in rows:
+        bucket = bucket_start(start, resolution)
+        point = current.get(key)
+        if point is None or point['t'] != bucket:
+            point = current[key] = {"t": bucket, "samples": 0, "total": 0, "min": low, "max": high, "last": last}
+            series[key].append(point)
+        point['samples'] += samples
+        point['total'] += total
+        point['min'] = min(point['min'], low)
+        point['max'] = max(point['max'], high)
+        point['last'] = last
+
+    for points in series.values():
+        for point in points:
+            total = point.pop('total')
+            point['avg'] = round(total / point['samples'], 2) if point['samples'] else None
+    return series
+
+
+def query_series(reading_model, rollup_model, key_field, value_field, keys, start, end, resolution):
+    """
+    Bucketed history for ``keys`` between ``start`` and ``end``.
+
+    Reads the coarsest rollup whose width divides ``resolution``; raw
+    readings are only scanned for sub-minute resolutions.
+    """
+    source = choose_resolution(resolution)
+    if source:
+        rows = rollup_model.objects.filter(**{
+            f'{key_field}__in': keys,
+            'resolution': source,
+            'bucket_start__gte': bucket_start(start, source),
+            'bucket_start__lt': end,
+        }).order_by(key_field, 'bucket_start').values_list(
+            key_field, 'bucket_start', 'samples', 'total', 'min_value', 'max_value', 'last_value'
+        )
+    else:
+        raw = reading_model.objects.filter(**{
+            f'{key_field}__in': keys, 'timestamp__gte': start, 'timestamp__lt': end,
+        }).order_by(key_field, 'timestamp').values_list(key_field, 'timestamp', value_field)
+        rows = ((key, ts, 1, value, value, value, value) for key, ts, value in raw.iterator(chunk_size=5000))
+    return {"resolution": resolution, "source_resolution": source, "series": _series(rows, resolution)}
+
+
+def query_zone_history(zone_ids, start, end, resolution):
+    return query_series(ZoneOccupancyReading, ZoneOccupancyRollup, 'zone_id', 'count',
+                        zone_ids, start, end, resolution)
+
+
+def record_energy_readings(readings, keep_raw=None):
+    """
+    Fold (meter_id, timestamp, usage_kw) readings into the energy rollups.
+
+    Raw rows are only kept when ENERGY_STORE_RAW_READINGS is on, so by
+    default storage grows with the number of buckets, not readings.
+    """
+    keep_raw = settings.ENERGY_STORE_RAW_READINGS if keep_raw is None else keep_raw
+    readings = sorted(readings, key=lambda r: r[1])
+    if keep_raw:
+        EnergyReading.objects.bulk_create(
+            [EnergyReading(meter_id=m, timestamp=ts, usage_kw=kw) for m, ts, kw in readings],
+            batch_size=1000,
+        )
+    apply_rollups(EnergyRollup, 'meter_id', readings)
+
+
+def query_energy_history(meter_ids, start, end, resolution):
+    return query_series(EnergyReading, EnergyRollup, 'meter_id', 'usage_kw',
+                        meter_ids, start, end, resolution)
+
+
+def query_energy_totals(start, end, resolution, group='total'):
+    """
+    Energy usage per bucket summed across meters: ``group`` is 'total'
+    (whole stadium) or 'location'. A bucket's usage is the sum of each
+    meter's average kW in that bucket.
+    """
+    locations = dict(EnergyMeter.objects.values_list('id', 'location'))
+    result = query_energy_history(list(locations), start, end, resolution)
+
+    sums = defaultdict(lambda: defaultdict(float))
+    for meter_id, points in result['series'].items():
+        name = locations[meter_id] if group == 'location' else 'total'
+        for point in points:
+            sums[name][point['t']] += point['avg'] or 0.0
+
+    result['series'] = {
+        name: [{"t": t, "usage": round(usage, 2)} for t, usage in sorted(buckets.items())]
+        for name, buckets in sums.items()
+    }
+    return result
+
+
+def recent_energy_usage(hours, resolution=3600):
+    """Stadium-wide usage for the last ``hours`` buckets, aggregated in the database."""
+    since = bucket_start(timezone.now() - datetime.timedelta(hours=hours - 1), resolution)
+    return list(
+        EnergyRollup.objects.filter(resolution=resolution, bucket_start__gte=since)
+        .values('bucket_start')
+        .annotate(usage=Sum(F('total') / F('samples')))
+        .order_by('bucket_start')
+        .values_list('bucket_start', 'usage')
+    )
+
+
+def prune_raw(reading_model, before):
+    """Delete raw readings older than ``before``; rollups are kept."""
+    deleted, _ = reading_model.objects.filter(timestamp__lt=before).delete()
+    return deleted
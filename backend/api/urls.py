@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import *
@@ -18,7 +19,16 @@ urlpatterns = [
     path('auth/logout/', api_logout, name='api-logout'),
     path('auth/user/', get_user, name='get-user'),
     path('auth/csrf/', get_csrf_token, name='get-csrf'),
-    path('dashboard-data', DashboardDataView.as_view(), name='dashboard-data'),
+    path('dashboard-data', dashboard_data if settings.ASYNC_VIEWS else DashboardDataView.as_view(),
+         name='dashboard-data'),
     path('validate-ticket', ValidateTicket.as_view(), name='validate-ticket'),
+    path('validate-tickets', ValidateTicketBatch.as_view(), name='validate-tickets'),
+    path('gate-manifest/<int:event_id>', GateManifestView.as_view(), name='gate-manifest'),
+    path('gate-manifest/<int:event_id>/scans', OfflineScansView.as_view(), name='gate-manifest-scans'),
+    path('entry-flow/<int:event_id>', EntryFlowView.as_view(), name='entry-flow'),
+    path('entry-flow/<int:event_id>/histogram', EntryFlowHistogramView.as_view(), name='entry-flow-histogram'),
+    path('ingest', IngestReadings.as_view(), name='ingest'),
+    path('metrics', metrics_view, name='metrics'),
+    path('exports/<str:dataset>', export_view, name='export'),
     path('generate-mock', GenerateMockData.as_view(), name='generate-mock'),
 ]
@@ -0,0 +1,144 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters, entry_flow
+from .counters import FRAUD_THRESHOLD
+from .models import SystemLog, Ticket
+from .signals import notify_change
+from .ticket_index import ticket_index
+from .timeseries import bucket_start
+
+# Rejection reasons and HTTP status, shared by validate-ticket and validate-tickets
+NOT_FOUND = "Ticket not found"
+FRAUD_RISK = "High fraud risk detected by AI"
+ALREADY_SCANNED = "Already scanned"
+
+REASON_STATUS = {
+    NOT_FOUND: 404,
+    FRAUD_RISK: 403,
+    ALREADY_SCANNED: 400,
+}
+
+
+def validate_codes(codes, gate=''):
+    """
+    Mark tickets as entered at ``gate``, one conditional UPDATE per code.
+
+    The UPDATE only matches an unscanned, low-risk ticket, so when two
+    gates scan the same code concurrently the database lets exactly one
+    of them win. The batch commits as one transaction together with the
+    validated-tickets counter and the gate's entry-flow buckets. Rejected
+    codes are classified with a single query for the whole batch, which
+    also gives the events of the accepted ones. Codes the in-memory ticket
+    index rules out are rejected without touching the database; a batch
+    of only such codes runs no query at all. Returns one result dict per
+    input code, in order.
+    """
+    now = timezone.now()
+    if settings.TICKET_INDEX_ENABLED:
+        known = {code for code in codes if ticket_index.might_exist(code)}
+        if not known:
+            return [{"code": code, "valid": False, "reason": NOT_FOUND} for code in codes]
+    else:
+        known = set(codes)
+
+    won = set()
+    with transaction.atomic():
+        # Sorted, so concurrent batches lock their tickets in the same order
+        for code in sorted(known, key=str):
+            updated = Ticket.objects.filter(
+                ticket_code=code, is_validated=False, fraud_score__lte=FRAUD_THRESHOLD
+            ).update(is_validated=True, entry_time=now, entry_gate=gate, updated_at=now)
+            if updated:
+                won.add(code)
+        counters.add({counters.TICKETS_VALIDATED: len(won)})
+
+        rows = {
+            row['ticket_code']: row
+            for row in Ticket.objects.filter(ticket_code__in=known).values(
+                'ticket_code', 'id', 'event_id', 'customer_name', 'seat_number', 'fraud_score'
+            )
+        } if known else {}
+        entry_flow.record(Counter(rows[code]['event_id'] for code in won), gate, now)
+    if won:
+        notify_change(Ticket)
+
+    results = []
+    for code in codes:
+        row = rows.get(code)
+        if code in won:
+            won.discard(code)  # a repeated code in the same batch is a double scan
+            results.append({"code": code, "valid": True, "ticket": row, "entry_time": now})
+        elif row is None:
+            results.append({"code": code, "valid": False, "reason": NOT_FOUND})
+        elif row['fraud_score'] > FRAUD_THRESHOLD:
+            results.append({"code": code, "valid": False, "reason": FRAUD_RISK})
+        else:
+            results.append({"code": code, "valid": False, "reason": ALREADY_SCANNED})
+    return results
+
+
+def record_offline_scans(event_id, scans, gate=''):
+    """
+    Apply (code, scanned_at) scans that a gate accepted while offline,
+    checking them against its event's manifest (api/gate_manifest.py).
+
+    A ticket enters once: the first scan the server records wins, online
+    or offline, and it keeps its own scan time. Later scans of the same
+    ticket, including repeats within the upload (the earliest one wins),
+    are double scans: they come back with the recorded entry time and
+    are reported in one SystemLog warning. Returns one result dict per
+    scan, in order, like validate_codes().
+    """
+    now = timezone.now()
+    first = {}
+    for code, scanned_at in scans:
+        scanned_at = min(scanned_at, now)  # device clocks running ahead
+        if code not in first or scanned_at < first[code]:
+            first[code] = scanned_at
+
+    won = {}
+    with transaction.atomic():
+        for code in sorted(first, key=str):
+            updated = Ticket.objects.filter(
+                event_id=event_id, ticket_code=code, is_validated=False, fraud_score__lte=FRAUD_THRESHOLD
+            ).update(is_validated=True, entry_time=first[code], entry_gate=gate, updated_at=now)
+            if updated:
+                won[code] = first[code]
+        counters.add({counters.TICKETS_VALIDATED: len(won)})
+        for minute, count in Counter(bucket_start(at, entry_flow.MINUTE) for at in won.values()).items():
+            entry_flow.record({event_id: count}, gate, minute)
+
+        rows = {
+            row['ticket_code']: row
+            for row in Ticket.objects.filter(event_id=event_id, ticket_code__in=first).values(
+                'ticket_code', 'id', 'fraud_score', 'entry_time'
+            )
+        } if first else {}
+    if won:
+        notify_change(Ticket)
+
+    results = []
+    double_scans = 0
+    for code, scanned_at in scans:
+        row = rows.get(code)
+        if won.get(code) == min(scanned_at, now):
+            del won[code]  # later repeats in the upload are double scans
+            results.append({"code": code, "valid": True, "entry_time": row['entry_time']})
+        elif row is None:
+            results.append({"code": code, "valid": False, "reason": NOT_FOUND})
+        elif row['fraud_score'] > FRAUD_THRESHOLD:
+            results.append({"code": code, "valid": False, "reason": FRAUD_RISK})
+        else:
+            double_scans += 1
+            results.append({"code": code, "valid": False, "reason": ALREADY_SCANNED,
+                            "entry_time": row['entry_time']})
+    if double_scans:
+        SystemLog.objects.create(
+            module="Ticketing", level="WARNING",
+            message=f"{double_scans} double scan(s) in offline upload from gate {gate or '?'} (event {event_id})",
+        )
+    return results
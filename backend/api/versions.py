@@ -0,0 +1,91 @@
+import hashlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from .models import TableVersion
+
+
+def bump(model):
+    """Advance ``model``'s version once the current transaction commits."""
+    label = model._meta.label_lower
+
+    def apply():
+        now = timezone.now()
+        if not TableVersion.objects.filter(model=label).update(version=F('version') + 1, updated_at=now):
+            try:
+                with transaction.atomic():
+                    TableVersion.objects.create(model=label, version=1, updated_at=now)
+            except IntegrityError:
+                TableVersion.objects.filter(model=label).update(version=F('version') + 1, updated_at=now)
+
+    # Cascading deletes send one signal per row; one bump per label per commit is enough
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and any(
+        getattr(func, 'version_label', None) == label for _, func, _ in connection.run_on_commit
+    ):
+        return
+    apply.version_label = label
+    transaction.on_commit(apply)
+
+
+def current(models):
+    """{label: version} of ``models`` in one query; 0 for tables never written."""
+    labels = sorted(model._meta.label_lower for model in models)
+    versions = dict.fromkeys(labels, 0)
+    versions.update(TableVersion.objects.filter(model__in=labels).values_list('model', 'version'))
+    return versions
+
+
+def etag_for(versions, request):
+    """
+    ETag of a response built from ``versions`` (see current()). Responses
+    served from a per-process cache must pass the versions the cached body
+    was built from.
+    """
+    key = [request.get_full_path(), request.META.get('HTTP_ACCEPT', '')]
+    key += [f"{label}:{version}" for label, version in sorted(versions.items())]
+    return quote_etag(hashlib.blake2b("|".join(key).encode(), digest_size=12).hexdigest())
+
+
+def add_etag(response, etag):
+    # No Last-Modified: in whole seconds, it can't tell apart two writes
+    # within the same second, so 304s only ever come from the ETag
+    response.headers.setdefault('ETag', etag)
+    patch_vary_headers(response, ('Accept',))
+    # Browsers revalidate every time instead of guessing freshness
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET/HEAD with 304 when the client's ETag still matches the versions of ``version_models``, before the view runs
+    any query or serializer. Defaults to the queryset's model. Views that
+    serve from a per-process cache key it on version_of(), so the body
+    always matches the ETag.
+    """
+    version_models = None
+
+    def get_version_models(self):
+        return self.version_models or (self.queryset.model,)
+
+    def version_of(self, model):
+        """The version of ``model`` that this GET's ETag was computed from."""
+        return self.table_versions[model._meta.label_lower]
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        self.table_versions = current(self.get_version_models())
+        etag = etag_for(self.table_versions, request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return add_etag(response, etag)
@@ -1,171 +1,302 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Sum, F
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.db.models import Sum
 from .models import *
 from .serializers import *
-from . import ai_services
+from . import anomaly, concurrency, energy_forecast, entry_flow, exports, fraud, gate_manifest, issuance, metrics, timeseries, validation
+from .crowd_engine import crowd_engine
+from .fast_serialization import FastReadMixin
+from .pagination import IdCursorPagination
+from .ingest import BufferFull, ingest_buffer
+from .parsers import CSVStreamParser, NDJSONParser
+from .snapshots import MODEL_SECTIONS, dashboard_snapshot
+from .versions import ConditionalGetMixin, add_etag, current, etag_for
 import random
 import datetime
 
+
+def sparse_queryset(queryset, request, model):
+    # Only load the columns a ?fields= read will serialize
+    fields = request.query_params.get('fields')
+    if not fields or request.method not in permissions.SAFE_METHODS:
+        return queryset
+    concrete = {f.name for f in model._meta.concrete_fields}
+    columns = [f.strip() for f in fields.split(',') if f.strip() in concrete]
+    return queryset.only('id', *columns)
+
+
+def parse_bool(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
 # Dashboard: Stats
-class DashboardDataView(APIView):
+class DashboardDataView(ConditionalGetMixin, APIView):
+    version_models = tuple(MODEL_SECTIONS)
+
     def get(self, request):
-        # 1. Jitter logic: simulate live data movement
-        zones = CrowdZone.objects.all()
-        for zone in zones:
-            change = random.randint(-5, 5)
-            zone.current_count = max(0, min(zone.capacity, zone.current_count + change))
-            zone.status = 'red' if zone.current_count / zone.capacity > 0.9 else 'green'
-            zone.save()
-
-        meters = EnergyMeter.objects.all()
-        for meter in meters:
-            meter.current_usage_kw = round(max(50, meter.current_usage_kw + random.uniform(-2, 2)), 1)
-            meter.save()
-
-        # 2. Aggregations
-        active_events = Event.objects.filter(status='active').count()
-        total_occupancy = CrowdZone.objects.aggregate(Sum('current_count'))['current_count__sum'] or 0
-        total_capacity = CrowdZone.objects.aggregate(Sum('capacity'))['capacity__sum'] or 1
-        
-        occupancy_pct = int((total_occupancy / total_capacity) * 100)
-        system_health = random.randint(95, 100)
-        
-        tickets_sold = Ticket.objects.count()
-        fraud_alerts = Ticket.objects.filter(fraud_score__gt=0.8).count()
-        critical_zones = CrowdZone.objects.filter(status='red').count()
-        total_energy = EnergyMeter.objects.aggregate(Sum('current_usage_kw'))['current_usage_kw__sum'] or 0
-        
-        # 3. Revenue & Items
-        merch_stats = MerchandiseItem.objects.all().aggregate(
-            revenue=Sum(F('price') * F('sold_count')),
-            total_items=Sum('stock_quantity')
-        )
-        total_revenue = merch_stats['revenue'] or 0
-
-        # 4. Alerts & Activity (Live from backend)
-        logs = SystemLog.objects.order_by('-timestamp')[:10]
-        serialized_logs = []
-        for log in logs:
-            serialized_logs.append({
-                "id": log.id,
-                "user": log.user.username if log.user else "System",
-                "action": log.action,
-                "detail": log.details,
-                "time": log.timestamp.strftime("%H:%M"),
-                "level": log.level
-            })
+        # Read-only: live movement comes from the tick engine (api/simulation.py)
+        data, built_from = dashboard_snapshot.serve(self.table_versions)
+        data["system_health"] = random.randint(95, 100)
+        # ETag of the sections actually served; the mixin keeps it
+        return add_etag(Response(data), etag_for(built_from, request))
 
-        return Response({
-            "active_events": active_events,
-            "occupancy_percentage": occupancy_pct,
-            "system_health": system_health,
-            "ticketing": {
-                "total_sold": tickets_sold,
-                "fraud_alerts": fraud_alerts
-            },
-            "crowd": {
-                "critical_zones": critical_zones,
-                "total_zones": CrowdZone.objects.count()
-            },
-            "energy": {
-                "total_usage": round(total_energy, 1)
-            },
-            "merchandise": {
-                "total_revenue": round(total_revenue, 2),
-                "total_items": merch_stats['total_items'] or 0,
-                "breakdown": MerchandiseItemSerializer(MerchandiseItem.objects.all()[:4], many=True).data
-            },
-            "activity": serialized_logs[:5],
-            "alerts": serialized_logs[5:10]
-        })
+async def dashboard_data(request):
+    # Async variant (ASYNC_VIEWS): stale sections are rebuilt concurrently
+    # on the query pool instead of one query after another
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    models = DashboardDataView.version_models
+    [versions] = await concurrency.gather(lambda: current(models))
+    etag = etag_for(versions, request)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        data, built_from = await dashboard_snapshot.aserve(versions)
+        data["system_health"] = random.randint(95, 100)
+        response = HttpResponse(JSONRenderer().render(data), content_type='application/json')
+        etag = etag_for(built_from, request)
+    return add_etag(response, etag)
 
 # Event
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
 
 # Ticketing
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
-    
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        params = self.request.query_params
+        try:
+            if params.get('event'):
+                queryset = queryset.filter(event_id=int(params['event']))
+            if params.get('min_fraud'):
+                queryset = queryset.filter(fraud_score__gte=float(params['min_fraud']))
+            if params.get('max_fraud'):
+                queryset = queryset.filter(fraud_score__lte=float(params['max_fraud']))
+        except ValueError:
+            raise ValidationError("event must be an integer and min_fraud/max_fraud numbers")
+        if params.get('is_validated'):
+            queryset = queryset.filter(is_validated=parse_bool(params['is_validated']))
+        return sparse_queryset(queryset, self.request, Ticket)
+
     def perform_create(self, serializer):
-        # AI prediction on create
-        code = serializer.validated_data.get('ticket_code', '')
-        score = ai_services.predict_fraud_score(code)
+        # Scored against the event's stored tickets before it joins them
+        score = fraud.score_tickets([Ticket(**serializer.validated_data)])[0]
         serializer.save(fraud_score=score)
 
+    @action(detail=False, methods=['post'], url_path='bulk',
+            parser_classes=[JSONParser, CSVStreamParser])
+    def bulk(self, request):
+        # Box-office import: JSON array (or {"tickets": [...]}) or a text/csv stream
+        rows = request.data
+        if isinstance(rows, dict):
+            rows = rows.get('tickets')
+        if rows is None or isinstance(rows, (dict, str)):
+            return Response({"error": "Expected a list of tickets or a CSV body"}, status=400)
+
+        result = issuance.issue_tickets(rows)
+        return Response(result, status=201 if result['created'] else 400)
+
+def parse_gate(data):
+    gate = data.get('gate', '')
+    if not isinstance(gate, str) or len(gate) > 50:
+        raise ValidationError({"gate": "must be a gate name of at most 50 characters"})
+    return gate
+
 class ValidateTicket(APIView):
     def post(self, request):
         code = request.data.get('code')
-        try:
-            ticket = Ticket.objects.get(ticket_code=code)
-        except Ticket.DoesNotExist:
-            return Response({"valid": False, "reason": "Ticket not found"}, status=404)
-        
-        # Fraud check
-        if ticket.fraud_score > 0.8:
-            return Response({"valid": False, "reason": "High fraud risk detected by AI"}, status=403)
-            
-        if ticket.is_validated:
-             return Response({"valid": False, "reason": "Already scanned"}, status=400)
-             
-        ticket.is_validated = True
-        ticket.entry_time = timezone.now()
-        ticket.save()
+        result = validation.validate_codes([code], parse_gate(request.data))[0]
+        if not result['valid']:
+            return Response({"valid": False, "reason": result['reason']}, status=validation.REASON_STATUS[result['reason']])
+
+        ticket = Ticket.objects.get(ticket_code=code)
         return Response({"valid": True, "details": TicketSerializer(ticket).data})
 
+class ValidateTicketBatch(APIView):
+    # Gate scanners: {"codes": [...]} -> one result per code, in order
+    def post(self, request):
+        codes = request.data.get('codes')
+        if not isinstance(codes, list) or not all(isinstance(c, str) for c in codes):
+            return Response({"error": "'codes' must be a list of ticket codes"}, status=400)
+        if len(codes) > settings.VALIDATION_BATCH_LIMIT:
+            return Response({"error": f"At most {settings.VALIDATION_BATCH_LIMIT} codes per request"}, status=400)
+
+        results = validation.validate_codes(codes, parse_gate(request.data))
+        accepted = sum(1 for r in results if r['valid'])
+        return Response({
+            "accepted": accepted,
+            "rejected": len(results) - accepted,
+            "results": results
+        })
+
+# Offline gates: signed binary manifest of an event's tickets, ?since=<version> for a delta
+class GateManifestView(APIView):
+    def get(self, request, event_id):
+        get_object_or_404(Event, pk=event_id)
+        since = request.query_params.get('since')
+        try:
+            since = int(since) if since else None
+        except ValueError:
+            return Response({"error": "since must be a manifest version"}, status=400)
+        data, version = gate_manifest.build(event_id, since)
+        response = HttpResponse(data, content_type='application/octet-stream')
+        response.headers['X-Manifest-Version'] = str(version)
+        response.headers['Content-Disposition'] = f'attachment; filename="event-{event_id}-{version}.manifest"'
+        return response
+
+# Scans made while offline: {"gate": "...", "scans": [{"code": "...", "ts": <epoch or ISO 8601>}]}
+def parse_scan_time(value):
+    # Epoch seconds or an ISO 8601 datetime (naive means the current
+    # timezone); None when it's neither
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+        except (ValueError, OverflowError, OSError):
+            return None
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+class OfflineScansView(APIView):
+    def post(self, request, event_id):
+        get_object_or_404(Event, pk=event_id)
+        items = request.data.get('scans')
+        if not isinstance(items, list):
+            return Response({"error": "'scans' must be a list"}, status=400)
+        if len(items) > settings.VALIDATION_BATCH_LIMIT:
+            return Response({"error": f"At most {settings.VALIDATION_BATCH_LIMIT} scans per request"}, status=400)
+        scans = []
+        for item in items:
+            code, ts = (item.get('code'), parse_scan_time(item.get('ts'))) if isinstance(item, dict) else (None, None)
+            if not isinstance(code, str) or ts is None:
+                return Response({"error": "Each scan needs a 'code' and a 'ts' (epoch seconds or ISO 8601)"},
+                                status=400)
+            scans.append((code, ts))
+
+        results = validation.record_offline_scans(event_id, scans, parse_gate(request.data))
+        accepted = sum(1 for r in results if r['valid'])
+        return Response({"accepted": accepted, "rejected": len(results) - accepted, "results": results})
+
+# Entry flow: no ETag, throughput and projections move with the clock
+class EntryFlowView(APIView):
+    def get(self, request, event_id):
+        event = get_object_or_404(Event, pk=event_id)
+        return Response(entry_flow.summary(event))
+
+# Entries per minute by gate: ?start=&end= (ISO 8601) &resolution= (seconds) &gate=
+class EntryFlowHistogramView(APIView):
+    def get(self, request, event_id):
+        event = get_object_or_404(Event, pk=event_id)
+        try:
+            start, end, resolution = timeseries.parse_range(request.query_params, default_window=3 * 3600)
+        except timeseries.RangeError as e:
+            return Response({"error": str(e)}, status=400)
+        if resolution < entry_flow.MINUTE or resolution % entry_flow.MINUTE:
+            return Response({"error": "resolution must be a whole number of minutes, in seconds"}, status=400)
+        return Response(entry_flow.histogram(event, start, end, resolution, request.query_params.get('gate')))
+
 # Crowd
-class CrowdZoneViewSet(viewsets.ModelViewSet):
+class CrowdZoneViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = CrowdZone.objects.all()
     serializer_class = CrowdZoneSerializer
 
     def list(self, request):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        data = serializer.data
-        
-        # Add AI prediction to response
-        for zone in data:
-            prediction = ai_services.predict_crowd_levels(zone['capacity'], zone['current_count'])
-            zone['ai_prediction'] = prediction
-        return Response(data)
+        def build_rows():
+            queryset = self.filter_queryset(self.get_queryset())
+            return self.get_serializer(queryset, many=True).data
+
+        # Add AI prediction to response (one vectorized pass, cached until the next change)
+        return Response(crowd_engine.listing(build_rows, self.version_of(CrowdZone)))
+
+    # Occupancy history: ?start=&end= (ISO 8601) &resolution= (seconds)
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        zone = self.get_object()
+        try:
+            start, end, resolution = timeseries.parse_range(request.query_params)
+        except timeseries.RangeError as e:
+            return Response({"error": str(e)}, status=400)
+        result = timeseries.query_zone_history([zone.id], start, end, resolution)
+        return Response({
+            "zone": zone.id,
+            "resolution": result['resolution'],
+            "source_resolution": result['source_resolution'],
+            "points": result['series'].get(zone.id, [])
+        })
+
+    # Same for several zones: &zones=1,2,3 (default: all)
+    @action(detail=False, methods=['get'], url_path='history')
+    def history_all(self, request):
+        try:
+            start, end, resolution = timeseries.parse_range(request.query_params)
+            zones = request.query_params.get('zones')
+            zone_ids = [int(z) for z in zones.split(',')] if zones else list(CrowdZone.objects.values_list('id', flat=True))
+        except (timeseries.RangeError, ValueError) as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(timeseries.query_zone_history(zone_ids, start, end, resolution))
 
 # Energy
-class EnergyMeterViewSet(viewsets.ModelViewSet):
+class EnergyMeterViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = EnergyMeter.objects.all()
     serializer_class = EnergyMeterSerializer
     
     def list(self, request):
         queryset = self.get_queryset()
-        total_usage = queryset.aggregate(Sum('current_usage_kw'))['current_usage_kw__sum'] or 0
-        
+
         # Format meters for frontend expectations
-        meters_data = []
-        for meter in queryset:
-            meters_data.append({
+        def meter_rows():
+            return [{
                 "id": meter.id,
                 "zone": meter.location,
                 "type": meter.name,
                 "current_reading": meter.current_usage_kw,
                 "status": meter.status
-            })
-            
-        # Mock history data for the graph
-        history = [
-            {"time": "09:00", "usage": max(50, total_usage * 0.4), "prediction": total_usage * 0.45},
-            {"time": "11:00", "usage": max(100, total_usage * 0.6), "prediction": total_usage * 0.65},
-            {"time": "13:00", "usage": max(200, total_usage * 0.9), "prediction": total_usage * 0.85},
-            {"time": "15:00", "usage": total_usage, "prediction": total_usage * 1.1},
-            {"time": "17:00", "usage": max(150, total_usage * 0.8), "prediction": total_usage * 0.75},
-            {"time": "19:00", "usage": max(300, total_usage * 1.2), "prediction": total_usage * 1.3},
-        ]
-        
+            } for meter in queryset]
+
+        # Hourly history from the precomputed energy rollups; the
+        # prediction for each hour is the previous hour's usage
+        def usage_history():
+            rows = []
+            previous = None
+            for bucket, usage in timeseries.recent_energy_usage(settings.ENERGY_HISTORY_HOURS):
+                rows.append({
+                    "time": timezone.localtime(bucket).strftime("%H:%M"),
+                    "usage": round(usage, 1),
+                    "prediction": round(previous if previous is not None else usage, 1)
+                })
+                previous = usage
+            return rows
+
+        # The three reads are independent: run them side by side
+        total_usage, meters_data, history = concurrency.run_concurrently(
+            lambda: queryset.aggregate(Sum('current_usage_kw'))['current_usage_kw__sum'] or 0,
+            meter_rows,
+            usage_history,
+        )
+
         return Response({
             "summary": {
                 "total_usage": round(total_usage, 1),
@@ -174,21 +305,111 @@ class EnergyMeterViewSet(viewsets.ModelViewSet):
             "meters": meters_data
         })
     
+    # Bucketed usage: ?start=&end=&resolution=&group=meter|location|total
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        group = request.query_params.get('group', 'total')
+        if group not in ('meter', 'location', 'total'):
+            return Response({"error": "group must be meter, location or total"}, status=400)
+        try:
+            start, end, resolution = timeseries.parse_range(request.query_params)
+        except timeseries.RangeError as e:
+            return Response({"error": str(e)}, status=400)
+        if resolution < timeseries.ROLLUP_RESOLUTIONS[0] and not settings.ENERGY_STORE_RAW_READINGS:
+            return Response({"error": "Raw energy readings are not stored; use resolution >= 60"}, status=400)
+        if group == 'meter':
+            meter_ids = list(EnergyMeter.objects.values_list('id', flat=True))
+            return Response(timeseries.query_energy_history(meter_ids, start, end, resolution))
+        return Response(timeseries.query_energy_totals(start, end, resolution, group))
+
     @action(detail=True, methods=['get'])
     def forecast(self, request, pk=None):
         meter = self.get_object()
-        forecast_data = ai_services.forecast_energy_usage(meter.current_usage_kw)
+        forecast_data = energy_forecast.forecasts_for([meter.id], self.version_of(EnergyMeter))[meter.id]
         return Response({"forecast": forecast_data})
 
+    # Every meter at once: one vectorized pass on a cache miss
+    @action(detail=False, methods=['get'], url_path='forecast')
+    def forecast_all(self, request):
+        meter_ids = list(EnergyMeter.objects.values_list('id', flat=True))
+        return Response({
+            "resolution": settings.ENERGY_FORECAST_RESOLUTION,
+            "horizon": settings.ENERGY_FORECAST_HORIZON,
+            "forecasts": energy_forecast.forecasts_for(meter_ids, self.version_of(EnergyMeter))
+        })
+
 # Merchandise
-class MerchandiseItemViewSet(viewsets.ModelViewSet):
+class MerchandiseItemViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = MerchandiseItem.objects.all()
     serializer_class = MerchandiseItemSerializer
 
 # Logs
-class SystemLogViewSet(viewsets.ModelViewSet):
+class SystemLogViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = SystemLog.objects.all()
     serializer_class = SystemLogSerializer
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        params = self.request.query_params
+        if params.get('level'):
+            queryset = queryset.filter(level=params['level'].upper())
+        if params.get('module'):
+            queryset = queryset.filter(module=params['module'])
+        return sparse_queryset(queryset, self.request, SystemLog)
+
+INGEST_ERRORS_SHOWN = 20
+
+class IngestReadings(APIView):
+    # Turnstiles and meters: NDJSON lines like {"zone": 3, "count": 412}
+    # or {"meter": 1, "kw": 455.2}, with an optional "ts"
+    parser_classes = [NDJSONParser, JSONParser]
+
+    def get(self, request):
+        return Response({**ingest_buffer.stats(), "anomalies": {
+            "zones": anomaly.zone_detector.stats(), "meters": anomaly.meter_detector.stats(),
+        }})
+
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({"error": "Expected NDJSON lines or a JSON array of readings"}, status=400)
+        try:
+            accepted, dropped = ingest_buffer.add(items)
+        except BufferFull:
+            return Response({"error": "Ingest buffer full, retry later"}, status=429,
+                            headers={"Retry-After": str(max(1, round(ingest_buffer.interval)))})
+        body = {"accepted": accepted, "dropped": dropped}
+        errors = getattr(items, 'errors', None)
+        if errors:
+            # Lines that aren't JSON; other dropped lines are readings that don't parse
+            body["errors"] = [{"line": number, "error": message} for number, message in errors[:INGEST_ERRORS_SHOWN]]
+        return Response(body, status=202)
+
+def metrics_view(request):
+    # Prometheus scrape target; histograms are per process
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def export_view(request, dataset):
+    # Plain view: DRF would claim ?format= for content negotiation
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    params = request.GET
+    try:
+        content_type, filename, body = exports.export(
+            dataset, params.get('format', 'csv'), settings.EXPORT_CHUNK_SIZE,
+            event=exports.parse_id(params.get('event'), 'event'),
+            zone=exports.parse_id(params.get('zone'), 'zone'),
+            start=exports.parse_time(params.get('start'), 'start'),
+            end=exports.parse_time(params.get('end'), 'end'),
+        )
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    response = StreamingHttpResponse(concurrency.streaming_body(body, request), content_type=content_type)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 class GenerateMockData(APIView):
     def post(self, request):
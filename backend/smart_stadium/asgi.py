@@ -5,11 +5,25 @@ from channels.auth import AuthMiddlewareStack
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_stadium.settings')
 
+django_asgi_app = get_asgi_application()
+
+from django.conf import settings
+import api.routing
+
+if settings.TICKET_INDEX_ENABLED and settings.TICKET_INDEX_WARM_ON_STARTUP:
+    from api.ticket_index import ticket_index
+    ticket_index.start_warmup()
+
+if settings.SIMULATION_AUTOSTART:
+    # Background tick engine: live data moves without any GET writing rows
+    from api.simulation import TickEngine
+    TickEngine().start_background()
+
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
-    # "websocket": AuthMiddlewareStack(
-    #     URLRouter(
-    #         # api.routing.websocket_urlpatterns
-    #     )
-    # ),
+    "http": django_asgi_app,
+    "websocket": AuthMiddlewareStack(
+        URLRouter(
+            api.routing.websocket_urlpatterns
+        )
+    ),
 })
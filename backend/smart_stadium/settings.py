@@ -32,6 +32,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'api.metrics.RequestMetricsMiddleware',
+    'api.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -72,9 +74,32 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD') or os.getenv('DB_PASSWORD', ''),
         'HOST': os.getenv('POSTGRES_HOST') or os.getenv('DB_HOST', '127.0.0.1'),
         'PORT': os.getenv('POSTGRES_PORT') or os.getenv('DB_PORT', '5432'),
+        # Keep connections open across requests; health checks drop dead ones
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Driver-level pool (needs psycopg 3 with the pool extra instead of psycopg2)
+if os.getenv('DB_POOL') == 'True':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {'pool': {
+        'min_size': int(os.getenv('DB_POOL_MIN', '2')),
+        'max_size': int(os.getenv('DB_POOL_MAX', '10')),
+    }}
+
+# Read replica: safe-method requests read from it unless the client wrote
+# within the last DB_REPLICA_STICKY_SECONDS (see api/db_router.py)
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT') or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['api.db_router.PrimaryReplicaRouter']
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', '5'))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -173,4 +198,108 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Websocket push (ws/live/): how often subscribed topics are checked for
+# changes, and how often they are re-read even without a local write
+LIVE_PUSH_INTERVAL = float(os.getenv('LIVE_PUSH_INTERVAL', '0.5'))
+LIVE_RESYNC_INTERVAL = float(os.getenv('LIVE_RESYNC_INTERVAL', '5'))
+
 ALLOWED_HOSTS = ["*"]
+
+# Independent read queries of one request (dashboard sections, energy
+# overview) run side by side on a pool of QUERY_POOL_SIZE threads, each
+# holding its own connection. ASYNC_VIEWS serves /api/dashboard-data from
+# the async view (api/views.py dashboard_data) instead of the DRF one.
+QUERY_POOL_SIZE = int(os.getenv('QUERY_POOL_SIZE', '8'))
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'True') == 'True'
+
+# Dashboard KPI counters (api/counters.py): rows per counter, so that
+# concurrent gate scans and imports don't all queue on one row lock
+KPI_COUNTER_SHARDS = int(os.getenv('KPI_COUNTER_SHARDS', '8'))
+
+# Simulation tick engine: python manage.py run_simulation, or in-process
+# under ASGI when SIMULATION_AUTOSTART is on (default: on in DEBUG)
+SIMULATION_TICK_INTERVAL = float(os.getenv('SIMULATION_TICK_INTERVAL', '5'))
+SIMULATION_AUTOSTART = os.getenv('SIMULATION_AUTOSTART', str(DEBUG)) == 'True'
+
+# Maximum ticket codes accepted by one POST /api/validate-tickets call
+VALIDATION_BATCH_LIMIT = int(os.getenv('VALIDATION_BATCH_LIMIT', '1000'))
+
+# In-memory ticket code index (Bloom filter + fingerprints) that rejects
+# unknown codes before they reach the database
+TICKET_INDEX_ENABLED = os.getenv('TICKET_INDEX_ENABLED', 'True') == 'True'
+TICKET_INDEX_WARM_ON_STARTUP = os.getenv('TICKET_INDEX_WARM_ON_STARTUP', 'True') == 'True'
+TICKET_INDEX_ERROR_RATE = float(os.getenv('TICKET_INDEX_ERROR_RATE', '0.01'))
+TICKET_INDEX_SYNC_INTERVAL = float(os.getenv('TICKET_INDEX_SYNC_INTERVAL', '1'))
+# Seconds each index sync reaches back before the previous one to cover
+# transactions then in flight (large issuance batches)
+TICKET_INDEX_SYNC_OVERLAP = int(os.getenv('TICKET_INDEX_SYNC_OVERLAP', '30'))
+
+# Crowd prediction: samples kept per zone, projection horizon (seconds)
+CROWD_PREDICTION_WINDOW = int(os.getenv('CROWD_PREDICTION_WINDOW', '30'))
+CROWD_PREDICTION_HORIZON = float(os.getenv('CROWD_PREDICTION_HORIZON', '900'))
+
+# Time-series history: max points per range query, and how long raw
+# readings are kept before prune_readings deletes them (rollups are kept)
+TIMESERIES_MAX_POINTS = int(os.getenv('TIMESERIES_MAX_POINTS', '5000'))
+TIMESERIES_RAW_RETENTION_HOURS = int(os.getenv('TIMESERIES_RAW_RETENTION_HOURS', '48'))
+
+# Energy readings are folded into rollups; raw rows are optional
+ENERGY_STORE_RAW_READINGS = os.getenv('ENERGY_STORE_RAW_READINGS', 'False') == 'True'
+ENERGY_HISTORY_HOURS = int(os.getenv('ENERGY_HISTORY_HOURS', '12'))
+
+# Energy forecast: rollup width and number of buckets fed to the model,
+# steps projected, and seconds a cached per-meter forecast lives
+ENERGY_FORECAST_RESOLUTION = int(os.getenv('ENERGY_FORECAST_RESOLUTION', '300'))
+ENERGY_FORECAST_WINDOW = int(os.getenv('ENERGY_FORECAST_WINDOW', '24'))
+ENERGY_FORECAST_HORIZON = int(os.getenv('ENERGY_FORECAST_HORIZON', '5'))
+ENERGY_FORECAST_TTL = int(os.getenv('ENERGY_FORECAST_TTL', '300'))
+
+# Sensor ingestion: readings waiting to be written before new batches get
+# 429, and seconds between bulk flushes
+INGEST_BUFFER_SIZE = int(os.getenv('INGEST_BUFFER_SIZE', '100000'))
+INGEST_FLUSH_INTERVAL = float(os.getenv('INGEST_FLUSH_INTERVAL', '1'))
+
+# Online anomaly detection on zone counts and meter readings (api/anomaly.py):
+# EWMA weight of each reading, z-scores that raise and clear an alert,
+# readings per sensor before alerting, and the smallest standard deviation
+# assumed (in the reading's units), so flat signals don't alert on noise
+ANOMALY_DETECTION = os.getenv('ANOMALY_DETECTION', 'True') == 'True'
+ANOMALY_ALPHA = float(os.getenv('ANOMALY_ALPHA', '0.05'))
+ANOMALY_THRESHOLD = float(os.getenv('ANOMALY_THRESHOLD', '5'))
+ANOMALY_CLEAR = float(os.getenv('ANOMALY_CLEAR', '2'))
+ANOMALY_WARMUP = int(os.getenv('ANOMALY_WARMUP', '30'))
+ANOMALY_MIN_STD = float(os.getenv('ANOMALY_MIN_STD', '1'))
+
+# Per-route request metrics at /api/metrics; requests slower than
+# SLOW_REQUEST_MS (0 = off) are logged with their SQL
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '0'))
+
+# Fast read path (api/fast_serialization.py): rows per streamed chunk, and
+# 'orjson' to encode with orjson when installed (faster, but some floats are
+# spelled differently from the regular DRF output)
+FAST_SERIALIZATION_CHUNK = int(os.getenv('FAST_SERIALIZATION_CHUNK', '2000'))
+FAST_JSON_ENCODER = os.getenv('FAST_JSON_ENCODER', 'json')
+
+# Offline gate manifests (api/gate_manifest.py): HMAC key shared with the
+# gate devices (derived from SECRET_KEY when empty), and seconds a delta
+# reaches back before its base version to cover transactions then in flight
+GATE_MANIFEST_KEY = os.getenv('GATE_MANIFEST_KEY', '')
+GATE_MANIFEST_DELTA_OVERLAP = int(os.getenv('GATE_MANIFEST_DELTA_OVERLAP', '30'))
+
+# Fraud scoring (api/fraud.py): JSON weights replacing the built-in model,
+# tickets per customer that never count as a burst, seconds an event's
+# price/customer profile is cached per process, and tickets per
+# transaction when rescoring an event
+FRAUD_MODEL_PATH = os.getenv('FRAUD_MODEL_PATH', '')
+FRAUD_BURST_LIMIT = int(os.getenv('FRAUD_BURST_LIMIT', '4'))
+FRAUD_PROFILE_TTL = float(os.getenv('FRAUD_PROFILE_TTL', '300'))
+FRAUD_RESCORE_CHUNK = int(os.getenv('FRAUD_RESCORE_CHUNK', '5000'))
+
+# Entry flow (api/entry_flow.py): seconds of recent scans the current
+# throughput, and the time-to-full projection, are measured over
+ENTRY_FLOW_WINDOW = int(os.getenv('ENTRY_FLOW_WINDOW', '300'))
+
+# CSV/Parquet exports (/api/exports/<dataset>, export_data): rows read from
+# the database, and written out, per chunk (a Parquet row group each)
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '10000'))
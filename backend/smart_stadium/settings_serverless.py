@@ -0,0 +1,41 @@
+"""
+Lean profile for the Vercel function (api/index.py).
+
+Same configuration as settings.py minus everything a short-lived,
+API-only WSGI process can't use: the ASGI server and websockets, the
+admin, static file serving and the browsable API. Background work
+(tick engine, ticket index warm-up) stays off so cold starts only pay
+for Django and the API.
+"""
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'rest_framework',
+    'corsheaders',
+    'api',
+]
+
+MIDDLEWARE = [
+    'corsheaders.middleware.CorsMiddleware',
+    'api.db_router.ReplicaRoutingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+]
+
+# JSON only: no template engine or browsable API to load
+TEMPLATES = []
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+}
+STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+SIMULATION_AUTOSTART = False
+TICKET_INDEX_WARM_ON_STARTUP = False
+METRICS_ENABLED = False
@@ -9,5 +9,11 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smart_stadium.settings")
 
 application = get_wsgi_application()
 
+from django.conf import settings
+
+if settings.TICKET_INDEX_ENABLED and settings.TICKET_INDEX_WARM_ON_STARTUP:
+    from api.ticket_index import ticket_index
+    ticket_index.start_warmup()
+
 # ⭐ Vercel requires this
 handler = application
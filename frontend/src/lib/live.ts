@@ -0,0 +1,61 @@
+// Websocket client for the backend's ws/live/ push channel.
+// Messages are either a full "snapshot" of a topic or a "delta" with only
+// the keys that changed since the previous message.
+
+export type LiveTopic = 'dashboard' | 'crowd' | 'energy' | 'alerts';
+
+export interface LiveMessage {
+    type: 'snapshot' | 'delta' | 'error';
+    topic: LiveTopic;
+    data?: Record<string, any>;
+    changed?: Record<string, any>;
+    removed?: string[];
+    error?: string;
+}
+
+const apiBase = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000/api';
+
+export const liveUrl = (topics: LiveTopic[]) =>
+    `${apiBase.replace(/^http/, 'ws').replace(/\/api\/?$/, '')}/ws/live/?topics=${topics.join(',')}`;
+
+// Applies a snapshot or delta message to the previous state of a topic
+export const applyLiveMessage = (state: Record<string, any> | null, msg: LiveMessage) => {
+    if (msg.type === 'snapshot') return { ...msg.data };
+    if (msg.type !== 'delta') return state;
+    const next = { ...(state || {}), ...msg.changed };
+    (msg.removed || []).forEach(key => delete next[key]);
+    return next;
+};
+
+// Opens the socket and reconnects with backoff; returns a cleanup function.
+// onStatus lets callers fall back to HTTP polling while the socket is down.
+export function subscribeLive(
+    topics: LiveTopic[],
+    onMessage: (msg: LiveMessage) => void,
+    onStatus?: (connected: boolean) => void,
+) {
+    let socket: WebSocket | null = null;
+    let retry = 1000;
+    let timer: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
+
+    const connect = () => {
+        socket = new WebSocket(liveUrl(topics));
+        socket.onopen = () => { retry = 1000; onStatus?.(true); };
+        socket.onmessage = (event) => onMessage(JSON.parse(event.data));
+        socket.onclose = () => {
+            onStatus?.(false);
+            if (!closed) {
+                timer = setTimeout(connect, retry);
+                retry = Math.min(retry * 2, 30000);
+            }
+        };
+    };
+
+    connect();
+    return () => {
+        closed = true;
+        clearTimeout(timer);
+        socket?.close();
+    };
+}
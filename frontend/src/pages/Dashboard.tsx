@@ -7,6 +7,7 @@ import { useEffect, useState } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
 import { Card } from '@/components/ui/card';
+import { subscribeLive, applyLiveMessage } from '@/lib/live';
 import {
     Calendar, Activity, Zap,
     Ticket, Users, Bell, Shield, ChevronRight,
@@ -77,7 +78,9 @@ export default function Dashboard() {
         return () => clearInterval(timer);
     }, []);
 
-    // Real-time backend data polling
+    // Real-time backend data: websocket push, HTTP polling only while the socket is down
+    const [liveConnected, setLiveConnected] = useState(false);
+
     const fetchStats = async () => {
         try {
             const res = await axios.get('/dashboard-data');
@@ -89,9 +92,18 @@ export default function Dashboard() {
 
     useEffect(() => {
         fetchStats();
+        return subscribeLive(
+            ['dashboard'],
+            (msg) => setStats((prev: any) => ({ ...applyLiveMessage(prev, msg), system_health: prev?.system_health })),
+            setLiveConnected,
+        );
+    }, []);
+
+    useEffect(() => {
+        if (liveConnected) return;
         const interval = setInterval(fetchStats, 5000); // Polling every 5s
         return () => clearInterval(interval);
-    }, []);
+    }, [liveConnected]);
 
     return (
         <div className="min-h-screen bg-[#F8FAFC] p-6 md:p-10 space-y-10 max-w-[1800px] mx-auto overflow-x-hidden text-[#111827]">
@@ -39,8 +39,9 @@ export default function Ticketing() {
 
     const fetchTickets = async () => {
         try {
-            const res = await axios.get('/tickets/');
-            setTickets(res.data);
+            // Cursor-paginated: first page only, newest tickets first
+            const res = await axios.get('/tickets/', { params: { page_size: 50 } });
+            setTickets(res.data.results);
         } catch (err) {
             console.error(err);
         }